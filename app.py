@@ -1,12 +1,14 @@
 import streamlit as st
-import pandas as pd
 from database import get_db
+import crud
 import summary_stats as statistics
 import data_loader
 from modules import home, players, members
 from modules import transfers as transfers_page
 from modules import teams as teams_page
 from modules import head_to_head
+from modules import leaderboard
+from modules import performance
 
 # Initialize database connection
 db = get_db()
@@ -21,46 +23,73 @@ st.set_page_config(
 
 # Sidebar navigation
 st.sidebar.title("Comunio App")
-page = st.sidebar.radio(
-    "Navigation",
-    ["Home", "Transfers", "Players", "Members", "Teams", "Statistics", "Head-to-Head"],
-)
+# The Performance page is hidden unless the URL contains ?perf=1
+nav_pages = ["Home", "Transfers", "Players", "Members", "Teams", "Statistics", "Head-to-Head", "Rangliste"]
+perf_enabled = st.query_params.get("perf") == "1"
+if perf_enabled:
+    nav_pages.append("Performance")
+page = st.sidebar.radio("Navigation", nav_pages)
+
+# Attribute every MongoDB command of this rerun to the selected page; reply
+# sizes are only measured while profiling
+crud.start_rerun(f"page.{page}", measure_reply_bytes=perf_enabled)
 
 # Main title and season selector
 st.title("Comunio App")
 spielzeit = st.selectbox("Spielzeit", ["2025/2026", "2024/2025", "2023/2024"], index=0)
 
-# Manual cache bypass button
-if "cache_bypass" not in st.session_state:
-    st.session_state.cache_bypass = False
+# Data versions change whenever the watcher sees a write to the collection.
+# Without change streams a throttled content probe detects changes instead.
+data_loader.ensure_indexes(db)
+watcher = data_loader.start_change_watcher(db)
 
+# Manual reload: probe the data now instead of waiting for the next probe
 col1, col2 = st.columns([1, 10])
 with col1:
-    if st.button("🔄 Daten neu laden"):
-        st.session_state.cache_bypass = True
-        st.rerun()
+    reload_requested = st.button("🔄 Daten neu laden")
 
-# Get current date for caching (hourly granularity, or use cache bypass)
-date = pd.to_datetime("today").hour if not st.session_state.cache_bypass else None
+# A watcher whose stream failed later has stopped; poll instead
+if watcher is None or not watcher.is_alive() or reload_requested:
+    data_versions = crud.probe_data_versions(db, spielzeit, force=reload_requested)
+else:
+    data_versions = crud.get_data_versions(db, spielzeit)
 
-# Load data — all via @st.cache_data, keyed by (spielzeit, date)
-# No session_state needed: cache_data handles deduplication per season
-transfers_data = data_loader.load_transfers(db, spielzeit, date)
-players_points = data_loader.load_player_points(db, spielzeit, date)
-player_data_combined = data_loader.load_player_data_combined(db, spielzeit, date)
+# Only the datasets the selected page declares are loaded, on first access, all
+# via @st.cache_data keyed by (spielzeit, version)
+page_modules = {
+    "Home": home,
+    "Transfers": transfers_page,
+    "Players": players,
+    "Members": members,
+    "Teams": teams_page,
+    "Statistics": statistics,
+    "Head-to-Head": head_to_head,
+    "Rangliste": leaderboard,
+    "Performance": performance,
+}
+datasets = data_loader.open_datasets(db, spielzeit, data_versions, page_modules[page].DATASETS)
 
-# Route to appropriate page
-if page == "Statistics":
-    statistics.show(db, spielzeit)
-elif page == "Home":
-    home.show(db, transfers_data, spielzeit)
-elif page == "Players":
-    players.show(player_data_combined)
-elif page == "Members":
-    members.show(transfers_data)
-elif page == "Transfers":
-    transfers_page.show(db, transfers_data, spielzeit)
-elif page == "Teams":
-    teams_page.show()
-elif page == "Head-to-Head":
-    head_to_head.show(transfers_data, spielzeit)
+# Route to appropriate page, timed as one span per page render;
+# the rerun is closed even when the page stops early (e.g. st.rerun)
+try:
+    with crud.span(f"page.{page}"):
+        if page == "Statistics":
+            statistics.show(db, spielzeit)
+        elif page == "Home":
+            home.show(db, datasets["transfers_index"].get(), spielzeit)
+        elif page == "Players":
+            players.show(datasets["player_data_combined"].get())
+        elif page == "Members":
+            members.show(datasets["transfers_index"].get())
+        elif page == "Transfers":
+            transfers_page.show(db, datasets["transfers_index"].get(), spielzeit)
+        elif page == "Teams":
+            teams_page.show()
+        elif page == "Head-to-Head":
+            head_to_head.show(datasets["transfers_index"].get(), spielzeit)
+        elif page == "Rangliste":
+            leaderboard.show(datasets["league_timeline"].get(), spielzeit)
+        elif page == "Performance":
+            performance.show()
+finally:
+    crud.finish_rerun()
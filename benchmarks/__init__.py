@@ -0,0 +1 @@
+"""Benchmarks for the crud layer. They need a MongoDB server (``MONGO_URI``)."""
@@ -0,0 +1,110 @@
+"""Compare the $unwind pipelines with the unwind-free forms in crud.pipelines.
+
+Loads a synthetic league (``benchmarks.synthetic``) into a scratch database, runs
+both forms of each query, checks that they return the same result and prints
+the median time of each:
+
+    python -m benchmarks.pipelines --players 2000 --seasons 2023/2024 2024/2025
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from pymongo.mongo_client import MongoClient
+
+from crud import pipelines
+from crud.base import get_date_range
+from . import synthetic
+
+SPIELZEIT = "2024/2025"
+
+
+def unwind_season_points(spielzeit: str) -> list:
+    date_from, date_to = get_date_range(spielzeit)
+    # "T99" sorts after every timestamp of the last season day
+    return [
+        {"$unwind": "$point_history"},
+        {"$match": {"point_history.matchday.timestamp": {"$gte": date_from, "$lte": f"{date_to}T99"}}},
+        {"$group": {
+            "_id": "$id",
+            "Spieler": {"$first": "$name"},
+            "Preis": {"$first": "$price"},
+            "Punkte": {"$sum": {"$toInt": {"$ifNull": ["$point_history.points", 0]}}},
+            "Spiele": {"$sum": 1},
+        }},
+        {"$project": {"_id": 0, "ID": "$_id", "Spieler": 1, "Preis": 1, "Punkte": 1, "Spiele": 1,
+                      "PpS": {"$round": [{"$divide": ["$Punkte", "$Spiele"]}, 2]}}},
+    ]
+
+
+def sort_latest_market_values(player_ids: list) -> list:
+    return [
+        {"$match": {"id": {"$in": player_ids}}},
+        {"$project": {"_id": 0, "id": 1, "latest_price": {"$arrayElemAt": [
+            {"$sortArray": {"input": "$price_history", "sortBy": {"timestamp": -1}}}, 0]}}},
+        {"$project": {"id": 1, "latest_price": "$latest_price.quotedPrice"}},
+    ]
+
+
+def unwind_points_between(player_id: str, start_date: str, end_date: str) -> list:
+    return [
+        {"$match": {"player_id": player_id}},
+        {"$unwind": "$point_history"},
+        {"$match": {"point_history.matchday.timestamp": {"$gte": start_date, "$lte": end_date}}},
+        {"$group": {"_id": "$player_id", "total_points": {"$sum": "$point_history.points"},
+                    "matchdays_count": {"$sum": 1}}},
+        {"$project": {"_id": 0, "total_points": 1, "matchdays_count": 1}},
+    ]
+
+
+def _run(collection, pipeline, repeat: int):
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = list(collection.aggregate(pipeline, allowDiskUse=True))
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def _normalized(result: list, key: str) -> list:
+    return sorted(result, key=lambda doc: doc[key])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark $unwind vs unwind-free pipelines")
+    parser.add_argument("--uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="comunio_benchmark")
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--seasons", nargs="+", default=["2023/2024", SPIELZEIT])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-load", action="store_true", help="reuse the existing scratch data")
+    args = parser.parse_args(argv)
+
+    db = MongoClient(args.uri)[args.database]
+    if not args.skip_load:
+        synthetic.populate(db, players=args.players, seasons=args.seasons)
+
+    ids = list(range(1, args.players + 1, 10))
+    cases = [
+        ("season points", "Players", "ID",
+         unwind_season_points(SPIELZEIT), pipelines.season_points_pipeline(SPIELZEIT, with_market_value=False)),
+        ("latest market values", "Players", "id",
+         sort_latest_market_values(ids), pipelines.latest_market_values_pipeline(ids)),
+        ("points between dates", "PlayerPoints", "total_points",
+         unwind_points_between("1", "2024-01-01", "2024-12-31"),
+         pipelines.points_between_pipeline("1", "2024-01-01", "2024-12-31")),
+    ]
+
+    print(f"{'query':<24}{'unwind/sort':>14}{'unwind-free':>14}{'speedup':>10}  same result")
+    for name, collection, key, old_pipeline, new_pipeline in cases:
+        old_time, old_result = _run(db[collection], old_pipeline, args.repeat)
+        new_time, new_result = _run(db[collection], new_pipeline, args.repeat)
+        same = _normalized(old_result, key) == _normalized(new_result, key)
+        print(f"{name:<24}{old_time * 1000:>12.1f}ms{new_time * 1000:>12.1f}ms{old_time / new_time:>9.1f}x  {same}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,172 @@
+"""Cold/warm benchmark of the public crud functions against a local MongoDB.
+
+Seeds a scratch database with ``benchmarks.synthetic``, then times every
+data-access function exported from ``crud``. A cold call runs right after all
+in-process caches (PlayerStore, history cache, version mirror, portfolio
+caches) were dropped; warm calls follow without resetting. Peak memory of the
+cold call is measured separately with tracemalloc so it does not distort the
+timings. Results go to JSON:
+
+    python -m benchmarks.suite --members 12 --players 600 --seasons 2 --output bench.json
+"""
+
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+from pymongo.mongo_client import MongoClient
+
+import crud
+
+from . import synthetic
+
+
+def seed(db, members: int, players: int, seasons: int, seed: int = 0) -> List[str]:
+    """Write a synthetic league over the newest seasons; returns them, newest first."""
+    season_names = sorted(crud.SEASON_DATE_RANGES, reverse=True)[:seasons]
+    synthetic.populate(db, members=members, players=players, seasons=season_names, seed=seed)
+    return season_names
+
+
+def benchmark_cases(spielzeit: str, member: str, player_id: str) -> List[Tuple[str, Callable]]:
+    """(name, callable(db)) for every data-access function exported from crud."""
+    date_from, _ = crud.get_date_range(spielzeit)
+    return [
+        ("get_transfers", lambda db: crud.get_transfers(db, spielzeit)),
+        ("count_second_bids", lambda db: crud.count_second_bids(db, spielzeit)),
+        ("count_transfers_buys", lambda db: crud.count_transfers_buys(db, spielzeit)),
+        ("get_player_store", lambda db: crud.get_player_store(db, spielzeit)),
+        ("get_player_market_value", lambda db: crud.get_player_market_value(db, player_id, spielzeit)),
+        ("get_current_market_values_bulk", lambda db: crud.get_current_market_values_bulk(db, [player_id])),
+        ("get_player_market_values_df", lambda db: crud.get_player_market_values_df(db)),
+        ("get_player_current_market_values_df", lambda db: crud.get_player_current_market_values_df(db)),
+        ("get_player_points_df", lambda db: crud.get_player_points_df(db, spielzeit)),
+        ("get_player_points", lambda db: crud.get_player_points(db, player_id, spielzeit)),
+        ("get_player_points_between_dates",
+         lambda db: crud.get_player_points_between_dates(db, player_id, date_from)),
+        ("get_player_points_with_market_value_df",
+         lambda db: crud.get_player_points_with_market_value_df(db, spielzeit)),
+        ("get_portfolio_timeline", lambda db: crud.get_portfolio_timeline(db, member, spielzeit)),
+        ("get_portfolio_current_value_timeline",
+         lambda db: crud.get_portfolio_current_value_timeline(db, member, spielzeit)),
+        ("get_or_calculate_portfolio_timeline",
+         lambda db: crud.get_or_calculate_portfolio_timeline(db, member, spielzeit)),
+        ("calculate_portfolio_timeline_optimized",
+         lambda db: crud.calculate_portfolio_timeline_optimized(db, member, spielzeit)),
+        ("get_or_calculate_market_value_timeline",
+         lambda db: crud.get_or_calculate_market_value_timeline(db, member, spielzeit)),
+        ("calculate_market_value_timeline_optimized",
+         lambda db: crud.calculate_market_value_timeline_optimized(db, member, spielzeit)),
+        ("sample_portfolio_market_value",
+         lambda db: crud.sample_portfolio_market_value(db, member, spielzeit, "matchday")),
+        ("get_league_timeline", lambda db: crud.get_league_timeline(db, spielzeit)),
+        ("probe_data_versions", lambda db: crud.probe_data_versions(db, spielzeit, force=True)),
+        ("get_cache_status", lambda db: crud.get_cache_status(db)),
+    ]
+
+
+def reset_caches(db) -> None:
+    """Drop every in-process and MongoDB-side cache the crud layer keeps."""
+    crud.invalidate_player_store()
+    crud.clear_history_cache()
+    crud.reset_version_mirror()
+    crud.clear_portfolio_cache(db)
+
+
+def _measure(db, call: Callable, repeat: int) -> Dict[str, float]:
+    reset_caches(db)
+    start = time.perf_counter()
+    call(db)
+    cold = time.perf_counter() - start
+
+    reset_caches(db)
+    tracemalloc.start()
+    call(db)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    warm = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call(db)
+        warm.append(time.perf_counter() - start)
+    p50, p95, p99 = np.percentile(warm, [50, 95, 99]) * 1000
+    return {
+        "cold_ms": round(cold * 1000, 3),
+        "warm_p50_ms": round(float(p50), 3),
+        "warm_p95_ms": round(float(p95), 3),
+        "warm_p99_ms": round(float(p99), 3),
+        "warm_mean_ms": round(statistics.fmean(warm) * 1000, 3),
+        "throughput_per_s": round(len(warm) / sum(warm), 2) if sum(warm) else None,
+        "peak_memory_bytes": peak,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the crud layer against a local MongoDB")
+    parser.add_argument("--uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="comunio_benchmark")
+    parser.add_argument("--members", type=int, default=synthetic.LEAGUE_MEMBERS)
+    parser.add_argument("--players", type=int, default=synthetic.LEAGUE_PLAYERS)
+    parser.add_argument("--seasons", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5, help="warm calls per function")
+    parser.add_argument("--only", nargs="*", help="benchmark only these functions")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the existing scratch data")
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args(argv)
+
+    db = MongoClient(args.uri)[args.database]
+    if args.skip_seed:
+        seasons = sorted(crud.SEASON_DATE_RANGES, reverse=True)[:args.seasons]
+    else:
+        seasons = seed(db, args.members, args.players, args.seasons)
+    spielzeit = seasons[0]
+    sample = db["Transfers"].find_one({"buy.date": {"$gte": crud.get_date_range(spielzeit)[0]}}) or {}
+
+    results = {}
+    for name, call in benchmark_cases(spielzeit, sample.get("member_name", ""), sample.get("player_id", "1")):
+        if args.only and name not in args.only:
+            continue
+        results[name] = _measure(db, call, args.repeat)
+        print(f"{name:<42} cold {results[name]['cold_ms']:>10.1f}ms  warm p50 {results[name]['warm_p50_ms']:>9.1f}ms")
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": dt.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "scale": {
+                "members": args.members,
+                "players": args.players,
+                "seasons": args.seasons,
+            },
+            "spielzeit": spielzeit,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
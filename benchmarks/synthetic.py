@@ -0,0 +1,236 @@
+"""Deterministic synthetic league matching the production schema.
+
+Generates ``Players`` (daily ``price_history`` with CET/CEST offsets and
+weekly ``point_history``), ``PlayerPoints`` and ``Transfers`` documents with
+the field shapes the crud layer reads. Every player is generated from its own
+RNG seeded by ``(seed, player id)``, so the output is identical across runs and
+independent of batch size. Documents are produced lazily and inserted with
+``insert_many`` batches, so memory stays bounded by one player's history plus
+one batch, whatever the scale.
+
+A player is owned by at most one member at a time. A sale goes either back to
+the Computer or to another member, whose buy then has the seller as
+``from_name``:
+
+    python -m benchmarks.synthetic --scale 100 --seasons 2025/2026 2024/2025
+"""
+
+import argparse
+import datetime as dt
+import os
+import random
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+from pymongo.mongo_client import MongoClient
+
+import crud
+
+# Size of the real league; --scale multiplies members and players
+LEAGUE_MEMBERS = 12
+LEAGUE_PLAYERS = 600
+
+MATCHDAYS_PER_SEASON = 34
+INSERT_BATCH_SIZE = 1000
+
+
+def _rng(seed: int, kind: str, player_id: int) -> random.Random:
+    return random.Random(f"{seed}:{kind}:{player_id}")
+
+
+def _history_days(seasons: Sequence[str]) -> List[dt.date]:
+    first = min(dt.date.fromisoformat(crud.get_date_range(s)[0]) for s in seasons)
+    last = min(max(dt.date.fromisoformat(crud.get_date_range(s)[1]) for s in seasons), dt.date.today())
+    # Quotes start a little before the first season so as-of lookups have a prior value
+    first -= dt.timedelta(days=14)
+    return [first + dt.timedelta(days=d) for d in range((last - first).days + 1)]
+
+
+def _offset(day: dt.date) -> str:
+    # Rough CEST window, enough to mix offsets like the production data
+    return "+02:00" if 4 <= day.month <= 10 else "+01:00"
+
+
+def _price_series(seed: int, player_id: int, n_days: int) -> List[int]:
+    rng = _rng(seed, "price", player_id)
+    price = rng.randrange(200_000, 20_000_000, 10_000)
+    prices = []
+    for _ in range(n_days):
+        price = max(100_000, int(price * (1 + rng.gauss(0, 0.02))) // 10_000 * 10_000)
+        prices.append(price)
+    return prices
+
+
+def _matchdays(seasons: Sequence[str]) -> List[dt.date]:
+    days = []
+    for spielzeit in sorted(seasons):
+        date_from = dt.date.fromisoformat(crud.get_date_range(spielzeit)[0])
+        first = date_from + dt.timedelta(days=(5 - date_from.weekday()) % 7 + 49)  # a Saturday in August
+        days.extend(first + dt.timedelta(weeks=w) for w in range(MATCHDAYS_PER_SEASON))
+    return [day for day in days if day <= dt.date.today()]
+
+
+def _point_history(seed: int, player_id: int, matchdays: List[dt.date]) -> List[dict]:
+    rng = _rng(seed, "points", player_id)
+    strength = rng.random()
+    history = []
+    for key, day in enumerate(matchdays, start=1):
+        played = rng.random() < 0.3 + 0.6 * strength
+        history.append({
+            "matchday": {"timestamp": f"{day.isoformat()}T15:30:00+00:00", "key": key},
+            "points": int(rng.gauss(4 + 6 * strength, 4)) if played else None,
+        })
+    return history
+
+
+def generate_players(players: int, seasons: Sequence[str], seed: int = 0) -> Iterator[dict]:
+    """Players documents with daily price quotes and season matchdays."""
+    days = _history_days(seasons)
+    matchdays = _matchdays(seasons)
+    for player_id in range(1, players + 1):
+        prices = _price_series(seed, player_id, len(days))
+        rng = _rng(seed, "quote", player_id)
+        yield {
+            "id": player_id,
+            "name": f"Spieler {player_id}",
+            "price": prices[-1],
+            "price_history": [
+                {"timestamp": f"{day.isoformat()}T{rng.randint(5, 8):02d}:00:00{_offset(day)}", "quotedPrice": price}
+                for day, price in zip(days, prices)
+            ],
+            "point_history": _point_history(seed, player_id, matchdays),
+        }
+
+
+def generate_player_points(players: int, seasons: Sequence[str], seed: int = 0) -> Iterator[dict]:
+    """PlayerPoints documents (string ``player_id``) with the same point histories."""
+    matchdays = _matchdays(seasons)
+    for player_id in range(1, players + 1):
+        yield {"player_id": str(player_id), "point_history": _point_history(seed, player_id, matchdays)}
+
+
+def generate_transfers(
+    members: int, players: int, seasons: Sequence[str], seed: int = 0, ownership: float = 0.5
+) -> Iterator[dict]:
+    """Transfers documents; roughly ``ownership`` of all player-days are owned by a member."""
+    member_names = [f"Mitspieler {m}" for m in range(1, members + 1)]
+    days = _history_days(seasons)
+    day_index = {day: i for i, day in enumerate(days)}
+    today = dt.date.today()
+    for player_id in range(1, players + 1):
+        prices = _price_series(seed, player_id, len(days))
+        rng = _rng(seed, "transfers", player_id)
+        for spielzeit in sorted(seasons):
+            date_from, date_to = (dt.date.fromisoformat(d) for d in crud.get_date_range(spielzeit))
+            # Only the newest season keeps unsold players; earlier squads are sold off at its end
+            keep_unsold = spielzeit == max(seasons) or date_to >= today
+            date_to = min(date_to, today)
+            day = date_from + dt.timedelta(days=rng.randrange(0, 30))
+            seller, owner = "Computer", None
+            while day <= date_to:
+                if owner is None:
+                    if rng.random() > ownership:
+                        day += dt.timedelta(days=rng.randrange(7, 60))
+                        continue
+                    owner = rng.choice(member_names)
+                market_value = prices[day_index[day]]
+                buy = {
+                    "date": day.isoformat(),
+                    "price": int(market_value * rng.uniform(1.0, 1.3)) // 1000 * 1000,
+                    "from_name": seller,
+                    "second_highest_bidder": rng.choice(member_names + [None, None]),
+                }
+                sell_day = day + dt.timedelta(days=rng.randrange(3, 150))
+                if sell_day > date_to and not keep_unsold:
+                    sell_day = date_to
+                sell = None
+                next_owner = None
+                if sell_day <= date_to:
+                    if members > 1 and sell_day < date_to and rng.random() < 0.3:
+                        next_owner = rng.choice([m for m in member_names if m != owner])
+                    sell = {
+                        "date": sell_day.isoformat(),
+                        "price": int(prices[day_index[sell_day]] * rng.uniform(0.9, 1.2)) // 1000 * 1000,
+                        "to_name": next_owner or "Computer",
+                    }
+                yield {
+                    "player_id": str(player_id),
+                    "player_name": f"Spieler {player_id}",
+                    "member_name": owner,
+                    "buy": buy,
+                    "sell": sell,
+                }
+                if sell is None:
+                    break
+                # A member-to-member sale is the next owner's buy on the same day
+                seller, owner = (owner, next_owner) if next_owner else ("Computer", None)
+                day = sell_day if next_owner else sell_day + dt.timedelta(days=rng.randrange(1, 30))
+
+
+def insert_streaming(collection, documents: Iterable[dict], batch_size: int = INSERT_BATCH_SIZE) -> int:
+    """Insert documents in ``insert_many`` batches; returns the number inserted."""
+    batch, inserted = [], 0
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            collection.insert_many(batch, ordered=False)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+    return inserted
+
+
+def populate(
+    db,
+    members: int = LEAGUE_MEMBERS,
+    players: int = LEAGUE_PLAYERS,
+    seasons: Sequence[str] = ("2025/2026",),
+    seed: int = 0,
+    batch_size: int = INSERT_BATCH_SIZE,
+    drop: bool = True,
+) -> Dict[str, int]:
+    """Fill Players, PlayerPoints and Transfers; returns document counts."""
+    collections = ("Players", "PlayerPoints", "Transfers", "PortfolioCache", "MarketValueCache",
+                   "PlayerSeasonStats", "DataVersions")
+    if drop:
+        for name in collections:
+            db[name].drop()
+    counts = {
+        "Players": insert_streaming(db["Players"], generate_players(players, seasons, seed), batch_size),
+        "PlayerPoints": insert_streaming(
+            db["PlayerPoints"], generate_player_points(players, seasons, seed), batch_size
+        ),
+        "Transfers": insert_streaming(
+            db["Transfers"], generate_transfers(members, players, seasons, seed), batch_size
+        ),
+    }
+    crud.ensure_indexes(db)
+    return counts
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic Comunio league")
+    parser.add_argument("--uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="comunio_benchmark")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiple of the real league size")
+    parser.add_argument("--seasons", nargs="+", default=["2025/2026"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=INSERT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    db = MongoClient(args.uri)[args.database]
+    counts = populate(
+        db,
+        members=max(1, round(LEAGUE_MEMBERS * args.scale)),
+        players=max(1, round(LEAGUE_PLAYERS * args.scale)),
+        seasons=args.seasons,
+        seed=args.seed,
+        batch_size=args.batch_size,
+    )
+    print(", ".join(f"{name}: {count}" for name, count in counts.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
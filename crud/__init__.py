@@ -11,16 +11,77 @@ Importing from ``crud`` directly continues to work as before:
 from .base import (  # noqa: F401
     SEASON_DATE_RANGES,
     DEFAULT_DATE_RANGE,
+    STARTING_BUDGET,
     get_date_range,
+    is_season_closed,
 )
 
 from .transfers import (  # noqa: F401
+    TRANSFER_COLUMNS,
+    TransfersIndex,
     get_transfers,
     count_second_bids,
     count_transfers_buys,
 )
 
+from .metrics import (  # noqa: F401
+    span,
+    timed,
+    current_span,
+    metrics_snapshot,
+    recent_traces,
+    metrics_json,
+    metrics_prometheus,
+    reset_metrics,
+)
+
+from .query_monitor import (  # noqa: F401
+    QueryMonitor,
+    get_query_monitor,
+    start_rerun,
+    finish_rerun,
+    recent_reruns,
+)
+
+from .snapshots import (  # noqa: F401
+    read_snapshot,
+    write_snapshot,
+    load_with_snapshot,
+    clear_snapshots,
+)
+
+from .timestamps import (  # noqa: F401
+    to_day_index,
+    to_season_day_index,
+    normalize_history,
+    clear_history_cache,
+)
+
+from .versions import (  # noqa: F401
+    VERSIONED_COLLECTIONS,
+    get_data_version,
+    get_data_versions,
+    bump_data_versions,
+    bump_all_versions,
+    reset_version_mirror,
+    probe_data_versions,
+)
+
+from .player_store import (  # noqa: F401
+    PlayerStore,
+    get_player_store,
+    invalidate_player_store,
+)
+
+from .player_stats import (  # noqa: F401
+    STATS_COLLECTION,
+    STATS_COLUMNS,
+    update_player_season_stats,
+    get_player_season_stats_df,
+)
+
 from .players import (  # noqa: F401
+    PLAYER_POINTS_COLUMNS,
     get_player_market_value,
     get_current_market_values_bulk,
     get_player_market_values_df,
@@ -31,16 +92,58 @@ from .players import (  # noqa: F401
     get_player_points_with_market_value_df,
 )
 
+from .timeline import (  # noqa: F401
+    TIMELINE_COLUMNS,
+    build_portfolio_timeline,
+    portfolio_state,
+)
+
 from .portfolio import (  # noqa: F401
     get_portfolio_timeline,
     get_portfolio_current_value_timeline,
     get_or_calculate_portfolio_timeline,
     update_portfolio_cache,
+    read_portfolio_cache,
+    read_portfolio_checkpoint,
     calculate_portfolio_timeline_from_date,
     calculate_portfolio_timeline_optimized,
     get_portfolio_market_value_fast,
+    get_market_value_watermark,
     get_or_calculate_market_value_timeline,
     calculate_market_value_timeline_optimized,
+    SAMPLE_FREQUENCIES,
+    get_sample_dates,
+    sample_portfolio_market_value,
+    mark_market_value_cache_stale,
     clear_portfolio_cache,
     get_cache_status,
 )
+
+from .leaderboard import (  # noqa: F401
+    LEAGUE_COLUMNS,
+    build_league_timeline,
+    get_league_timeline,
+    league_standings,
+)
+
+from .precompute import (  # noqa: F401
+    list_members,
+    precompute_season,
+)
+
+from .watcher import (  # noqa: F401
+    ChangeWatcher,
+    enable_pre_images,
+    start_change_watcher,
+)
+
+from .indexes import (  # noqa: F401
+    declared_indexes,
+    ensure_indexes,
+    audit_query_plans,
+)
+
+from .raw_bson import (  # noqa: F401
+    aggregate_columns,
+    columns_from_documents,
+)
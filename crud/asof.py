@@ -0,0 +1,84 @@
+"""Vectorized as-of lookups over CSR-packed price histories.
+
+Histories are stored as one flattened ``days``/``values`` buffer per kind with
+``offsets`` marking where each row starts (see ``PlayerStore``). Rows are
+sorted by day, so combining ``(row, day)`` into one int64 key gives a globally
+sorted array and every (row, query day) pair can be answered by a single
+``np.searchsorted`` call.
+"""
+
+import datetime
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+_DAY_BIAS = 1 << 31
+
+
+def to_day(value) -> int:
+    """Days since epoch for a date, datetime or ISO date string."""
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    elif not isinstance(value, datetime.date):
+        value = pd.to_datetime(str(value)[:10]).date()
+    return value.toordinal() - datetime.date(1970, 1, 1).toordinal()
+
+
+def day_range(start, end) -> np.ndarray:
+    """Inclusive int64 range of days between two dates (empty if end < start)."""
+    return np.arange(to_day(start), to_day(end) + 1, dtype=np.int64)
+
+
+def days_to_dates(days: np.ndarray) -> np.ndarray:
+    """Object array of ``datetime.date`` for days since epoch."""
+    return np.asarray(days, dtype="datetime64[D]").astype(object)
+
+
+def composite_keys(offsets: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """Sorted int64 keys ``(row << 32) + day`` for a CSR-packed history."""
+    rows = np.repeat(np.arange(len(offsets) - 1, dtype=np.int64), np.diff(offsets))
+    return (rows << 32) + (days.astype(np.int64) + _DAY_BIAS)
+
+
+def asof_lookup(
+    keys: np.ndarray,
+    offsets: np.ndarray,
+    values: np.ndarray,
+    rows: np.ndarray,
+    query_days: np.ndarray,
+    fallback: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Latest value on or before each query day, for every row.
+
+    Args:
+        keys: Output of ``composite_keys`` for the history.
+        offsets: CSR offsets of the history (length n_rows + 1).
+        values: Flattened history values aligned with ``keys``.
+        rows: Row index per requested series; -1 for series without history.
+        query_days: Days since epoch to evaluate.
+        fallback: Optional value per requested series used where no earlier
+            entry exists.
+
+    Returns:
+        ``(result, found)``, both shaped ``(len(rows), len(query_days))``.
+        ``result`` is int64; ``found`` is False where the fallback (or 0) was used.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    query_days = np.asarray(query_days, dtype=np.int64)
+    shape = (len(rows), len(query_days))
+    if shape[0] == 0 or shape[1] == 0 or len(keys) == 0:
+        found = np.zeros(shape, dtype=bool)
+    else:
+        safe_rows = np.where(rows >= 0, rows, 0)
+        query = (safe_rows[:, None] << 32) + (query_days[None, :] + _DAY_BIAS)
+        pos = np.searchsorted(keys, query.ravel(), side="right").reshape(shape) - 1
+        found = (pos >= offsets[safe_rows][:, None]) & (rows >= 0)[:, None]
+
+    result = np.zeros(shape, dtype=np.int64)
+    if found.any():
+        result[found] = values[pos[found]]
+    if fallback is not None:
+        fill = np.broadcast_to(np.asarray(fallback, dtype=np.int64)[:, None], shape)
+        result[~found] = fill[~found]
+    return result, found
@@ -1,5 +1,6 @@
 """Base constants and shared helpers for crud modules."""
 
+from datetime import date
 from typing import Dict, Tuple
 
 # Configure logging for debugging market value calculations
@@ -17,12 +18,21 @@ logging.basicConfig(
 SEASON_DATE_RANGES: Dict[str, Tuple[str, str]] = {
     "2024/2025": ("2024-07-01", "2025-06-30"),
     "2023/2024": ("2023-06-01", "2024-06-30"),
-    "2025/2026": ("2025-06-30", "2026-06-30"),
+    "2025/2026": ("2025-07-01", "2026-06-30"),
 }
 
 DEFAULT_DATE_RANGE = ("2000-01-01", "2030-01-01")
 
+# Budget every member starts a season with
+STARTING_BUDGET = 40_000_000
+
 
 def get_date_range(spielzeit: str) -> Tuple[str, str]:
     """Get date range for a given spielzeit (season)"""
     return SEASON_DATE_RANGES.get(spielzeit, DEFAULT_DATE_RANGE)
+
+
+def is_season_closed(spielzeit: str) -> bool:
+    """True once the last day of a known season has passed"""
+    season_range = SEASON_DATE_RANGES.get(spielzeit)
+    return season_range is not None and season_range[1] < date.today().isoformat()
@@ -0,0 +1,230 @@
+"""Index bootstrap and query plan audit for the crud layer.
+
+Each crud module declares the indexes its queries need in a module-level
+``INDEXES`` list of ``(collection, IndexModel)`` pairs. ``ensure_indexes``
+creates all of them; creating an existing index is a no-op, so it is safe to
+call on every startup.
+
+The audit runs the crud read functions against a recording wrapper of the
+database, then explains every captured ``find`` and ``aggregate``:
+
+    python -m crud.indexes --audit --spielzeit 2025/2026
+    python -m crud.indexes --ensure
+"""
+
+import argparse
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+from pymongo.mongo_client import MongoClient
+
+from . import leaderboard, player_stats, players, portfolio, transfers
+
+INDEXED_MODULES = (transfers, players, player_stats, portfolio, leaderboard)
+
+# Plan stages that mean a query reads the whole collection or sorts documents
+# in memory instead of walking an index. A "$sort" pipeline stage is not
+# flagged: one that can use an index is pushed into the query layer (and
+# shows up as SORT there if it cannot), the others sort already grouped output.
+# COLLSCAN is only flagged for queries with a filter; reading a whole
+# collection on purpose (e.g. the PlayerStore load) cannot use an index.
+FLAGGED_STAGES = ("COLLSCAN", "SORT")
+
+
+def declared_indexes() -> Dict[str, List[IndexModel]]:
+    """All indexes declared by ``INDEXED_MODULES``, grouped by collection.
+
+    An index declared by several modules is listed once per collection.
+    """
+    indexes: Dict[str, List[IndexModel]] = defaultdict(list)
+    for module in INDEXED_MODULES:
+        for collection, index in getattr(module, "INDEXES", []):
+            if all(index.document["name"] != other.document["name"] for other in indexes[collection]):
+                indexes[collection].append(index)
+    return dict(indexes)
+
+
+def ensure_indexes(db: MongoClient) -> Dict[str, List[str]]:
+    """Create all declared indexes. Returns the index names per collection.
+
+    An index that conflicts with an existing one of the same name is logged
+    and skipped, so startup never fails on it.
+    """
+    created = {}
+    for collection, indexes in declared_indexes().items():
+        try:
+            created[collection] = db[collection].create_indexes(indexes)
+        except OperationFailure as e:
+            logging.warning("Could not create indexes on %s: %s", collection, e)
+    return created
+
+
+class _RecordingCollection:
+    """Collection wrapper that records reads and swallows writes."""
+
+    def __init__(self, collection, queries: List[Tuple[str, str, object]]):
+        self._collection = collection
+        self._queries = queries
+
+    def find(self, filter=None, *args, **kwargs):
+        self._queries.append((self._collection.name, "find", filter or {}))
+        return self._collection.find(filter, *args, **kwargs)
+
+    def find_one(self, filter=None, *args, **kwargs):
+        self._queries.append((self._collection.name, "find", filter or {}))
+        return self._collection.find_one(filter, *args, **kwargs)
+
+    def aggregate(self, pipeline, *args, **kwargs):
+        self._queries.append((self._collection.name, "aggregate", pipeline))
+        if pipeline and ("$merge" in pipeline[-1] or "$out" in pipeline[-1]):
+            return iter([])
+        return self._collection.aggregate(pipeline, *args, **kwargs)
+
+    def _ignore_write(self, *args, **kwargs):
+        return None
+
+    replace_one = update_one = update_many = insert_one = insert_many = _ignore_write
+    delete_one = delete_many = bulk_write = _ignore_write
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+
+class _RecordingDatabase:
+    def __init__(self, db: MongoClient):
+        self._db = db
+        self.queries: List[Tuple[str, str, object]] = []
+
+    def __getitem__(self, name):
+        return _RecordingCollection(self._db[name], self.queries)
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+
+def _audited_calls(spielzeit: str, user_name: str, player_id: str) -> List[Tuple[str, Callable]]:
+    return [
+        ("transfers.get_transfers", lambda db: transfers.get_transfers(db, spielzeit)),
+        ("transfers.count_second_bids", lambda db: transfers.count_second_bids(db, spielzeit)),
+        ("transfers.count_transfers_buys", lambda db: transfers.count_transfers_buys(db, spielzeit)),
+        ("players.get_current_market_values_bulk",
+         lambda db: players.get_current_market_values_bulk(db, [player_id])),
+        ("players.get_player_market_values_df", lambda db: players.get_player_market_values_df(db)),
+        ("players.get_player_current_market_values_df",
+         lambda db: players.get_player_current_market_values_df(db)),
+        ("players.get_player_points_df", lambda db: players.get_player_points_df(db, spielzeit)),
+        ("players.get_player_points_between_dates",
+         lambda db: players.get_player_points_between_dates(db, player_id, "2000-01-01")),
+        ("players.get_player_points_with_market_value_df",
+         lambda db: players.get_player_points_with_market_value_df(db, spielzeit)),
+        ("portfolio.get_or_calculate_portfolio_timeline",
+         lambda db: portfolio.get_or_calculate_portfolio_timeline(db, user_name, spielzeit)),
+        ("portfolio.get_or_calculate_market_value_timeline",
+         lambda db: portfolio.get_or_calculate_market_value_timeline(db, user_name, spielzeit)),
+        ("portfolio.sample_portfolio_market_value",
+         lambda db: portfolio.sample_portfolio_market_value(db, user_name, spielzeit)),
+        ("portfolio.get_cache_status", lambda db: portfolio.get_cache_status(db)),
+        ("leaderboard.get_league_timeline", lambda db: leaderboard.get_league_timeline(db, spielzeit)),
+    ]
+
+
+def _plan_stages(explain: object) -> List[str]:
+    """All stage names in an explain document, in any server version's layout."""
+    stages = []
+    if isinstance(explain, dict):
+        if isinstance(explain.get("stage"), str):
+            stages.append(explain["stage"])
+        for key, value in explain.items():
+            if key.startswith("$") and key != "$cursor":
+                stages.append(key)
+            if key not in ("rejectedPlans", "allPlansExecution"):
+                stages.extend(_plan_stages(value))
+    elif isinstance(explain, list):
+        for item in explain:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+def _has_filter(kind: str, query) -> bool:
+    if kind == "find":
+        return bool(query)
+    return bool(query) and bool(query[0].get("$match"))
+
+
+def flagged_stages(kind: str, query, explain: dict) -> List[str]:
+    """``FLAGGED_STAGES`` in a query's plan, without COLLSCAN for unfiltered reads."""
+    flagged = {stage for stage in _plan_stages(explain) if stage in FLAGGED_STAGES}
+    if not _has_filter(kind, query):
+        flagged.discard("COLLSCAN")
+    return sorted(flagged)
+
+
+def explain_query(db: MongoClient, collection: str, kind: str, query) -> dict:
+    if kind == "find":
+        command = {"find": collection, "filter": query}
+    else:
+        command = {"aggregate": collection, "pipeline": query, "cursor": {}}
+    return db.command("explain", command, verbosity="queryPlanner")
+
+
+def audit_query_plans(db: MongoClient, spielzeit: str) -> List[dict]:
+    """Explain every query the crud read functions issue for one season.
+
+    Returns one entry per distinct query with the function that issued it and
+    the flagged stages (``COLLSCAN`` of a filtered query, in-memory ``SORT``).
+    """
+    sample = db["Transfers"].find_one({}, {"player_id": 1, "member_name": 1}) or {}
+    calls = _audited_calls(spielzeit, sample.get("member_name", ""), str(sample.get("player_id", "")))
+
+    report, seen = [], set()
+    for label, call in calls:
+        recorder = _RecordingDatabase(db)
+        try:
+            call(recorder)
+        except Exception as e:  # the audit should report every function it can
+            logging.warning("%s failed during audit: %s", label, e)
+        for collection, kind, query in recorder.queries:
+            key = (collection, kind, repr(query))
+            if key in seen:
+                continue
+            seen.add(key)
+            explain = explain_query(db, collection, kind, query)
+            report.append({
+                "function": label,
+                "collection": collection,
+                "kind": kind,
+                "query": query,
+                "flagged": flagged_stages(kind, query, explain),
+            })
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ensure", action="store_true", help="create all declared indexes")
+    parser.add_argument("--audit", action="store_true", help="explain all crud queries")
+    parser.add_argument("--spielzeit", default="2025/2026")
+    args = parser.parse_args(argv)
+
+    from database import get_db
+
+    db = get_db()
+    if args.ensure:
+        for collection, names in ensure_indexes(db).items():
+            print(f"{collection}: {', '.join(names)}")
+    if args.audit:
+        flagged = 0
+        for entry in audit_query_plans(db, args.spielzeit):
+            status = ", ".join(entry["flagged"]) if entry["flagged"] else "ok"
+            flagged += bool(entry["flagged"])
+            print(f"[{status}] {entry['function']}: {entry['collection']}.{entry['kind']} {entry['query']}")
+        print(f"{flagged} queries flagged")
+        return 1 if flagged else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
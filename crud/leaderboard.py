@@ -0,0 +1,155 @@
+"""League-wide portfolio leaderboard computed as members x days matrices.
+
+All transfers of the season are read in one query and all prices come from
+the season's PlayerStore. Cash, invested amount and player count are
+cumulative sums of per-member daily deltas; market values are the as-of
+prices of all holdings at once, summed per member. The rules are those of
+``timeline.build_portfolio_timeline``, without looping over members.
+"""
+
+from typing import List
+
+import numpy as np
+import pandas as pd
+from pymongo import ASCENDING, IndexModel
+from pymongo.mongo_client import MongoClient
+
+from .asof import days_to_dates, to_day
+from .base import STARTING_BUDGET, get_date_range
+from .metrics import timed
+from .player_store import PlayerStore, get_player_store
+from .timestamps import to_day_index
+
+LEAGUE_COLUMNS = [
+    'Datum',
+    'Mitspieler',
+    'Verfuegbares_Cash',
+    'Portfolio_Wert_Kaufpreis',
+    'Portfolio_Wert_Aktuell',
+    'Gesamtwert',
+    'Unrealisierter_Gewinn',
+    'Anzahl_Spieler',
+]
+
+# Indexes the season query below relies on (created by crud.indexes.ensure_indexes)
+INDEXES = [
+    ("Transfers", IndexModel([("buy.date", ASCENDING)], name="buy_date")),
+]
+
+# Holdings evaluated per as-of lookup, bounds the holdings x days matrices
+HOLDINGS_CHUNK = 4096
+
+_TRANSFER_PROJECTION = {
+    "_id": 0,
+    "member_name": 1,
+    "player_id": 1,
+    "buy.date": 1,
+    "buy.price": 1,
+    "sell.date": 1,
+    "sell.price": 1,
+}
+
+
+@timed()
+def build_league_timeline(
+    transfers: List[dict],
+    store: PlayerStore,
+    start_date,
+    end_date,
+    starting_budget: int = STARTING_BUDGET,
+) -> pd.DataFrame:
+    """Daily portfolio figures of every member from raw transfer documents.
+
+    Returns:
+        Long DataFrame with ``LEAGUE_COLUMNS``, one row per member and day.
+    """
+    first_day = to_day(start_date)
+    n_days = max(to_day(end_date) - first_day + 1, 0)
+    if n_days == 0 or not transfers:
+        return pd.DataFrame(columns=LEAGUE_COLUMNS)
+
+    members, member_idx = np.unique(
+        np.asarray([t['member_name'] for t in transfers], dtype=object), return_inverse=True
+    )
+    n_members = len(members)
+    n = len(transfers)
+    player_ids = [str(t['player_id']) for t in transfers]
+    # Dates are parsed in one vectorized call; unparseable ones fall outside the range
+    buy_idx = to_day_index([t['buy']['date'] for t in transfers]).astype(np.int64) - first_day
+    buy_price = np.fromiter((t['buy']['price'] for t in transfers), dtype=np.int64, count=n)
+    has_sell = np.fromiter((bool(t.get('sell')) for t in transfers), dtype=bool, count=n)
+    sell_idx = np.where(
+        has_sell,
+        to_day_index([(t.get('sell') or {}).get('date') or "" for t in transfers]).astype(np.int64) - first_day,
+        n_days,
+    )
+    sell_price = np.fromiter(
+        (t['sell']['price'] if t.get('sell') else 0 for t in transfers), dtype=np.int64, count=n
+    )
+    # A sell dated before its buy never applied to a held player, so it is ignored
+    has_sell &= sell_idx >= buy_idx
+    sell_idx = np.where(has_sell, sell_idx, n_days)
+
+    buy_in_range = (buy_idx >= 0) & (buy_idx < n_days)
+    sell_in_range = has_sell & buy_in_range & (sell_idx < n_days)
+
+    # Members x days deltas, accumulated along the days axis
+    cash_delta = np.zeros((n_members, n_days), dtype=np.int64)
+    invested_delta = np.zeros((n_members, n_days), dtype=np.int64)
+    count_delta = np.zeros((n_members, n_days), dtype=np.int64)
+    bought = (member_idx[buy_in_range], buy_idx[buy_in_range])
+    sold = (member_idx[sell_in_range], sell_idx[sell_in_range])
+    np.add.at(cash_delta, bought, -buy_price[buy_in_range])
+    np.add.at(cash_delta, sold, sell_price[sell_in_range])
+    np.add.at(invested_delta, bought, buy_price[buy_in_range])
+    np.add.at(invested_delta, sold, -buy_price[sell_in_range])
+    np.add.at(count_delta, bought, 1)
+    np.add.at(count_delta, sold, -1)
+
+    cash = starting_budget + np.cumsum(cash_delta, axis=1)
+    invested = np.cumsum(invested_delta, axis=1)
+    player_count = np.cumsum(count_delta, axis=1)
+
+    # As-of market value of every holding on the days it was held, summed per member
+    days = np.arange(n_days, dtype=np.int64)
+    current_value = np.zeros((n_members, n_days), dtype=np.int64)
+    holdings = np.flatnonzero(buy_in_range)
+    for start in range(0, len(holdings), HOLDINGS_CHUNK):
+        chunk = holdings[start:start + HOLDINGS_CHUNK]
+        held = (days[None, :] >= buy_idx[chunk, None]) & (days[None, :] < sell_idx[chunk, None])
+        market_values, _ = store.price_asof_matrix(
+            [player_ids[i] for i in chunk], days + first_day, fallback=buy_price[chunk]
+        )
+        np.add.at(current_value, member_idx[chunk], np.where(held, market_values, 0))
+
+    return pd.DataFrame({
+        'Datum': np.tile(days_to_dates(days + first_day), n_members),
+        'Mitspieler': np.repeat(members, n_days),
+        'Verfuegbares_Cash': cash.ravel(),
+        'Portfolio_Wert_Kaufpreis': invested.ravel(),
+        'Portfolio_Wert_Aktuell': current_value.ravel(),
+        'Gesamtwert': (cash + current_value).ravel(),
+        'Unrealisierter_Gewinn': (current_value - invested).ravel(),
+        'Anzahl_Spieler': player_count.ravel(),
+    })
+
+
+@timed()
+def get_league_timeline(db: MongoClient, spielzeit: str = "2025/2026") -> pd.DataFrame:
+    """Daily portfolio figures of all members of a season, from season start to today."""
+    date_from, date_to = get_date_range(spielzeit)
+    transfers = list(db["Transfers"].find(
+        {"buy.date": {"$gte": date_from, "$lte": date_to}}, _TRANSFER_PROJECTION
+    ))
+    end_date = min(pd.to_datetime('today').date(), pd.to_datetime(date_to).date())
+    return build_league_timeline(transfers, get_player_store(db, spielzeit), date_from, end_date)
+
+
+def league_standings(league_timeline: pd.DataFrame) -> pd.DataFrame:
+    """Last day of every member, ranked by Gesamtwert."""
+    if league_timeline.empty:
+        return pd.DataFrame(columns=['Rang'] + LEAGUE_COLUMNS)
+    last_day = league_timeline[league_timeline['Datum'] == league_timeline['Datum'].max()]
+    standings = last_day.sort_values('Gesamtwert', ascending=False).reset_index(drop=True)
+    standings.insert(0, 'Rang', np.arange(1, len(standings) + 1))
+    return standings
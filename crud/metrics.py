@@ -0,0 +1,204 @@
+"""Lightweight timing spans with rolling percentiles.
+
+Wrap work in ``span("name")`` (context manager) or ``@timed()`` (decorator).
+Spans nest per thread/task via a context variable, so every finished root span
+keeps a small tree of its children for the Performance page. Per span name the
+last ``WINDOW`` durations are kept in memory for p50/p95/p99, together with
+total calls, rows and cache hits/misses.
+
+    with span("portfolio.timeline") as s:
+        df = ...
+        s.rows = len(df)
+        s.cache = "hit"
+"""
+
+import contextvars
+import functools
+import json
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+# Durations kept per span name for the rolling percentiles
+WINDOW = 1024
+# Finished root span trees kept for inspection
+RECENT_TRACES = 50
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed unit of work."""
+
+    __slots__ = ("name", "parent", "children", "start", "duration", "rows", "cache", "error")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None):
+        self.name = name
+        self.parent = parent
+        self.children: List[Span] = []
+        self.start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.rows: Optional[int] = None
+        self.cache: Optional[str] = None
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "duration_ms": round((self.duration or 0) * 1000, 3),
+            "rows": self.rows,
+            "cache": self.cache,
+            "error": self.error,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+class _NullSpan:
+    """Returned by ``current_span`` outside any span; attribute writes are ignored."""
+
+    def __setattr__(self, name, value):
+        pass
+
+
+class _Stats:
+    __slots__ = ("durations", "calls", "errors", "rows", "hits", "misses")
+
+    def __init__(self):
+        self.durations: Deque[float] = deque(maxlen=WINDOW)
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.hits = 0
+        self.misses = 0
+
+
+_stats: Dict[str, _Stats] = {}
+_traces: Deque[dict] = deque(maxlen=RECENT_TRACES)
+_lock = threading.Lock()
+
+
+def _record(finished: Span) -> None:
+    with _lock:
+        stats = _stats.get(finished.name)
+        if stats is None:
+            stats = _stats[finished.name] = _Stats()
+        stats.durations.append(finished.duration)
+        stats.calls += 1
+        stats.errors += finished.error is not None
+        stats.rows += finished.rows or 0
+        stats.hits += finished.cache == "hit"
+        stats.misses += finished.cache == "miss"
+        if finished.parent is None:
+            _traces.append(finished.to_dict())
+
+
+class span:
+    """Context manager timing the enclosed block as a (possibly nested) span."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._span: Optional[Span] = None
+        self._token = None
+
+    def __enter__(self) -> Span:
+        parent = _current.get()
+        self._span = Span(self.name, parent)
+        if parent is not None:
+            parent.children.append(self._span)
+        self._token = _current.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        finished = self._span
+        finished.duration = time.perf_counter() - finished.start
+        if exc_type is not None:
+            finished.error = exc_type.__name__
+        _current.reset(self._token)
+        _record(finished)
+        return False
+
+
+def current_span():
+    """The innermost active span, or a no-op stand-in outside any span."""
+    return _current.get() or _NullSpan()
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    """Decorator running a function inside a span.
+
+    The span is named ``module.function`` unless ``name`` is given. Row counts
+    of returned DataFrames, lists and dicts are recorded automatically.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name) as s:
+                result = func(*args, **kwargs)
+                if s.rows is None and (isinstance(result, (list, dict)) or getattr(result, "ndim", 0) >= 1):
+                    s.rows = len(result)
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def metrics_snapshot() -> Dict[str, dict]:
+    """Per span name: calls, errors, rows, cache hits/misses and p50/p95/p99/max in ms."""
+    with _lock:
+        items = [(name, list(stats.durations), stats) for name, stats in _stats.items()]
+    snapshot = {}
+    for name, durations, stats in items:
+        p50, p95, p99 = np.percentile(durations, [50, 95, 99]) * 1000 if durations else (0.0, 0.0, 0.0)
+        snapshot[name] = {
+            "calls": stats.calls,
+            "errors": stats.errors,
+            "rows": stats.rows,
+            "cache_hits": stats.hits,
+            "cache_misses": stats.misses,
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(max(durations, default=0.0) * 1000, 3),
+        }
+    return snapshot
+
+
+def recent_traces() -> List[dict]:
+    """Most recent finished root spans with their children, newest first."""
+    with _lock:
+        return list(reversed(_traces))
+
+
+def metrics_json() -> str:
+    return json.dumps({"spans": metrics_snapshot(), "traces": recent_traces()}, indent=2)
+
+
+def metrics_prometheus() -> str:
+    """Snapshot in the Prometheus text exposition format."""
+    lines = [
+        "# TYPE comunio_span_duration_seconds summary",
+        "# TYPE comunio_span_rows_total counter",
+        "# TYPE comunio_span_cache_total counter",
+    ]
+    for name, stats in sorted(metrics_snapshot().items()):
+        label = f'span="{name}"'
+        for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+            lines.append(f'comunio_span_duration_seconds{{{label},quantile="{quantile}"}} {stats[key] / 1000:g}')
+        lines.append(f"comunio_span_duration_seconds_count{{{label}}} {stats['calls']}")
+        lines.append(f"comunio_span_rows_total{{{label}}} {stats['rows']}")
+        lines.append(f'comunio_span_cache_total{{{label},result="hit"}} {stats["cache_hits"]}')
+        lines.append(f'comunio_span_cache_total{{{label},result="miss"}} {stats["cache_misses"]}')
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics() -> None:
+    with _lock:
+        _stats.clear()
+        _traces.clear()
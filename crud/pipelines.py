@@ -0,0 +1,175 @@
+"""Unwind-free aggregation building blocks for embedded history arrays.
+
+Instead of ``$unwind`` -> ``$match`` -> ``$group``, which turns every player
+into hundreds of intermediate documents and groups them back together, these
+expressions work on the arrays in place with ``$filter``, ``$map`` and
+``$reduce``. Each player stays one document through the whole pipeline.
+
+Timestamps are compared as strings, as the stored ISO timestamps are.
+"""
+
+from typing import Optional
+
+from .base import get_date_range
+
+
+def filter_entries(
+    array: str,
+    timestamp_field: str,
+    gte: Optional[str] = None,
+    lte: Optional[str] = None,
+    gt: Optional[str] = None,
+    date_prefix: bool = False,
+    as_: str = "entry",
+) -> dict:
+    """``$filter`` of an array by a timestamp range.
+
+    Args:
+        array: Array field path, e.g. ``"$point_history"``.
+        timestamp_field: Dotted timestamp path inside an entry.
+        gte, lte, gt: Bounds, each an ISO string or field path; None to skip.
+        date_prefix: Compare only ``YYYY-MM-DD`` of the timestamp against
+            ``gte``/``lte`` (``gt`` always compares the full timestamp).
+        as_: Variable name of an entry.
+    """
+    timestamp = f"$${as_}.{timestamp_field}"
+    compared = {"$substrCP": [timestamp, 0, 10]} if date_prefix else timestamp
+    conditions = []
+    if gte is not None:
+        conditions.append({"$gte": [compared, gte]})
+    if lte is not None:
+        conditions.append({"$lte": [compared, lte]})
+    if gt is not None:
+        conditions.append({"$gt": [timestamp, gt]})
+    return {
+        "$filter": {
+            "input": {"$ifNull": [array, []]},
+            "as": as_,
+            "cond": {"$and": conditions} if conditions else True,
+        }
+    }
+
+
+def sum_entries(entries: dict, value_field: str) -> dict:
+    """Sum of an integer field over an array expression (missing -> 0)."""
+    return {
+        "$reduce": {
+            "input": entries,
+            "initialValue": 0,
+            "in": {"$add": ["$$value", {"$toInt": {"$ifNull": [f"$$this.{value_field}", 0]}}]},
+        }
+    }
+
+
+def latest_entry(entries, timestamp_field: str) -> dict:
+    """Entry with the greatest timestamp in one pass (null for an empty array).
+
+    Unlike ``$sortArray`` + ``$arrayElemAt`` this is linear and does not
+    depend on the stored order.
+    """
+    this_ts = f"$$this.{timestamp_field}"
+    value_ts = f"$$value.{timestamp_field}"
+    return {
+        "$reduce": {
+            "input": {"$ifNull": [entries, []]},
+            "initialValue": None,
+            "in": {
+                "$cond": [
+                    {"$or": [{"$eq": ["$$value", None]}, {"$gte": [this_ts, value_ts]}]},
+                    "$$this",
+                    "$$value",
+                ]
+            },
+        }
+    }
+
+
+def asof_entry(array: str, timestamp_field: str, date: str) -> dict:
+    """Latest entry whose ``YYYY-MM-DD`` is on or before ``date``."""
+    return latest_entry(filter_entries(array, timestamp_field, lte=date, date_prefix=True), timestamp_field)
+
+
+def season_points_fields(spielzeit: str) -> dict:
+    """``$project`` fields for season points and games of a Players document."""
+    date_from, date_to = get_date_range(spielzeit)
+    entries = filter_entries("$point_history", "matchday.timestamp", gte=date_from, lte=date_to, date_prefix=True)
+    return {
+        "Punkte": sum_entries(entries, "points"),
+        "Spiele": {"$size": entries},
+    }
+
+
+def season_points_pipeline(spielzeit: str, with_market_value: bool = True) -> list:
+    """Punkte, Spiele, PpS (and current market value) per player, one document each."""
+    project = {
+        "_id": 0,
+        "ID": "$id",
+        "Spieler": "$name",
+        "Preis": "$price",
+        **season_points_fields(spielzeit),
+    }
+    if with_market_value:
+        project["Aktueller_Marktwert"] = {"$last": "$price_history.quotedPrice"}
+    return [
+        {"$project": project},
+        {"$match": {"Spiele": {"$gt": 0}}},
+        {"$set": {"PpS": {"$round": [{"$divide": ["$Punkte", "$Spiele"]}, 2]}}},
+    ]
+
+
+def latest_market_values_pipeline(player_ids: list) -> list:
+    """Latest quoted price per player id."""
+    return [
+        {"$match": {"id": {"$in": player_ids}}},
+        {
+            "$project": {
+                "_id": 0,
+                "id": 1,
+                # Missing instead of null for players without quotes
+                "latest_price": {"$ifNull": [
+                    {"$getField": {"field": "quotedPrice", "input": latest_entry("$price_history", "timestamp")}},
+                    "$$REMOVE",
+                ]},
+            }
+        },
+    ]
+
+
+def points_between_pipeline(player_id: str, start_date: str, end_date: str) -> list:
+    """Total points and matchday count of one PlayerPoints player in a date range."""
+    entries = filter_entries("$point_history", "matchday.timestamp", gte=start_date, lte=end_date)
+    return [
+        {"$match": {"player_id": player_id}},
+        {"$project": {"_id": 0, "player_id": 1, "total_points": sum_entries(entries, "points"),
+                      "matchdays_count": {"$size": entries}}},
+        {"$group": {
+            "_id": "$player_id",
+            "total_points": {"$sum": "$total_points"},
+            "matchdays_count": {"$sum": "$matchdays_count"},
+        }},
+        {"$match": {"matchdays_count": {"$gt": 0}}},
+        {"$project": {"_id": 0, "total_points": 1, "matchdays_count": 1}},
+    ]
+
+
+def price_tail_pipeline(player_ids: list, after_date: str, until_date: str, opening_ids: list) -> list:
+    """Price quotes of players after ``after_date`` up to ``until_date``.
+
+    For the ids in ``opening_ids`` the as-of quote on ``after_date`` is added
+    as ``opening``, so a timeline can continue without the older history.
+    """
+    return [
+        {"$match": {"id": {"$in": player_ids}}},
+        {"$project": {
+            "_id": 0,
+            "id": 1,
+            # "T99" sorts after every timestamp of after_date
+            "price_history": filter_entries("$price_history", "timestamp", gt=f"{after_date}T99",
+                                            lte=until_date, date_prefix=True),
+            "opening": {"$cond": [
+                {"$in": ["$id", opening_ids]},
+                asof_entry("$price_history", "timestamp", after_date),
+                None,
+            ]},
+        }},
+    ]
@@ -0,0 +1,204 @@
+"""Materialized per-season player statistics.
+
+``PlayerSeasonStats`` holds one small document per (player, season) with total
+points, games, points per game, current price and market value, and the
+points of every matchday. ``update_player_season_stats`` maintains it with a
+single ``$merge`` aggregation: each player only contributes the matchdays
+newer than the last one already stored for it, so a new matchday adds one
+entry per player instead of re-reading whole histories. Price and market value
+are refreshed on every update.
+
+A correction to a matchday that is already stored is not seen by that delta,
+so players whose history changed are rebuilt from their whole season instead
+(``player_ids``). The change watcher does that for every changed player
+before it bumps the Players version, and the nightly precompute job rebuilds
+the whole season and then bumps it; without a watcher that job is the only
+refresh. Page loads only read the collection, so a season that was never
+materialized reads as empty until one of them ran.
+
+Run ``python -m crud.player_stats --spielzeit 2025/2026 [--full]`` to update
+or rebuild a season by hand.
+"""
+
+import argparse
+import logging
+from typing import Iterable, Optional
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.mongo_client import MongoClient
+import pandas as pd
+
+from .base import get_date_range
+from .metrics import timed
+from .pipelines import filter_entries
+
+STATS_COLLECTION = "PlayerSeasonStats"
+
+STATS_COLUMNS = ["ID", "Spieler", "Preis", "Aktueller_Marktwert", "Punkte", "Spiele", "PpS"]
+
+# Indexes the queries below rely on (created by crud.indexes.ensure_indexes)
+INDEXES = [
+    (STATS_COLLECTION, IndexModel([("spielzeit", ASCENDING), ("ID", ASCENDING)], name="spielzeit_id")),
+]
+
+
+def _stats_id(spielzeit: str) -> dict:
+    return {"$concat": [{"$toString": "$id"}, f"|{spielzeit}"]}
+
+
+def _update_pipeline(spielzeit: str, player_ids: Optional[list] = None, rebuilt_at: Optional[str] = None) -> list:
+    """``$merge`` pipeline adding new matchdays, or rebuilding whole seasons when ``rebuilt_at`` is set."""
+    date_from, date_to = get_date_range(spielzeit)
+    stages = [{"$match": {"id": {"$in": player_ids}}}] if player_ids is not None else []
+    stages.append({"$project": {"id": 1, "name": 1, "price": 1, "point_history": 1, "price_history": 1}})
+    if rebuilt_at is None:
+        stages += [
+            # Last matchday already materialized for this player and season
+            {"$lookup": {
+                "from": STATS_COLLECTION,
+                "let": {"stats_id": _stats_id(spielzeit)},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$_id", "$$stats_id"]}}},
+                    {"$project": {"_id": 0, "last_matchday": 1}},
+                ],
+                "as": "stored",
+            }},
+            {"$set": {"last_matchday": {"$ifNull": [{"$first": "$stored.last_matchday"}, ""]}}},
+        ]
+    else:
+        stages.append({"$set": {"last_matchday": ""}})
+    stages += [
+        {"$project": {
+            "_id": _stats_id(spielzeit),
+            "ID": "$id",
+            "spielzeit": {"$literal": spielzeit},
+            "Spieler": "$name",
+            "Preis": "$price",
+            "Aktueller_Marktwert": {"$last": "$price_history.quotedPrice"},
+            "new_matchdays": {"$map": {
+                "input": filter_entries(
+                    "$point_history",
+                    "matchday.timestamp",
+                    gte=date_from,
+                    lte=date_to,
+                    gt="$last_matchday",
+                    date_prefix=True,
+                ),
+                "as": "entry",
+                "in": {
+                    "key": "$$entry.matchday.key",
+                    "timestamp": "$$entry.matchday.timestamp",
+                    "points": {"$toInt": {"$ifNull": ["$$entry.points", 0]}},
+                },
+            }},
+        }},
+        {"$set": {
+            "Punkte": {"$sum": "$new_matchdays.points"},
+            "Spiele": {"$size": "$new_matchdays"},
+            "last_matchday": {"$max": "$new_matchdays.timestamp"},
+        }},
+    ]
+    if rebuilt_at is not None:
+        # A rebuilt document replaces the stored one; the delta fields are folded in afterwards
+        stages.append({"$set": {"rebuilt_at": {"$literal": rebuilt_at}}})
+        stages.append({"$merge": {"into": STATS_COLLECTION, "on": "_id", "whenMatched": "replace"}})
+        return stages
+    stages.append(
+        {"$merge": {
+            "into": STATS_COLLECTION,
+            "on": "_id",
+            "whenMatched": [
+                {"$set": {
+                    "Spieler": "$$new.Spieler",
+                    "Preis": "$$new.Preis",
+                    "Aktueller_Marktwert": "$$new.Aktueller_Marktwert",
+                    "Punkte": {"$add": ["$Punkte", "$$new.Punkte"]},
+                    "Spiele": {"$add": ["$Spiele", "$$new.Spiele"]},
+                    "matchdays": {"$concatArrays": ["$matchdays", "$$new.new_matchdays"]},
+                    "last_matchday": {"$ifNull": ["$$new.last_matchday", "$last_matchday"]},
+                }},
+                {"$set": {"PpS": _points_per_game()}},
+            ],
+            "whenNotMatched": "insert",
+        }}
+    )
+    return stages
+
+
+def _points_per_game() -> dict:
+    return {"$cond": [
+        {"$gt": ["$Spiele", 0]},
+        {"$round": [{"$divide": ["$Punkte", "$Spiele"]}, 2]},
+        None,
+    ]}
+
+
+@timed()
+def update_player_season_stats(
+    db: MongoClient, spielzeit: str, full: bool = False, player_ids: Optional[Iterable] = None
+) -> None:
+    """Bring ``PlayerSeasonStats`` of a season up to date with Players.
+
+    Without arguments only matchdays newer than the stored ones are added.
+    ``player_ids`` rebuilds those players from their whole season, so
+    corrected points of stored matchdays are picked up. ``full`` rebuilds
+    every player and drops documents of players no longer in Players.
+    """
+    stats = db[STATS_COLLECTION]
+    if full or player_ids is not None:
+        ids = None if full else sorted({int(player_id) for player_id in player_ids if str(player_id).isdigit()})
+        if ids == []:
+            return
+        rebuilt_at = pd.Timestamp.now().isoformat()
+        db["Players"].aggregate(_update_pipeline(spielzeit, ids, rebuilt_at))
+        if full:
+            # Replaced in place, so readers never see an empty season
+            stats.delete_many({"spielzeit": spielzeit, "rebuilt_at": {"$ne": rebuilt_at}})
+    else:
+        db["Players"].aggregate(_update_pipeline(spielzeit))
+    # Documents inserted by whenNotMatched still carry the raw delta fields
+    stats.update_many(
+        {"spielzeit": spielzeit, "new_matchdays": {"$exists": True}},
+        [
+            {"$set": {"matchdays": "$new_matchdays"}},
+            {"$set": {"PpS": _points_per_game()}},
+            {"$unset": "new_matchdays"},
+        ],
+    )
+
+
+@timed()
+def get_player_season_stats_df(db: MongoClient, spielzeit: str) -> pd.DataFrame:
+    """Season statistics of every player with at least one game, as a DataFrame."""
+    cursor = db[STATS_COLLECTION].find(
+        {"spielzeit": spielzeit, "Spiele": {"$gt": 0}},
+        {"_id": 0, **{column: 1 for column in STATS_COLUMNS}},
+    )
+    df = pd.DataFrame(list(cursor), columns=STATS_COLUMNS)
+    if df.empty:
+        logging.warning(
+            "No %s for %s; run python -m crud.precompute --season %s", STATS_COLLECTION, spielzeit, spielzeit
+        )
+    else:
+        df["Punkte"] = pd.to_numeric(df["Punkte"], downcast="integer")
+    return df
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Update the PlayerSeasonStats collection")
+    parser.add_argument("--spielzeit", default="2025/2026")
+    parser.add_argument("--full", action="store_true", help="rebuild the season from scratch")
+    args = parser.parse_args(argv)
+
+    from database import get_db
+    from .versions import bump_data_versions
+
+    db = get_db()
+    update_player_season_stats(db, args.spielzeit, full=args.full)
+    bump_data_versions(db, "Players", [args.spielzeit])
+    print(f"{db[STATS_COLLECTION].count_documents({'spielzeit': args.spielzeit})} players updated")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
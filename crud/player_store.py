@@ -0,0 +1,312 @@
+"""Columnar in-process store for Players price and point histories."""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from pymongo.mongo_client import MongoClient
+import numpy as np
+import pandas as pd
+
+from .asof import asof_lookup, composite_keys
+from .base import get_date_range
+from .metrics import span, timed
+from .timestamps import days_to_datetime, normalize_history
+from .versions import get_data_version
+
+# How long a loaded store is reused before the Players collection is read again;
+# a bump of the Players data version reloads it earlier
+PLAYER_STORE_TTL_SECONDS = 3600
+
+_PLAYER_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "name": 1,
+    "price_history.timestamp": 1,
+    "price_history.quotedPrice": 1,
+    "point_history.matchday": 1,
+    "point_history.points": 1,
+}
+
+
+def _concat(parts, dtype) -> np.ndarray:
+    if not parts:
+        return np.empty(0, dtype=dtype)
+    return np.concatenate(parts).astype(dtype, copy=False)
+
+
+# Never a player id (ids are positive), so unparseable ids find no row
+_UNKNOWN_ID = -1
+_MAX_ID = np.iinfo(np.int64).max
+
+
+def _player_key(player_id) -> int:
+    try:
+        key = int(player_id)
+    except (TypeError, ValueError, OverflowError):
+        return _UNKNOWN_ID
+    return key if 0 <= key <= _MAX_ID else _UNKNOWN_ID
+
+
+def _csr(owner: np.ndarray, days: np.ndarray, n_rows: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (order, offsets) grouping entries by owner row, sorted by day."""
+    order = np.lexsort((days, owner))
+    counts = np.bincount(owner, minlength=n_rows)
+    offsets = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return order, offsets
+
+
+class PlayerStore:
+    """Players collection of one season held as NumPy arrays.
+
+    Histories are flattened into one buffer per kind. The entries of the player
+    at row ``i`` live in ``price_days[price_offsets[i]:price_offsets[i + 1]]``
+    (CSR layout), sorted by day. ``ids`` is sorted, so finding a player is a
+    binary search and no database round trip is needed after loading.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        names: np.ndarray,
+        price_offsets: np.ndarray,
+        price_days: np.ndarray,
+        prices: np.ndarray,
+        point_offsets: np.ndarray,
+        point_days: np.ndarray,
+        points: np.ndarray,
+        matchdays: np.ndarray,
+        spielzeit: Optional[str] = None,
+    ):
+        self.ids = ids
+        self.names = names
+        self.price_offsets = price_offsets
+        self.price_days = price_days
+        self.prices = prices
+        self.point_offsets = point_offsets
+        self.point_days = point_days
+        self.points = points
+        self.matchdays = matchdays
+        self.spielzeit = spielzeit
+        self.loaded_at = time.monotonic()
+        self.version: Optional[int] = None
+        self._price_keys: Optional[np.ndarray] = None
+
+    @classmethod
+    @timed("player_store.load")
+    def load(cls, db: MongoClient, spielzeit: Optional[str] = None) -> "PlayerStore":
+        """Read all players once and build the columnar buffers for a season.
+
+        Price entries are kept from the last quote before the season start (so
+        as-of lookups on the first days still find a value) up to season end.
+        Point entries are kept inside the season range.
+        """
+        date_from, date_to = get_date_range(spielzeit)
+        first_day = np.datetime64(date_from, "D").astype(np.int64)
+        last_day = np.datetime64(date_to, "D").astype(np.int64)
+
+        ids, names = [], []
+        price_owner, price_days, price_values = [], [], []
+        point_owner, point_days, point_values, matchday_keys = [], [], [], []
+
+        # Timestamps are only re-parsed for players whose timestamps changed (see crud.timestamps)
+        for row, player in enumerate(db["Players"].find({}, _PLAYER_PROJECTION)):
+            player_id = int(player["id"])
+            ids.append(player_id)
+            names.append(player.get("name"))
+
+            price_history = player.get("price_history") or []
+            days, values = normalize_history("price", player_id, price_history, "timestamp", "quotedPrice")
+            price_owner.append(np.full(len(days), row, dtype=np.int64))
+            price_days.append(days)
+            price_values.append(values)
+
+            point_history = player.get("point_history") or []
+            days, values = normalize_history("point", player_id, point_history, "matchday.timestamp", "points")
+            point_owner.append(np.full(len(days), row, dtype=np.int64))
+            point_days.append(days)
+            point_values.append(values)
+            matchday_keys.extend((entry.get("matchday") or {}).get("key") for entry in point_history)
+
+        n_rows = len(ids)
+        price_owner = _concat(price_owner, np.int64)
+        price_days = _concat(price_days, np.int64)
+        price_values = _concat(price_values, np.int64)
+
+        # Keep in-season quotes plus the latest quote before the season start
+        valid = (price_days >= 0) & (price_days <= last_day)
+        before = valid & (price_days < first_day)
+        last_before = np.full(n_rows, -1, dtype=np.int64)
+        np.maximum.at(last_before, price_owner[before], price_days[before])
+        keep = valid & ((price_days >= first_day) | (price_days == last_before[price_owner]))
+        price_owner, price_days, price_values = (
+            price_owner[keep], price_days[keep], price_values[keep]
+        )
+
+        point_owner = _concat(point_owner, np.int64)
+        point_days = _concat(point_days, np.int64)
+        point_values = _concat(point_values, np.int32)
+        keep = (point_days >= first_day) & (point_days <= last_day)
+        point_owner, point_days = point_owner[keep], point_days[keep]
+        point_values = point_values[keep]
+        matchday_keys = np.asarray(matchday_keys, dtype=object)[keep]
+
+        # Sort players by id so lookups can use binary search
+        id_order = np.argsort(np.asarray(ids, dtype=np.int64), kind="stable")
+        new_row = np.empty(n_rows, dtype=np.int64)
+        new_row[id_order] = np.arange(n_rows)
+
+        price_owner = new_row[price_owner]
+        price_order, price_offsets = _csr(price_owner, price_days, n_rows)
+        point_owner = new_row[point_owner]
+        point_order, point_offsets = _csr(point_owner, point_days, n_rows)
+
+        return cls(
+            ids=np.asarray(ids, dtype=np.int64)[id_order],
+            names=np.asarray(names, dtype=object)[id_order],
+            price_offsets=price_offsets,
+            price_days=price_days[price_order].astype(np.int32),
+            prices=price_values[price_order].astype(np.int32),
+            point_offsets=point_offsets,
+            point_days=point_days[point_order].astype(np.int32),
+            points=point_values[point_order],
+            matchdays=matchday_keys[point_order],
+            spielzeit=spielzeit,
+        )
+
+    @classmethod
+    def from_price_histories(
+        cls, histories: Dict[int, Tuple[np.ndarray, np.ndarray]], spielzeit: Optional[str] = None
+    ) -> "PlayerStore":
+        """Store of price quotes only, from ``{player_id: (days, prices)}``.
+
+        Used for partial loads, e.g. the quotes after a portfolio checkpoint.
+        """
+        ids = np.asarray(sorted(int(player_id) for player_id in histories), dtype=np.int64)
+        days_parts, price_parts, counts = [], [], []
+        for player_id in ids:
+            days, prices = histories.get(int(player_id), histories.get(str(player_id)))
+            order = np.argsort(days, kind="stable")
+            days_parts.append(np.asarray(days, dtype=np.int64)[order])
+            price_parts.append(np.asarray(prices, dtype=np.int64)[order])
+            counts.append(len(days))
+        price_offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(counts, out=price_offsets[1:])
+        return cls(
+            ids=ids,
+            names=np.full(len(ids), None, dtype=object),
+            price_offsets=price_offsets,
+            price_days=_concat(days_parts, np.int32),
+            prices=_concat(price_parts, np.int32),
+            point_offsets=np.zeros(len(ids) + 1, dtype=np.int64),
+            point_days=np.empty(0, dtype=np.int32),
+            points=np.empty(0, dtype=np.int32),
+            matchdays=np.empty(0, dtype=object),
+            spielzeit=spielzeit,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row_of(self, player_id) -> Optional[int]:
+        """Binary search for a player's row, None if the id is unknown."""
+        row = int(self.rows_of([player_id])[0])
+        return row if row >= 0 else None
+
+    def rows_of(self, player_ids) -> np.ndarray:
+        """Vectorized ``row_of``; unknown or non-numeric ids map to -1."""
+        keys = np.asarray([_player_key(pid) for pid in player_ids], dtype=np.int64)
+        rows = np.searchsorted(self.ids, keys)
+        in_range = rows < len(self.ids)
+        known = np.zeros(len(keys), dtype=bool)
+        known[in_range] = self.ids[rows[in_range]] == keys[in_range]
+        return np.where(known, rows, -1).astype(np.int64, copy=False)
+
+    def price_history(self, player_id) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Return (days, prices) views of a player's price history."""
+        row = self.row_of(player_id)
+        if row is None:
+            return None
+        start, end = self.price_offsets[row], self.price_offsets[row + 1]
+        return self.price_days[start:end], self.prices[start:end]
+
+    def price_asof(self, player_id, day: int) -> Optional[int]:
+        """Most recent quote on or before ``day`` (days since epoch), else None."""
+        history = self.price_history(player_id)
+        if history is None:
+            return None
+        days, prices = history
+        pos = int(np.searchsorted(days, day, side="right")) - 1
+        return int(prices[pos]) if pos >= 0 else None
+
+    def price_asof_matrix(
+        self, player_ids, query_days: np.ndarray, fallback: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """As-of prices for every (player, day) pair, see ``asof.asof_lookup``."""
+        if self._price_keys is None:
+            self._price_keys = composite_keys(self.price_offsets, self.price_days)
+        return asof_lookup(
+            self._price_keys,
+            self.price_offsets,
+            self.prices,
+            self.rows_of(player_ids),
+            query_days,
+            fallback,
+        )
+
+    def market_value_df(self, player_id) -> Optional[pd.DataFrame]:
+        history = self.price_history(player_id)
+        if history is None:
+            return None
+        days, prices = history
+        return pd.DataFrame({"Datum": days_to_datetime(days), "Marktwert": prices})
+
+    def points_df(self, player_id) -> Optional[pd.DataFrame]:
+        row = self.row_of(player_id)
+        if row is None:
+            return None
+        start, end = self.point_offsets[row], self.point_offsets[row + 1]
+        return pd.DataFrame(
+            {
+                "Datum": days_to_datetime(self.point_days[start:end]),
+                "Punkte": self.points[start:end],
+                "Spieltag": self.matchdays[start:end],
+            }
+        )
+
+
+_stores: Dict[Optional[str], PlayerStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_player_store(db: MongoClient, spielzeit: Optional[str] = None) -> PlayerStore:
+    """Return the cached store for a season.
+
+    The store is (re)loaded on first use, when the Players data version of the
+    season changed, or after the TTL.
+    """
+    version = get_data_version(db, "Players", spielzeit) if spielzeit else None
+    with span("player_store.get_player_store") as s, _stores_lock:
+        store = _stores.get(spielzeit)
+        if (
+            store is None
+            or store.version != version
+            or time.monotonic() - store.loaded_at > PLAYER_STORE_TTL_SECONDS
+        ):
+            s.cache = "miss"
+            store = PlayerStore.load(db, spielzeit)
+            store.version = version
+            _stores[spielzeit] = store
+        else:
+            s.cache = "hit"
+        return store
+
+
+def invalidate_player_store(spielzeit: Optional[str] = None) -> None:
+    """Drop the cached store of one season, or of all seasons if none is given."""
+    with _stores_lock:
+        if spielzeit is None:
+            _stores.clear()
+        else:
+            _stores.pop(spielzeit, None)
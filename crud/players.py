@@ -1,29 +1,39 @@
 """Player-related CRUD operations."""
 
+from pymongo import ASCENDING, IndexModel
 from pymongo.mongo_client import MongoClient
 import pandas as pd
-import time
+import pyarrow as pa
+from typing import Optional
 
-from .base import get_date_range, SEASON_DATE_RANGES
+from .base import get_date_range
+from .metrics import timed
+from .player_stats import get_player_season_stats_df
+from .pipelines import latest_market_values_pipeline, points_between_pipeline
+from .player_store import get_player_store
+from .raw_bson import aggregate_columns
 
+# Indexes the queries below rely on (created by crud.indexes.ensure_indexes)
+INDEXES = [
+    ("Players", IndexModel([("id", ASCENDING)], name="id")),
+    ("PlayerPoints", IndexModel([("player_id", ASCENDING)], name="player_id")),
+]
 
-def get_player_market_value(db: MongoClient, player_id: str):
-    players = db["Players"]
-    player = players.find_one({"id": int(player_id)})
-    if not player:
-        return None
-    price_history = player["price_history"]
-    data = {
-        "Datum": [entry["timestamp"] for entry in price_history],
-        "Marktwert": [entry["quotedPrice"] for entry in price_history],
-    }
-    df = pd.DataFrame(data)
-    # Fix: Add utc=True to handle mixed timezones properly
-    df["Datum"] = pd.to_datetime(df["Datum"], utc=True)
-    df.sort_values(by="Datum", inplace=True)
-    return df
+# Output columns of get_player_points_df
+PLAYER_POINTS_COLUMNS = ["ID", "Spieler", "Preis", "Punkte", "Spiele", "PpS"]
+
+# Output columns and their Arrow types (decoded into typed buffers) of the unwound scan
+_MARKET_VALUE_COLUMNS = ["Datum", "Marktwert", "Spieler", "ID"]
+_MARKET_VALUE_SCHEMA = {"Datum": pa.string(), "Marktwert": pa.int64(), "Spieler": pa.string(), "ID": pa.int64()}
+
+
+@timed()
+def get_player_market_value(db: MongoClient, player_id: str, spielzeit: Optional[str] = None):
+    """Price history of one player, read from the in-process PlayerStore."""
+    return get_player_store(db, spielzeit).market_value_df(player_id)
 
 
+@timed()
 def get_current_market_values_bulk(db: MongoClient, player_ids: list) -> dict:
     """Get the most recent market value for multiple players in a single MongoDB aggregation.
 
@@ -37,39 +47,14 @@ def get_current_market_values_bulk(db: MongoClient, player_ids: list) -> dict:
     players = db["Players"]
     int_ids = [int(pid) for pid in player_ids]
 
-    pipeline = [
-        {"$match": {"id": {"$in": int_ids}}},
-        {
-            "$project": {
-                "_id": 0,
-                "id": 1,
-                # Sort price_history by timestamp descending, then take first (most recent)
-                "latest_price": {
-                    "$arrayElemAt": [
-                        {
-                            "$sortArray": {
-                                "input": "$price_history",
-                                "sortBy": {"timestamp": -1}
-                            }
-                        },
-                        0
-                    ]
-                },
-            }
-        },
-        {
-            "$project": {
-                "_id": 0,
-                "id": 1,
-                "latest_price": "$latest_price.quotedPrice",
-            }
-        },
-    ]
+    # Latest quote found in one pass over each price_history, without sorting it
+    pipeline = latest_market_values_pipeline(int_ids)
 
     result = players.aggregate(pipeline)
     return {doc["id"]: doc.get("latest_price", 0) for doc in result}
 
 
+@timed()
 def get_player_market_values_df(db: MongoClient):
     players = db["Players"]
 
@@ -78,6 +63,7 @@ def get_player_market_values_df(db: MongoClient):
         {"$unwind": "$price_history"},
         {
             "$project": {
+                "_id": 0,
                 "Datum": "$price_history.timestamp",
                 "Marktwert": "$price_history.quotedPrice",
                 "Spieler": "$name",
@@ -86,15 +72,13 @@ def get_player_market_values_df(db: MongoClient):
         },
     ]
 
-    # Execute the aggregation pipeline
-    result = list(players.aggregate(pipeline))
-
-    # Convert the result to a DataFrame
-    df = pd.DataFrame(result)
+    # Decode the unwound rows batch by batch straight into columns
+    df = aggregate_columns(players, pipeline, _MARKET_VALUE_COLUMNS, _MARKET_VALUE_SCHEMA)
 
     return df
 
 
+@timed()
 def get_player_current_market_values_df(db: MongoClient):
     """Get the current (most recent) market value for each player"""
     players = db["Players"]
@@ -129,105 +113,20 @@ def get_player_current_market_values_df(db: MongoClient):
     return df
 
 
+@timed()
 def get_player_points_df(db: MongoClient, spielzeit: str = "2024/2025"):
-    """Get aggregated player points for a given season."""
-    players = db["Players"]
-
-    # Derive season_start from SEASON_DATE_RANGES, fall back to safe default
-    season_range = SEASON_DATE_RANGES.get(spielzeit)
-    if season_range:
-        season_start = f"{season_range[0]}T00:00:00+00:00"
-        filter_date = season_range[0]
-    else:
-        season_start = "2000-01-01T00:00:00+00:00"
-        filter_date = "2000-01-01"
-
-    # Measure time to define the aggregation pipeline
-    start_time = time.time()
-    pipeline = [
-        {"$unwind": "$point_history"},
-        {"$match": {"point_history.matchday.timestamp": {"$gte": season_start}}},
-        {
-            "$project": {
-                "Datum": "$point_history.matchday.timestamp",
-                "Punkte": "$point_history.points",
-                "Spieler": "$name",
-                "ID": "$id",
-                "Preis": "$price",
-            }
-        },
-    ]
-    end_time = time.time()
-    print(f"Time to define aggregation pipeline: {end_time - start_time:.2f} seconds")
-
-    # Measure time to execute the aggregation pipeline
-    start_time = time.time()
-    points = players.aggregate(pipeline)
-    end_time = time.time()
-    print(f"Time to execute aggregation pipeline: {end_time - start_time:.2f} seconds")
-
-    start_time = time.time()
-    points = list(points)
-    end_time = time.time()
-    print(len(points))
-    print(
-        f"Time to make aggregation result a list: {end_time - start_time:.2f} seconds"
-    )
-
-    start_time = time.time()
-    df = pd.DataFrame(list(points))
-    end_time = time.time()
-    print(f"Time to convert result to DataFrame: {end_time - start_time:.2f} seconds")
-
-    start_time = time.time()
-    df = df[df["Datum"] > filter_date]
-    end_time = time.time()
-    print(f"Time to filter entries: {end_time - start_time:.2f} seconds")
-
-    start_time = time.time()
-    df["Punkte"] = pd.to_numeric(df["Punkte"], downcast="integer")
-    end_time = time.time()
-    print(f"Time to make Punkte numeric: {end_time - start_time:.2f} seconds")
-
-    start_time = time.time()
-    df = (
-        df.groupby(["ID", "Spieler", "Preis"])["Punkte"]
-        .agg(["sum", "count"])
-        .rename(columns={"sum": "Punkte", "count": "Spiele"})
-        .reset_index()
-    )
-    end_time = time.time()
-    print(
-        f"Time to group by ID and aggregate points: {end_time - start_time:.2f} seconds"
-    )
-
-    start_time = time.time()
-    df["PpS"] = round(df["Punkte"] / df["Spiele"], 2)
-    end_time = time.time()
-    print(f"Time to calculate points per game: {end_time - start_time:.2f} seconds")
+    """Get aggregated player points for a given season from PlayerSeasonStats."""
+    df = get_player_season_stats_df(db, spielzeit)
+    return df[PLAYER_POINTS_COLUMNS]
 
-    return df
 
-
-def get_player_points(db: MongoClient, player_id: str):
-    players = db["Players"]
-    player = players.find_one({"id": int(player_id)})
-    if not player:
-        return None
-    points_history = player["point_history"]
-    data = {
-        "Datum": [entry["matchday"]["timestamp"] for entry in points_history],
-        "Punkte": [
-            int(entry["points"]) if entry["points"] else 0 for entry in points_history
-        ],
-        "Spieltag": [entry["matchday"]["key"] for entry in points_history],
-    }
-    df = pd.DataFrame(data)
-    df["Datum"] = pd.to_datetime(df["Datum"])
-    df.sort_values(by="Datum", inplace=True)
-    return df
+@timed()
+def get_player_points(db: MongoClient, player_id: str, spielzeit: Optional[str] = None):
+    """Point history of one player, read from the in-process PlayerStore."""
+    return get_player_store(db, spielzeit).points_df(player_id)
 
 
+@timed()
 def get_player_points_between_dates(
     db: MongoClient,
     player_id: str,
@@ -243,27 +142,8 @@ def get_player_points_between_dates(
     # Get the PlayerPoints collection
     player_points_collection = db["PlayerPoints"]
 
-    # Define the query to fetch points between the dates
-    pipeline = [
-        {"$match": {"player_id": player_id}},  # Match the player_id
-        {"$unwind": "$point_history"},  # Unwind the matchdays array
-        {
-            "$match": {
-                "point_history.matchday.timestamp": {
-                    "$gte": start_date,
-                    "$lte": end_date,
-                }
-            }
-        },  # Match the date range
-        {
-            "$group": {
-                "_id": "$player_id",
-                "total_points": {"$sum": "$point_history.points"},
-                "matchdays_count": {"$sum": 1},
-            }
-        },
-        {"$project": {"_id": 0, "total_points": 1, "matchdays_count": 1}},
-    ]
+    # Sum the points in the date range without unwinding the matchdays array
+    pipeline = points_between_pipeline(player_id, start_date, end_date)
 
     # Fetch the points data
     results = list(player_points_collection.aggregate(pipeline))
@@ -278,72 +158,7 @@ def get_player_points_between_dates(
     return total_points, matchdays_count
 
 
+@timed()
 def get_player_points_with_market_value_df(db: MongoClient, spielzeit: str = "2024/2025"):
-    """Get player points data combined with current market value"""
-    players = db["Players"]
-
-    # Derive season_start from SEASON_DATE_RANGES
-    season_range = SEASON_DATE_RANGES.get(spielzeit)
-    if season_range:
-        season_start = f"{season_range[0]}T00:00:00+00:00"
-    else:
-        season_start = "2000-01-01T00:00:00+00:00"
-
-    # Optimized pipeline that combines both operations without memory-intensive sorting
-    pipeline = [
-        {
-            "$project": {
-                "id": 1,
-                "name": 1,
-                "price": 1,
-                "point_history": 1,
-                # Get the last element of price_history array (most recent market value)
-                "latest_market_value": {"$last": "$price_history.quotedPrice"}
-            }
-        },
-        {"$unwind": "$point_history"},
-        {"$match": {"point_history.matchday.timestamp": {"$gte": season_start}}},
-        {
-            "$group": {
-                "_id": "$id",
-                "Spieler": {"$first": "$name"},
-                "ID": {"$first": "$id"},
-                "Preis": {"$first": "$price"},
-                "Aktueller_Marktwert": {"$first": "$latest_market_value"},
-                "total_points": {
-                    "$sum": {
-                        "$toInt": {
-                            "$ifNull": ["$point_history.points", 0]
-                        }
-                    }
-                },
-                "games_count": {"$sum": 1}
-            }
-        },
-        {
-            "$project": {
-                "_id": 0,
-                "ID": 1,
-                "Spieler": 1,
-                "Preis": 1,
-                "Aktueller_Marktwert": 1,
-                "Punkte": "$total_points",
-                "Spiele": "$games_count",
-                "PpS": {
-                    "$round": [
-                        {"$divide": ["$total_points", "$games_count"]},
-                        2
-                    ]
-                }
-            }
-        }
-    ]
-
-    # Execute the optimized pipeline
-    result = list(players.aggregate(pipeline))
-    df = pd.DataFrame(result)
-
-    if not df.empty:
-        df["Punkte"] = pd.to_numeric(df["Punkte"], downcast="integer")
-
-    return df
+    """Get player points data combined with current market value from PlayerSeasonStats."""
+    return get_player_season_stats_df(db, spielzeit)
@@ -1,9 +1,21 @@
 """Portfolio timeline and cache-related CRUD operations."""
 
+from pymongo import ASCENDING, DeleteMany, IndexModel, UpdateOne
 from pymongo.mongo_client import MongoClient
+import numpy as np
 import pandas as pd
+import hashlib
 import logging
-from typing import Dict, Tuple
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from .base import STARTING_BUDGET, get_date_range
+from .metrics import current_span, timed
+from .pipelines import price_tail_pipeline
+from .player_store import PlayerStore, get_player_store
+from .timeline import TIMELINE_COLUMNS, build_portfolio_timeline, portfolio_state
+from .timestamps import INVALID_DAY, to_day_index
+from .versions import get_data_version
 
 # Configure logging for debugging market value calculations
 logging.basicConfig(
@@ -14,18 +26,19 @@ logging.basicConfig(
     ]
 )
 
-# Season date ranges configuration
-SEASON_DATE_RANGES: Dict[str, Tuple[str, str]] = {
-    "2024/2025": ("2024-07-01", "2025-06-30"),
-    "2023/2024": ("2023-06-01", "2024-06-30"),
-    "2025/2026": ("2025-07-01", "2026-06-30"),
-}
+# PortfolioCache "month" of the document holding a timeline's resume checkpoint
+CHECKPOINT_BUCKET = "checkpoint"
 
-DEFAULT_DATE_RANGE = ("2000-01-01", "2030-01-01")
+# Checkpoint history digests are sums of per-transfer hashes modulo this (fits a BSON int64)
+_DIGEST_MODULUS = 2 ** 63
 
-def get_date_range(spielzeit: str) -> Tuple[str, str]:
-    """Get date range for a given spielzeit (season)"""
-    return SEASON_DATE_RANGES.get(spielzeit, DEFAULT_DATE_RANGE)
+# Indexes the cache queries below rely on (created by crud.indexes.ensure_indexes)
+INDEXES = [
+    ("PortfolioCache", IndexModel([("cache_key", ASCENDING), ("month", ASCENDING)], name="cache_key_month")),
+    ("PortfolioCache", IndexModel([("user_name", ASCENDING), ("spielzeit", ASCENDING)], name="user_spielzeit")),
+    ("MarketValueCache", IndexModel([("cache_key", ASCENDING)], name="cache_key")),
+    ("MarketValueCache", IndexModel([("user_name", ASCENDING), ("spielzeit", ASCENDING)], name="user_spielzeit")),
+]
 
 
 def get_transfers(db: MongoClient, spielzeit: str = "2024/2025") -> pd.DataFrame:
@@ -405,6 +418,7 @@ def get_player_points_with_market_value_df(db: MongoClient):
     
     return df
 
+@timed()
 def get_portfolio_timeline(db: MongoClient, user_name: str, spielzeit: str = "2024/2025") -> pd.DataFrame:
     """Get portfolio value timeline for a specific user in a specific season"""
 
@@ -440,8 +454,8 @@ def get_portfolio_timeline(db: MongoClient, user_name: str, spielzeit: str = "20
     if not user_transfers:
         return pd.DataFrame(timeline_data)
 
-    # Get players collection for market value lookups
-    players_collection = db["Players"]
+    # Price histories come from the in-process store (no per-player queries)
+    store = get_player_store(db, spielzeit)
 
     # Create all events
     all_events = []
@@ -473,10 +487,8 @@ def get_portfolio_timeline(db: MongoClient, user_name: str, spielzeit: str = "20
     for event in all_events:
         event_date = event['date']
         # Convert to date object for comparison (removes time/timezone issues)
-        if isinstance(event_date, str):
-            event_date_obj = pd.to_datetime(event_date).date()
-        else:
-            event_date_obj = pd.to_datetime(event_date).date()
+        event_date_obj = pd.to_datetime(event_date).date()
+        event_day = (pd.Timestamp(event_date_obj) - pd.Timestamp(0)).days
 
         if event['type'] == 'buy':
             available_cash -= event['price']
@@ -493,42 +505,12 @@ def get_portfolio_timeline(db: MongoClient, user_name: str, spielzeit: str = "20
         # Calculate current portfolio values
         total_investment = sum(player['buy_price'] for player in portfolio_players.values())
 
-        # Calculate current market value of all players in portfolio
+        # Market value of each held player as of the event day,
+        # falling back to the buy price if there is no earlier quote
         current_market_value = 0
-        for player_id in portfolio_players.keys():
-            player = players_collection.find_one({"id": int(player_id)})
-            if player and 'price_history' in player:
-                # Find market value closest to event_date
-                price_history = player['price_history']
-
-                # Filter price history up to event_date (using dates only)
-                valid_prices = []
-                for entry in price_history:
-                    try:
-                        # Convert timestamp to date for comparison
-                        if isinstance(entry['timestamp'], str):
-                            entry_date = pd.to_datetime(entry['timestamp']).date()
-                        else:
-                            entry_date = pd.to_datetime(entry['timestamp']).date()
-
-                        # Simple date comparison (no timezone issues)
-                        if entry_date <= event_date_obj:
-                            valid_prices.append(entry)
-                    except (ValueError, TypeError, KeyError):
-                        # Skip entries with invalid timestamps
-                        continue
-
-                if valid_prices:
-                    # Get the most recent price before or on event_date
-                    # Sort by timestamp to get the latest one
-                    latest_price = max(valid_prices, key=lambda x: x['timestamp'])
-                    current_market_value += latest_price['quotedPrice']
-                else:
-                    # Fallback to buy price if no market data available
-                    current_market_value += portfolio_players[player_id]['buy_price']
-            else:
-                # Fallback to buy price if player not found
-                current_market_value += portfolio_players[player_id]['buy_price']
+        for player_id, player in portfolio_players.items():
+            price = store.price_asof(player_id, event_day)
+            current_market_value += price if price is not None else player['buy_price']
 
         # Total value = available cash + current market value of players
         total_value = available_cash + current_market_value
@@ -548,188 +530,427 @@ def get_portfolio_timeline(db: MongoClient, user_name: str, spielzeit: str = "20
     return pd.DataFrame(timeline_data)
 
 
+@timed()
 def get_portfolio_current_value_timeline(db: MongoClient, user_name: str, spielzeit: str = "2024/2025") -> pd.DataFrame:
     """Get portfolio current market value timeline (sample at weekly intervals)"""
-
-    # Get current team
-    date_from, date_to = get_date_range(spielzeit)
-    transfers_collection = db["Transfers"]
-
-    # Get current players (bought but not sold)
-    current_players_transfers = list(transfers_collection.find({
-        "member_name": user_name,
-        "buy.date": {"$gte": date_from, "$lte": date_to},
-        "sell": {"$exists": False}
-    }, {"_id": 0}))
-
-    if not current_players_transfers:
-        return pd.DataFrame()
-
-    # Get player IDs
-    player_ids = [transfer['player_id'] for transfer in current_players_transfers]
-
-    # Sample dates (weekly from season start to now)
-    start_date = pd.to_datetime(date_from).date()
-    end_date = min(pd.to_datetime(date_to).date(), pd.to_datetime('today').date())
-
-    # Create weekly date range
-    date_range = pd.date_range(start=start_date, end=end_date, freq='W')
-
-    timeline_data = []
-    players_collection = db["Players"]
-
-    for sample_datetime in date_range:
-        sample_date = sample_datetime.date()  # Convert to date for comparison
-        total_market_value = 0
-        valid_players = 0
-
-        for player_id in player_ids:
-            player = players_collection.find_one({"id": int(player_id)})
-            if player and 'price_history' in player:
-                # Find market value closest to sample_date
-                price_history = player['price_history']
-
-                # Filter price history up to sample_date (using dates only)
-                valid_prices = []
-                for entry in price_history:
-                    try:
-                        # Convert timestamp to date for comparison
-                        if isinstance(entry['timestamp'], str):
-                            entry_date = pd.to_datetime(entry['timestamp']).date()
-                        else:
-                            entry_date = pd.to_datetime(entry['timestamp']).date()
-
-                        # Simple date comparison
-                        if entry_date <= sample_date:
-                            valid_prices.append(entry)
-                    except (ValueError, TypeError, KeyError):
-                        continue
-
-                if valid_prices:
-                    # Get the most recent price before or on sample_date
-                    latest_price = max(valid_prices, key=lambda x: x['timestamp'])
-                    total_market_value += latest_price['quotedPrice']
-                    valid_players += 1
-
-        if valid_players > 0:
-            timeline_data.append({
-                'Datum': sample_date,
-                'Marktwert_Gesamt': total_market_value,
-                'Anzahl_Spieler': valid_players
-            })
-
-    return pd.DataFrame(timeline_data)
+    return sample_portfolio_market_value(db, user_name, spielzeit, "weekly")
 
 
+@timed()
 def get_or_calculate_portfolio_timeline(db: MongoClient, user_name: str, spielzeit: str = "2024/2025") -> pd.DataFrame:
     """Get portfolio timeline from cache and calculate missing dates"""
 
     try:
-        cache_collection = db["PortfolioCache"]
         cache_key = f"{user_name}_{spielzeit}"
         date_from, date_to = get_date_range(spielzeit)
         today = pd.to_datetime('today').date()
+        # Read first: a transfer written while this runs then moves the version past the checkpoint
+        transfers_version = get_data_version(db, "Transfers", spielzeit)
 
         # Try to get from cache first
-        cached_result = cache_collection.find_one({"cache_key": cache_key})
+        cached_df = read_portfolio_cache(db, cache_key, date_from, date_to)
+
+        current_span().cache = "hit" if not cached_df.empty else "miss"
+        if not cached_df.empty:
+            # Find the last cached date
+            last_cached_date = cached_df['Datum'].max()
+
+            logging.debug("Found cache for %s up to %s", user_name, last_cached_date)
+            checkpoint = read_portfolio_checkpoint(db, cache_key)
+
+            # A closed season is final until its transfers change
+            if (
+                last_cached_date >= pd.to_datetime(date_to).date()
+                and checkpoint
+                and checkpoint.get('transfers_version') == transfers_version
+                and checkpoint.get('season_range') == [date_from, date_to]
+            ):
+                logging.debug("Cache of %s is up to date", cache_key)
+                return cached_df
+
+            # Otherwise recalculate the days after the checkpoint, which always
+            # includes today for latest market values and any new transfers
+            resumed = (
+                _resume_portfolio_timeline(db, user_name, spielzeit, checkpoint, transfers_version)
+                if checkpoint else None
+            )
+            if resumed is not None:
+                logging.debug("Resuming %s from checkpoint %s up to %s", cache_key, checkpoint['as_of'], today)
+                missing_df, new_checkpoint = resumed
+                kept_df = cached_df[cached_df['Datum'] <= pd.to_datetime(checkpoint['as_of']).date()]
+                if new_checkpoint == checkpoint:
+                    new_checkpoint = None
+            else:
+                logging.info("No usable checkpoint for %s, recalculating the season", cache_key)
+                current_span().cache = "miss"
+                missing_df, new_checkpoint = _calculate_portfolio_timeline_with_checkpoint(
+                    db, user_name, spielzeit, transfers_version
+                )
+                kept_df = cached_df.iloc[0:0]
+
+            # Only days whose rows actually changed are written back
+            written = update_portfolio_cache(
+                db, cache_key, user_name, spielzeit, missing_df, previous_df=cached_df, checkpoint=new_checkpoint
+            )
+            logging.debug("Updated cache of %s with %d changed days", cache_key, written)
 
-        if cached_result:
-            # Get cached timeline data
-            cached_timeline_data = cached_result["timeline_data"]
-            cached_df = pd.DataFrame(cached_timeline_data)
-
-            if not cached_df.empty and 'Datum' in cached_df.columns:
-                cached_df['Datum'] = pd.to_datetime(cached_df['Datum']).dt.date
-
-                # Find the last cached date
-                last_cached_date = cached_df['Datum'].max()
-
-                print(f"Found cache for {user_name} up to {last_cached_date}")
-
-                # Determine what needs to be calculated
-                needs_calculation = False
-                calculation_start_date = None
-
-                # Check if we need to calculate missing dates
-                if last_cached_date < today:
-                    needs_calculation = True
-                    calculation_start_date = last_cached_date
-                    print(f"Need to calculate from {last_cached_date} to {today}")
-
-                # Always recalculate today to get latest market values and any new transfers
-                elif last_cached_date == today:
-                    needs_calculation = True
-                    calculation_start_date = last_cached_date
-                    print(f"Recalculating today ({today}) for latest market values")
-
-                if needs_calculation:
-                    # Calculate the missing portion
-                    missing_df = calculate_portfolio_timeline_from_date(
-                        db, user_name, spielzeit, calculation_start_date
-                    )
-
-                    if not missing_df.empty:
-                        # Combine cached data (excluding overlap) with new data
-                        if calculation_start_date == last_cached_date:
-                            # Remove the last cached date if we're recalculating it
-                            cached_df = cached_df[cached_df['Datum'] < last_cached_date]
-
-                        combined_df = pd.concat([cached_df, missing_df], ignore_index=True)
-                        combined_df = combined_df.sort_values('Datum').reset_index(drop=True)
-
-                        # Update cache with combined data
-                        update_portfolio_cache(db, cache_key, user_name, spielzeit, combined_df)
-
-                        print(f"Updated cache with {len(missing_df)} new entries")
-                        return combined_df
-                    else:
-                        print("No new data calculated, returning cached data")
-                        return cached_df
-                else:
-                    print("Cache is up to date")
-                    return cached_df
+            combined_df = pd.concat([kept_df, missing_df], ignore_index=True) if not missing_df.empty else kept_df
+            return combined_df.sort_values('Datum', kind='stable').reset_index(drop=True)
 
         # Calculate from scratch if no cache exists
-        print(f"No cache found for {user_name}, calculating from scratch")
-        timeline_df = calculate_portfolio_timeline_optimized(db, user_name, spielzeit)
+        logging.info("No cache found for %s, calculating from scratch", cache_key)
+        timeline_df, checkpoint = _calculate_portfolio_timeline_with_checkpoint(
+            db, user_name, spielzeit, transfers_version
+        )
 
         # Save to cache
         if not timeline_df.empty:
-            update_portfolio_cache(db, cache_key, user_name, spielzeit, timeline_df)
+            update_portfolio_cache(db, cache_key, user_name, spielzeit, timeline_df, checkpoint=checkpoint)
 
         return timeline_df
 
     except Exception as e:
-        print(f"Cache error: {e}")
+        logging.warning("Portfolio cache error for %s: %s", cache_key, e)
         # Fallback to direct calculation without caching
         return calculate_portfolio_timeline_optimized(db, user_name, spielzeit)
 
 
-def update_portfolio_cache(db: MongoClient, cache_key: str, user_name: str, spielzeit: str, timeline_df: pd.DataFrame):
-    """Update the portfolio cache with new timeline data"""
-    cache_collection = db["PortfolioCache"]
-
-    # Convert dates to strings for BSON compatibility
+def _rows_by_day(timeline_df: pd.DataFrame) -> Dict[str, List[dict]]:
+    """Timeline rows grouped by ISO day (the season start day has two rows)."""
     cache_data = timeline_df.copy()
-    if 'Datum' in cache_data.columns:
-        cache_data['Datum'] = cache_data['Datum'].astype(str)
+    cache_data['Datum'] = cache_data['Datum'].astype(str)
+    by_day: Dict[str, List[dict]] = {}
+    for row in cache_data.to_dict('records'):
+        by_day.setdefault(row['Datum'], []).append(row)
+    return by_day
 
-    cache_doc = {
-        "cache_key": cache_key,
-        "user_name": user_name,
-        "spielzeit": spielzeit,
-        "timeline_data": cache_data.to_dict('records'),
-        "calculated_at": pd.Timestamp.now().isoformat()
+
+@timed()
+def update_portfolio_cache(
+    db: MongoClient,
+    cache_key: str,
+    user_name: str,
+    spielzeit: str,
+    timeline_df: pd.DataFrame,
+    previous_df: Optional[pd.DataFrame] = None,
+    checkpoint: Optional[dict] = None,
+) -> int:
+    """Write timeline days into the month buckets of the portfolio cache.
+
+    The cache holds one document per member, season and month with the rows of
+    each day under ``days.<YYYY-MM-DD>``, so a refresh only ``$set``s the days
+    it touched instead of rewriting the whole season. Days whose rows are
+    unchanged from ``previous_df`` are skipped. A ``checkpoint`` (see
+    ``read_portfolio_checkpoint``) is stored in the same ``bulk_write``.
+    Returns the number of days written.
+    """
+    requests, written = portfolio_cache_requests(
+        cache_key, user_name, spielzeit, timeline_df, previous_df=previous_df, checkpoint=checkpoint
+    )
+    if requests:
+        db["PortfolioCache"].bulk_write(requests, ordered=False)
+    return written
+
+
+def portfolio_cache_requests(
+    cache_key: str,
+    user_name: str,
+    spielzeit: str,
+    timeline_df: pd.DataFrame,
+    previous_df: Optional[pd.DataFrame] = None,
+    checkpoint: Optional[dict] = None,
+) -> Tuple[list, int]:
+    """``bulk_write`` requests of ``update_portfolio_cache`` and the number of days they write."""
+    rows = _rows_by_day(timeline_df) if not timeline_df.empty else {}
+    if previous_df is not None and not previous_df.empty:
+        previous = _rows_by_day(previous_df)
+        rows = {day: day_rows for day, day_rows in rows.items() if previous.get(day) != day_rows}
+    if not rows and checkpoint is None:
+        return [], 0
+
+    calculated_at = pd.Timestamp.now().isoformat()
+    by_month: Dict[str, Dict[str, List[dict]]] = {}
+    for day, day_rows in rows.items():
+        by_month.setdefault(day[:7], {})[f"days.{day}"] = day_rows
+
+    # Single-document caches written before the month buckets are dropped
+    requests = [DeleteMany({"cache_key": cache_key, "month": {"$exists": False}})]
+    requests.extend(
+        UpdateOne(
+            {"cache_key": cache_key, "month": month},
+            {
+                "$set": {**day_fields, "calculated_at": calculated_at},
+                "$setOnInsert": {"user_name": user_name, "spielzeit": spielzeit},
+            },
+            upsert=True,
+        )
+        for month, day_fields in sorted(by_month.items())
+    )
+    if checkpoint is not None:
+        requests.append(UpdateOne(
+            {"cache_key": cache_key, "month": CHECKPOINT_BUCKET},
+            {
+                "$set": {"checkpoint": checkpoint, "calculated_at": calculated_at},
+                "$setOnInsert": {"user_name": user_name, "spielzeit": spielzeit},
+            },
+            upsert=True,
+        ))
+    return requests, len(rows)
+
+
+@timed()
+def read_portfolio_cache(
+    db: MongoClient, cache_key: str, date_from: Optional[str] = None, date_to: Optional[str] = None
+) -> pd.DataFrame:
+    """Cached timeline rows between two ISO dates (inclusive), sorted by date.
+
+    Only the month buckets overlapping the range are fetched.
+    """
+    query = {"cache_key": cache_key, "month": {"$exists": True, "$ne": CHECKPOINT_BUCKET}}
+    if date_from or date_to:
+        month_range = {}
+        if date_from:
+            month_range["$gte"] = date_from[:7]
+        if date_to:
+            month_range["$lte"] = date_to[:7]
+        query["month"] = month_range
+
+    days: Dict[str, List[dict]] = {}
+    for bucket in db["PortfolioCache"].find(query, {"_id": 0, "days": 1}):
+        days.update(bucket.get("days") or {})
+
+    records = [
+        row
+        for day in sorted(days)
+        if (not date_from or day >= date_from) and (not date_to or day <= date_to)
+        for row in days[day]
+    ]
+    if not records:
+        return pd.DataFrame()
+    cached_df = pd.DataFrame(records)
+    cached_df['Datum'] = pd.to_datetime(cached_df['Datum']).dt.date
+    return cached_df
+
+
+def read_portfolio_checkpoint(db: MongoClient, cache_key: str) -> Optional[dict]:
+    """State stored with a cached timeline, or None.
+
+    ``as_of`` is the last day whose rows are final, ``cash`` and ``holdings``
+    the portfolio at its end (see ``timeline.portfolio_state``) and
+    ``last_transfer_id`` the newest transfer ``_id`` the state includes.
+    ``history_digest`` (see ``history_digest``) covers the transfers up to
+    ``as_of``, ``transfers_version`` is the Transfers data version the state
+    was computed at and ``season_range`` the season's ``[date_from, date_to]``.
+    """
+    doc = db["PortfolioCache"].find_one(
+        {"cache_key": cache_key, "month": CHECKPOINT_BUCKET}, {"_id": 0, "checkpoint": 1}
+    )
+    return (doc or {}).get("checkpoint")
+
+
+def _checkpoint_day(end_date):
+    """Last final day of a timeline ending at ``end_date``; today is recalculated on every visit."""
+    today = pd.to_datetime('today').date()
+    return end_date - pd.Timedelta(days=1) if end_date >= today else end_date
+
+
+def _transfer_digest(transfer: dict, as_of: str) -> int:
+    """Hash of the fields of one transfer a timeline up to ``as_of`` depends on."""
+    sell = transfer.get('sell')
+    if sell and sell['date'] > as_of:
+        sell = None
+    fields = (
+        str(transfer.get('_id')),
+        str(transfer['player_id']),
+        transfer['player_name'],
+        transfer['buy']['date'],
+        int(transfer['buy']['price']),
+        (sell['date'], int(sell['price'])) if sell else None,
+    )
+    return int.from_bytes(hashlib.blake2b(repr(fields).encode(), digest_size=8).digest(), 'big')
+
+
+def history_digest(transfers: List[dict], as_of: str) -> int:
+    """Order-independent digest of the transfers bought on or before ``as_of``.
+
+    Sales after ``as_of`` are left out, so recording one does not change the
+    digest. It is a sum of per-transfer hashes, so a checkpoint can be
+    advanced by swapping the contributions of the transfers that changed.
+    """
+    return sum(_transfer_digest(t, as_of) for t in transfers if t['buy']['date'] <= as_of) % _DIGEST_MODULUS
+
+
+def _finish_checkpoint(
+    checkpoint: Optional[dict],
+    transfers: List[dict],
+    spielzeit: str,
+    transfers_version: int,
+    previous: Optional[dict] = None,
+) -> Optional[dict]:
+    """Copy of ``checkpoint`` with the fields ``_resume_portfolio_timeline`` validates.
+
+    ``transfers`` are all of the member's transfers, or with ``previous`` the
+    checkpoint was advanced from only those changed since ``previous``.
+    """
+    if checkpoint is None:
+        return None
+    ids = [t['_id'] for t in transfers if t.get('_id') is not None]
+    if previous is None:
+        digest = history_digest(transfers, checkpoint['as_of'])
+    else:
+        if previous.get('last_transfer_id') is not None:
+            ids.append(previous['last_transfer_id'])
+        digest = (
+            previous['history_digest']
+            - history_digest(transfers, previous['as_of'])
+            + history_digest(transfers, checkpoint['as_of'])
+        ) % _DIGEST_MODULUS
+    return {
+        **checkpoint,
+        'last_transfer_id': max(ids) if ids else None,
+        'history_digest': digest,
+        'transfers_version': transfers_version,
+        'season_range': list(get_date_range(spielzeit)),
     }
 
-    # Upsert to cache (creates collection if it doesn't exist)
-    cache_collection.replace_one(
-        {"cache_key": cache_key},
-        cache_doc,
-        upsert=True
+
+def _calculate_portfolio_timeline_with_checkpoint(
+    db: MongoClient, user_name: str, spielzeit: str, transfers_version: Optional[int] = None
+) -> Tuple[pd.DataFrame, Optional[dict]]:
+    """``calculate_portfolio_timeline_optimized`` plus the checkpoint to resume it from."""
+    date_from, date_to = get_date_range(spielzeit)
+    if transfers_version is None:
+        transfers_version = get_data_version(db, "Transfers", spielzeit)
+    user_transfers = list(db["Transfers"].find({
+        "member_name": user_name,
+        "buy.date": {"$gte": date_from, "$lte": date_to}
+    }))
+    if not user_transfers:
+        return calculate_portfolio_timeline_optimized(db, user_name, spielzeit), None
+
+    return portfolio_timeline_with_checkpoint(
+        user_transfers, get_player_store(db, spielzeit), spielzeit, transfers_version
     )
 
 
+def portfolio_timeline_with_checkpoint(
+    transfers: List[dict], store: PlayerStore, spielzeit: str, transfers_version: int = 0
+) -> Tuple[pd.DataFrame, Optional[dict]]:
+    """Season timeline of one member's transfers and its checkpoint, without database access.
+
+    ``transfers_version`` is the Transfers data version read before ``transfers``.
+    """
+    date_from, date_to = get_date_range(spielzeit)
+    end_date = min(pd.to_datetime('today').date(), pd.to_datetime(date_to).date())
+    timeline_df = build_portfolio_timeline(transfers, store, pd.to_datetime(date_from).date(), end_date)
+    checkpoint = portfolio_state(transfers, timeline_df, store, _checkpoint_day(end_date))
+    return timeline_df, _finish_checkpoint(checkpoint, transfers, spielzeit, transfers_version)
+
+
+def _load_price_tail(db: MongoClient, player_ids: List[int], as_of: str, end_date: str,
+                     opening_prices: Dict[int, Optional[int]], spielzeit: str) -> PlayerStore:
+    """PlayerStore with the quotes after ``as_of`` plus each player's as-of quote on ``as_of``.
+
+    Opening quotes of players held at the checkpoint come from the checkpoint;
+    the others are looked up server-side, so no older history is transferred.
+    """
+    as_of_day = int(to_day_index([as_of])[0])
+    opening_ids = [player_id for player_id in player_ids if player_id not in opening_prices]
+    histories = {}
+    for doc in db["Players"].aggregate(price_tail_pipeline(player_ids, as_of, end_date, opening_ids)):
+        player_id = int(doc["id"])
+        entries = [e for e in doc.get("price_history") or [] if e.get("quotedPrice") is not None]
+        days = to_day_index([e.get("timestamp") for e in entries]).astype(np.int64)
+        prices = np.asarray([e["quotedPrice"] for e in entries], dtype=np.int64)
+        valid = days != INVALID_DAY
+        days, prices = days[valid], prices[valid]
+        if player_id in opening_prices:
+            opening = opening_prices[player_id]
+        else:
+            opening = (doc.get("opening") or {}).get("quotedPrice")
+        if opening is not None:
+            days = np.concatenate([[as_of_day], days])
+            prices = np.concatenate([[opening], prices])
+        histories[player_id] = (days, prices)
+    return PlayerStore.from_price_histories(histories, spielzeit)
+
+
+def _resume_portfolio_timeline(
+    db: MongoClient, user_name: str, spielzeit: str, checkpoint: dict, transfers_version: int
+) -> Optional[Tuple[pd.DataFrame, dict]]:
+    """Timeline rows after the checkpoint day and the advanced checkpoint.
+
+    While the Transfers data version is the one the checkpoint was computed
+    at, only transfers bought or sold after the checkpoint (or inserted since)
+    and price quotes after it are read. Once it moved, an in-place update
+    dated on or before the checkpoint (e.g. a late-recorded sale) would not
+    show up that way, so the member's transfers are read and their history up
+    to the checkpoint is compared with its ``history_digest``. Returns None
+    when that history changed or the checkpoint predates these fields, so the
+    season has to be replayed.
+    """
+    date_from, date_to = get_date_range(spielzeit)
+    as_of = checkpoint['as_of']
+    end_date = min(pd.to_datetime('today').date(), pd.to_datetime(date_to).date())
+    if checkpoint.get('season_range') != [date_from, date_to] or 'history_digest' not in checkpoint:
+        return None
+
+    last_transfer_id = checkpoint.get('last_transfer_id')
+    season_query = {"member_name": user_name, "buy.date": {"$gte": date_from, "$lte": date_to}}
+    if checkpoint.get('transfers_version') == transfers_version:
+        newer = [{"buy.date": {"$gt": as_of}}, {"sell.date": {"$gt": as_of}}]
+        if last_transfer_id is not None:
+            newer.append({"_id": {"$gt": last_transfer_id}})
+        changed = list(db["Transfers"].find({**season_query, "$or": newer}))
+    else:
+        season_transfers = list(db["Transfers"].find(season_query))
+        if history_digest(season_transfers, as_of) != checkpoint['history_digest']:
+            return None
+        changed = [
+            t for t in season_transfers
+            if t['buy']['date'] > as_of
+            or (t.get('sell') and t['sell']['date'] > as_of)
+            or (last_transfer_id is not None and t['_id'] > last_transfer_id)
+        ]
+
+    holdings = {h['_id']: h for h in checkpoint['holdings']}
+    new_transfers = []
+    for transfer in changed:
+        if transfer['buy']['date'] > as_of:
+            new_transfers.append(transfer)
+        elif transfer['_id'] in holdings:
+            holdings[transfer['_id']] = transfer
+        else:
+            return None
+
+    first_day = pd.to_datetime(as_of).date() + pd.Timedelta(days=1)
+    if first_day > end_date:
+        return pd.DataFrame(columns=TIMELINE_COLUMNS), _finish_checkpoint(
+            checkpoint, changed, spielzeit, transfers_version, previous=checkpoint
+        )
+
+    transfers = list(holdings.values()) + new_transfers
+    opening_prices = {int(h['player_id']): h['market_value'] for h in checkpoint['holdings']}
+    player_ids = sorted({int(t['player_id']) for t in transfers})
+    store = _load_price_tail(db, player_ids, as_of, end_date.isoformat(), opening_prices, spielzeit)
+
+    timeline_df = build_portfolio_timeline(
+        transfers,
+        store,
+        first_day,
+        end_date,
+        starting_budget=checkpoint['cash'],
+        season_start_row=False,
+        carry_holdings=True,
+    )
+    new_checkpoint = checkpoint
+    new_as_of = _checkpoint_day(end_date)
+    if new_as_of > pd.to_datetime(as_of).date():
+        new_checkpoint = portfolio_state(transfers, timeline_df, store, new_as_of) or checkpoint
+    return timeline_df, _finish_checkpoint(new_checkpoint, changed, spielzeit, transfers_version, previous=checkpoint)
+
+
+@timed()
 def calculate_portfolio_timeline_from_date(db: MongoClient, user_name: str, spielzeit: str, from_date) -> pd.DataFrame:
     """Calculate portfolio timeline starting from a specific date to today"""
 
@@ -754,171 +975,32 @@ def calculate_portfolio_timeline_from_date(db: MongoClient, user_name: str, spie
     if not all_transfers:
         return pd.DataFrame()
 
-    # Build complete event timeline up to today
-    all_events = []
-    for transfer in all_transfers:
-        # Buy event
-        buy_date = pd.to_datetime(transfer['buy']['date']).date()
-        all_events.append({
-            'date': buy_date,
-            'date_str': transfer['buy']['date'],
-            'type': 'buy',
-            'player_id': transfer['player_id'],
-            'player_name': transfer['player_name'],
-            'price': transfer['buy']['price']
-        })
-
-        # Sell event if exists
-        if transfer.get('sell'):
-            sell_date = pd.to_datetime(transfer['sell']['date']).date()
-            all_events.append({
-                'date': sell_date,
-                'date_str': transfer['sell']['date'],
-                'type': 'sell',
-                'player_id': transfer['player_id'],
-                'player_name': transfer['player_name'],
-                'price': transfer['sell']['price']
-            })
-
-    # Sort all events by date
-    all_events.sort(key=lambda x: x['date'])
-
-    # Filter events to only those from from_date onwards
-    relevant_events = [event for event in all_events if event['date'] >= from_date_obj]
-
-    if not relevant_events:
-        return pd.DataFrame()
-
-    # Get all unique player IDs for price lookup
-    all_player_ids = set()
-    for transfer in all_transfers:
-        all_player_ids.add(transfer['player_id'])
-
-    # Bulk fetch price history for all players
-    players_collection = db["Players"]
-    players_data = {}
-
-    for player_doc in players_collection.find(
-        {"id": {"$in": list(map(int, all_player_ids))}},
-        {"id": 1, "price_history": 1}
+    # Nothing to do unless an event happened on or after from_date
+    from_date_str = from_date_obj.strftime("%Y-%m-%d")
+    if not any(
+        transfer['buy']['date'] >= from_date_str
+        or (transfer.get('sell') and transfer['sell']['date'] >= from_date_str)
+        for transfer in all_transfers
     ):
-        player_id = str(player_doc["id"])
-        price_history = []
-        for entry in player_doc.get("price_history", []):
-            try:
-                if isinstance(entry['timestamp'], str):
-                    entry_date = pd.to_datetime(entry['timestamp']).date()
-                else:
-                    entry_date = pd.to_datetime(entry['timestamp']).date()
-
-                price_history.append({
-                    'date': entry_date,
-                    'price': entry['quotedPrice']
-                })
-            except (ValueError, TypeError, KeyError):
-                continue
-
-        price_history.sort(key=lambda x: x['date'])
-        players_data[player_id] = price_history
-
-    # Rebuild portfolio state up to from_date
-    portfolio_players = {}
-    available_cash = 40_000_000  # Starting budget
-
-    # Process all events up to (but not including) from_date to rebuild state
-    for event in all_events:
-        if event['date'] < from_date_obj:
-            if event['type'] == 'buy':
-                available_cash -= event['price']
-                portfolio_players[event['player_id']] = {
-                    'name': event['player_name'],
-                    'buy_price': event['price'],
-                    'buy_date': event['date_str']
-                }
-            elif event['type'] == 'sell':
-                if event['player_id'] in portfolio_players:
-                    available_cash += event['price']
-                    del portfolio_players[event['player_id']]
+        return pd.DataFrame()
 
-    # Now create daily timeline from from_date onwards
-    timeline_data = []
+    # State before from_date falls out of the event replay, so build from season start
     end_date = min(today, pd.to_datetime(date_to).date())
-
-    # Create a dictionary of events by date for easy lookup
-    events_by_date = {}
-    for event in relevant_events:
-        event_date = event['date']
-        if event_date not in events_by_date:
-            events_by_date[event_date] = []
-        events_by_date[event_date].append(event)
-
-    # Process each day from from_date to today
-    current_date = from_date_obj
-    while current_date <= end_date:
-        # Process any events that happened on this date
-        last_event_type = None
-        last_event_player = None
-        last_event_price = 0
-
-        if current_date in events_by_date:
-            for event in events_by_date[current_date]:
-                # Update portfolio based on event
-                if event['type'] == 'buy':
-                    available_cash -= event['price']
-                    portfolio_players[event['player_id']] = {
-                        'name': event['player_name'],
-                        'buy_price': event['price'],
-                        'buy_date': event['date_str']
-                    }
-                    last_event_type = 'buy'
-                    last_event_player = event['player_name']
-                    last_event_price = event['price']
-                elif event['type'] == 'sell':
-                    if event['player_id'] in portfolio_players:
-                        available_cash += event['price']
-                        del portfolio_players[event['player_id']]
-                        last_event_type = 'sell'
-                        last_event_player = event['player_name']
-                        last_event_price = event['price']
-
-        # Calculate daily portfolio values (regardless of whether there were events)
-        total_investment = sum(player['buy_price'] for player in portfolio_players.values())
-        current_market_value = get_portfolio_market_value_fast(players_data, portfolio_players, current_date)
-        total_value = available_cash + current_market_value
-
-        # Determine event type for this day
-        if last_event_type:
-            event_type = last_event_type
-            event_player = last_event_player
-            event_price = last_event_price
-        else:
-            event_type = 'daily_update'
-            event_player = 'Market Update'
-            event_price = 0
-
-        timeline_data.append({
-            'Datum': current_date,
-            'Portfolio_Wert_Kaufpreis': total_investment,
-            'Portfolio_Wert_Aktuell': current_market_value,
-            'Verfuegbares_Cash': available_cash,
-            'Gesamtwert': total_value,
-            'Anzahl_Spieler': len(portfolio_players),
-            'Event_Type': event_type,
-            'Event_Player': event_player,
-            'Event_Price': event_price
-        })
-
-        # Move to next day
-        current_date += pd.Timedelta(days=1).to_pytimedelta()
-
-    return pd.DataFrame(timeline_data)
+    timeline_df = build_portfolio_timeline(
+        all_transfers,
+        get_player_store(db, spielzeit),
+        pd.to_datetime(date_from).date(),
+        end_date,
+        season_start_row=False,
+    )
+    return timeline_df[timeline_df['Datum'] >= from_date_obj].reset_index(drop=True)
 
 
+@timed()
 def calculate_portfolio_timeline_optimized(db: MongoClient, user_name: str, spielzeit: str = "2024/2025") -> pd.DataFrame:
     """Optimized portfolio timeline calculation with bulk operations"""
 
     date_from, date_to = get_date_range(spielzeit)
-    STARTING_BUDGET = 40_000_000
 
     # Get all transfers for the user in this season
     transfers_collection = db["Transfers"]
@@ -941,239 +1023,105 @@ def calculate_portfolio_timeline_optimized(db: MongoClient, user_name: str, spie
             'Event_Price': 0
         }])
 
-    # Get all unique player IDs that this user ever owned
-    all_player_ids = set()
-    for transfer in user_transfers:
-        all_player_ids.add(transfer['player_id'])
-
-    # Bulk fetch ALL price history for ALL players at once
-    players_collection = db["Players"]
-    players_data = {}
-
-    logging.debug(f"Loading price data for {len(all_player_ids)} unique players")
-    logging.debug(f"Player IDs to load: {sorted(all_player_ids)}")
-
-    for player_doc in players_collection.find(
-        {"id": {"$in": list(map(int, all_player_ids))}},
-        {"id": 1, "price_history": 1}
-    ):
-        player_id = str(player_doc["id"])
-        logging.debug(f"Loading price data for player ID: {player_id}")
-        # Pre-process price history into date-sorted format
-        price_history = []
-        for entry in player_doc.get("price_history", []):
-            try:
-                if isinstance(entry['timestamp'], str):
-                    entry_date = pd.to_datetime(entry['timestamp']).date()
-                else:
-                    entry_date = pd.to_datetime(entry['timestamp']).date()
-
-                price_history.append({
-                    'date': entry_date,
-                    'price': entry['quotedPrice']
-                })
-            except (ValueError, TypeError, KeyError):
-                continue
-
-        # Sort by date for efficient lookup
-        price_history.sort(key=lambda x: x['date'])
-        players_data[player_id] = price_history
-
-        logging.debug(f"Player {player_id}: {len(price_history)} price entries")
-        if price_history:
-            logging.debug(f"  Date range: {price_history[0]['date']} to {price_history[-1]['date']}")
-
-    logging.debug(f"Loaded price data for {len(players_data)} players")
-    logging.debug(f"Players loaded: {sorted(players_data.keys())}")
-
-    # Create all events
-    all_events = []
-    for transfer in user_transfers:
-        all_events.append({
-            'date': transfer['buy']['date'],
-            'type': 'buy',
-            'player_id': transfer['player_id'],
-            'player_name': transfer['player_name'],
-            'price': transfer['buy']['price']
-        })
-
-        if transfer.get('sell'):
-            all_events.append({
-                'date': transfer['sell']['date'],
-                'type': 'sell',
-                'player_id': transfer['player_id'],
-                'player_name': transfer['player_name'],
-                'price': transfer['sell']['price']
-            })
-
-    # Sort all events by date
-    all_events.sort(key=lambda x: x['date'])
-
-    # Initialize timeline
-    timeline_data = []
-    portfolio_players = {}
-    available_cash = STARTING_BUDGET
-
-    # Add starting point
-    timeline_data.append({
-        'Datum': pd.to_datetime(date_from).date(),
-        'Portfolio_Wert_Kaufpreis': 0,
-        'Portfolio_Wert_Aktuell': 0,
-        'Verfuegbares_Cash': available_cash,
-        'Gesamtwert': available_cash,
-        'Anzahl_Spieler': 0,
-        'Event_Type': 'start',
-        'Event_Player': 'Season Start',
-        'Event_Price': 0
-    })
-
     # Generate daily timeline from season start to today
     start_date = pd.to_datetime(date_from).date()
     end_date = min(pd.to_datetime('today').date(), pd.to_datetime(date_to).date())
+    return build_portfolio_timeline(user_transfers, get_player_store(db, spielzeit), start_date, end_date)
 
-    # Create a dictionary of events by date for easy lookup
-    events_by_date = {}
-    for event in all_events:
-        event_date = event['date']
-        if isinstance(event_date, str):
-            event_date_obj = pd.to_datetime(event_date).date()
-        else:
-            event_date_obj = pd.to_datetime(event_date).date()
-
-        if event_date_obj not in events_by_date:
-            events_by_date[event_date_obj] = []
-        events_by_date[event_date_obj].append(event)
-
-    # Process each day from start to end
-    current_date = start_date
-    while current_date <= end_date:
-        # Process any events that happened on this date
-        last_event_type = None
-        last_event_player = None
-        last_event_price = 0
-
-        if current_date in events_by_date:
-            for event in events_by_date[current_date]:
-                # Update portfolio based on event
-                if event['type'] == 'buy':
-                    available_cash -= event['price']
-                    portfolio_players[event['player_id']] = {
-                        'name': event['player_name'],
-                        'buy_price': event['price'],
-                        'buy_date': event['date']
-                    }
-                    last_event_type = 'buy'
-                    last_event_player = event['player_name']
-                    last_event_price = event['price']
-                elif event['type'] == 'sell':
-                    if event['player_id'] in portfolio_players:
-                        available_cash += event['price']
-                        del portfolio_players[event['player_id']]
-                        last_event_type = 'sell'
-                        last_event_player = event['player_name']
-                        last_event_price = event['price']
-
-        # Calculate daily portfolio values (regardless of whether there were events)
-        total_investment = sum(player['buy_price'] for player in portfolio_players.values())
-        current_market_value = get_portfolio_market_value_fast(players_data, portfolio_players, current_date)
-        total_value = available_cash + current_market_value
 
-        # Determine event type for this day
-        if current_date == start_date:
-            event_type = 'start'
-            event_player = 'Season Start'
-            event_price = 0
-        elif last_event_type:
-            event_type = last_event_type
-            event_player = last_event_player
-            event_price = last_event_price
+def get_portfolio_market_value_fast(players_data, portfolio_players, target_date):
+    """Market value of a portfolio on one day from pre-loaded price lists.
+
+    ``players_data`` maps player_id (str) to a date-sorted list of
+    ``{'date', 'price'}`` entries. Players without an earlier quote count with
+    their buy price. The timeline functions use the vectorized as-of engine
+    (``PlayerStore.price_asof_matrix``) instead.
+    """
+    total_market_value = 0
+    for player_id, player in portfolio_players.items():
+        price_history = players_data.get(str(player_id)) or []
+        pos = bisect_right(price_history, target_date, key=lambda entry: entry['date'])
+        if pos > 0:
+            total_market_value += price_history[pos - 1]['price']
         else:
-            event_type = 'daily_update'
-            event_player = 'Market Update'
-            event_price = 0
+            total_market_value += player['buy_price']
+    return total_market_value
 
-        timeline_data.append({
-            'Datum': current_date,
-            'Portfolio_Wert_Kaufpreis': total_investment,
-            'Portfolio_Wert_Aktuell': current_market_value,
-            'Verfuegbares_Cash': available_cash,
-            'Gesamtwert': total_value,
-            'Anzahl_Spieler': len(portfolio_players),
-            'Event_Type': event_type,
-            'Event_Player': event_player,
-            'Event_Price': event_price
-        })
 
-        # Move to next day
-        current_date += pd.Timedelta(days=1).to_pytimedelta()
+@timed()
+def get_market_value_watermark(db: MongoClient, user_name: str, spielzeit: str = "2024/2025") -> dict:
+    """Source data state a market value timeline is computed from.
 
-    return pd.DataFrame(timeline_data)
+    Current player ids, the member's newest transfer ``_id``, the latest
+    ``price_history`` timestamp of those players and the last sampled day.
+    Costs three small queries; the histories themselves stay on the server.
+    """
+    date_from, date_to = get_date_range(spielzeit)
+    season_transfers = {"member_name": user_name, "buy.date": {"$gte": date_from, "$lte": date_to}}
 
+    player_ids = sorted(
+        str(transfer['player_id'])
+        for transfer in db["Transfers"].find({**season_transfers, "sell": None}, {"_id": 0, "player_id": 1})
+    )
+    last_transfer = db["Transfers"].find_one(season_transfers, {"_id": 1}, sort=[("_id", -1)])
 
-def get_portfolio_market_value_fast(players_data, portfolio_players, target_date):
-    """Fast market value calculation using pre-loaded price data"""
-    total_market_value = 0
+    latest_price = None
+    if player_ids:
+        ids = [int(player_id) for player_id in player_ids if player_id.isdigit()]
+        for doc in db["Players"].aggregate([
+            {"$match": {"id": {"$in": ids}}},
+            {"$group": {"_id": None, "latest": {"$max": {"$max": "$price_history.timestamp"}}}},
+        ]):
+            latest_price = doc.get("latest")
 
-    logging.debug(f"=== MARKET VALUE LOOKUP DEBUG for {target_date} ===")
-    logging.debug(f"Portfolio contains {len(portfolio_players)} players")
-
-    for player_id in portfolio_players.keys():
-        player_name = portfolio_players[player_id]['name']
-        buy_price = portfolio_players[player_id]['buy_price']
-
-        logging.debug(f"Player: {player_name} (ID: {player_id})")
-        logging.debug(f"  Buy price: {buy_price}")
-        logging.debug(f"  player_id type: {type(player_id)}, value: {repr(player_id)}")
-        logging.debug(f"  Available player keys: {list(players_data.keys())}")
-
-        # Convert player_id to string for lookup (price data keys are strings)
-        player_id_str = str(player_id)
-        if player_id_str in players_data:
-            price_history = players_data[player_id_str]
-            logging.debug(f"  Price history entries: {len(price_history)}")
-
-            if price_history:
-                # Show first and last entries for context
-                logging.debug(f"  First entry: {price_history[0]['date']} -> {price_history[0]['price']}")
-                logging.debug(f"  Last entry: {price_history[-1]['date']} -> {price_history[-1]['price']}")
-
-                # Check data types for comparison
-                logging.debug(f"  Target date type: {type(target_date)}, value: {target_date}")
-                logging.debug(f"  First price date type: {type(price_history[0]['date'])}, value: {price_history[0]['date']}")
-
-                # Binary search or linear search for the right price
-                # Since it's sorted by date, we can use bisect for O(log n) lookup
-                valid_price = None
-                found_entry = None
-
-                for i, price_entry in enumerate(reversed(price_history)):  # Start from most recent
-                    logging.debug(f"  Checking entry {len(price_history)-i-1}: {price_entry['date']} <= {target_date}? {price_entry['date'] <= target_date}")
-                    if price_entry['date'] <= target_date:
-                        valid_price = price_entry['price']
-                        found_entry = price_entry
-                        break
-
-                if valid_price is not None and found_entry is not None:
-                    logging.debug(f"  Found market value: {valid_price} from {found_entry['date']}")
-                    total_market_value += valid_price
-                else:
-                    logging.warning(f"  No market value found for {target_date}, using buy price: {buy_price}")
-                    total_market_value += buy_price
-            else:
-                logging.warning(f"  Empty price history, using buy price: {buy_price}")
-                total_market_value += buy_price
-        else:
-            logging.warning(f"  Player not found in price data, using buy price: {buy_price}")
-            total_market_value += buy_price
+    end_date = min(pd.to_datetime(date_to).date(), pd.to_datetime('today').date())
+    return {
+        "player_ids": player_ids,
+        "last_transfer_id": last_transfer["_id"] if last_transfer else None,
+        "latest_price": latest_price,
+        "end_date": end_date.isoformat(),
+    }
 
-    logging.debug(f"Total market value: {total_market_value}")
-    logging.debug(f"=== END MARKET VALUE LOOKUP DEBUG ===")
 
-    return total_market_value
+def _stale_from(cached: dict, current: dict):
+    """First sample date a watermark change can affect, or None if everything must be recomputed.
 
+    New transfers or sales change the set of current players and with it every
+    sample. New quotes are dated on or after the previous latest quote, and a
+    later end date only adds samples.
+    """
+    if cached.get("player_ids") != current["player_ids"] or cached.get("last_transfer_id") != current["last_transfer_id"]:
+        return None
+    starts = []
+    if cached.get("latest_price") != current["latest_price"]:
+        if not cached.get("latest_price"):
+            return None
+        starts.append(pd.to_datetime(str(cached["latest_price"])[:10]).date())
+    if cached.get("end_date") != current["end_date"]:
+        starts.append(pd.to_datetime(cached["end_date"]).date() + pd.Timedelta(days=1))
+    return min(starts) if starts else None
+
+
+def market_value_cache_doc(user_name: str, spielzeit: str, timeline_df: pd.DataFrame, watermark: dict) -> dict:
+    """MarketValueCache document of a market value timeline."""
+    # Convert dates to strings for BSON compatibility
+    cache_data = timeline_df.copy()
+    if 'Datum' in cache_data.columns:
+        cache_data['Datum'] = cache_data['Datum'].astype(str)
+
+    return {
+        "cache_key": f"{user_name}_{spielzeit}_market",
+        "user_name": user_name,
+        "spielzeit": spielzeit,
+        "timeline_data": cache_data.to_dict('records'),
+        "watermark": watermark,
+        "calculated_at": pd.Timestamp.now().isoformat()
+    }
 
+
+@timed()
 def get_or_calculate_market_value_timeline(db: MongoClient, user_name: str, spielzeit: str = "2024/2025") -> pd.DataFrame:
-    """Get market value timeline from cache or calculate and cache if not exists"""
+    """Get market value timeline from cache, recomputing the part newer data made stale"""
 
     try:
         cache_collection = db["MarketValueCache"]
@@ -1181,36 +1129,41 @@ def get_or_calculate_market_value_timeline(db: MongoClient, user_name: str, spie
 
         # Try to get from cache first
         cached_result = cache_collection.find_one({"cache_key": cache_key})
-
-        if cached_result:
-            timeline_data = cached_result["timeline_data"]
-            df = pd.DataFrame(timeline_data)
+        watermark = get_market_value_watermark(db, user_name, spielzeit)
+        cached_watermark = (cached_result or {}).get("watermark")
+
+        # Set by the change watcher when quotes of a held player changed
+        marked_from = (cached_result or {}).get("stale_from")
+        current_span().cache = "hit" if cached_watermark == watermark and not marked_from else "miss"
+        timeline_df = None
+        if cached_result and cached_watermark:
+            df = pd.DataFrame(cached_result["timeline_data"])
             # Convert date strings back to date objects
             if not df.empty and 'Datum' in df.columns:
                 df['Datum'] = pd.to_datetime(df['Datum']).dt.date
-            return df
+            if cached_watermark == watermark and not marked_from:
+                return df
 
-        # Calculate if not in cache
-        timeline_df = calculate_market_value_timeline_optimized(db, user_name, spielzeit)
+            # Same players and transfers: only samples from the first affected day change
+            if cached_watermark == watermark:
+                stale_from = pd.to_datetime(marked_from).date()
+            else:
+                stale_from = _stale_from(cached_watermark, watermark)
+                if stale_from is not None and marked_from:
+                    stale_from = min(stale_from, pd.to_datetime(marked_from).date())
+            if stale_from is not None and not df.empty:
+                tail_df = sample_portfolio_market_value(db, user_name, spielzeit, "weekly", from_date=stale_from)
+                timeline_df = pd.concat([df[df['Datum'] < stale_from], tail_df], ignore_index=True)
+
+        # Calculate the whole timeline if there is no usable cache
+        if timeline_df is None:
+            timeline_df = calculate_market_value_timeline_optimized(db, user_name, spielzeit)
 
         # Save to cache
         if not timeline_df.empty:
-            # Convert dates to strings for BSON compatibility
-            cache_data = timeline_df.copy()
-            if 'Datum' in cache_data.columns:
-                cache_data['Datum'] = cache_data['Datum'].astype(str)
-
-            cache_doc = {
-                "cache_key": cache_key,
-                "user_name": user_name,
-                "spielzeit": spielzeit,
-                "timeline_data": cache_data.to_dict('records'),
-                "calculated_at": pd.Timestamp.now().isoformat()
-            }
-
             cache_collection.replace_one(
                 {"cache_key": cache_key},
-                cache_doc,
+                market_value_cache_doc(user_name, spielzeit, timeline_df, watermark),
                 upsert=True
             )
 
@@ -1222,89 +1175,117 @@ def get_or_calculate_market_value_timeline(db: MongoClient, user_name: str, spie
         return calculate_market_value_timeline_optimized(db, user_name, spielzeit)
 
 
+@timed()
 def calculate_market_value_timeline_optimized(db: MongoClient, user_name: str, spielzeit: str = "2024/2025") -> pd.DataFrame:
     """Optimized market value timeline calculation"""
+    return sample_portfolio_market_value(db, user_name, spielzeit, "weekly")
+
+
+# Supported sampling frequencies for sample_portfolio_market_value
+SAMPLE_FREQUENCIES = ("daily", "weekly", "matchday")
+
+
+def get_sample_dates(store, start_date, end_date, frequency: str = "weekly") -> pd.DatetimeIndex:
+    """Sample dates between two dates for a frequency.
+
+    ``weekly`` samples every Sunday (as ``pd.date_range(freq='W')``) and
+    ``matchday`` samples every day with at least one matchday in ``store``.
+    """
+    if frequency == "daily":
+        return pd.date_range(start=start_date, end=end_date, freq='D')
+    if frequency == "weekly":
+        return pd.date_range(start=start_date, end=end_date, freq='W')
+    if frequency == "matchday":
+        days = np.unique(store.point_days).astype('datetime64[D]')
+        dates = pd.DatetimeIndex(days)
+        return dates[(dates >= pd.Timestamp(start_date)) & (dates <= pd.Timestamp(end_date))]
+    raise ValueError(f"Unknown frequency {frequency!r}, expected one of {SAMPLE_FREQUENCIES}")
+
+
+@timed()
+def sample_portfolio_market_value(
+    db: MongoClient, user_name: str, spielzeit: str = "2024/2025", frequency: str = "weekly", from_date=None
+) -> pd.DataFrame:
+    """Market value of a member's current players, sampled at a given frequency.
+
+    Current players are fetched in one projected query; their prices come from
+    the season's PlayerStore and all sample dates are evaluated at once as a
+    players x samples as-of matrix. Samples where no player has a quote yet
+    are dropped.
+
+    Args:
+        db: MongoDB database connection.
+        user_name: Member name.
+        spielzeit: Season.
+        frequency: One of ``SAMPLE_FREQUENCIES``.
+        from_date: Only evaluate samples on or after this date.
+
+    Returns:
+        DataFrame with Datum, Marktwert_Gesamt and Anzahl_Spieler.
+    """
+    if frequency not in SAMPLE_FREQUENCIES:
+        raise ValueError(f"Unknown frequency {frequency!r}, expected one of {SAMPLE_FREQUENCIES}")
 
     date_from, date_to = get_date_range(spielzeit)
-    transfers_collection = db["Transfers"]
 
     # Get current players (bought but not sold)
-    current_players_transfers = list(transfers_collection.find({
+    current_players_transfers = db["Transfers"].find({
         "member_name": user_name,
         "buy.date": {"$gte": date_from, "$lte": date_to},
-        "sell": {"$exists": False}
-    }, {"_id": 0}))
+        # Unsold transfers store sell as null; match a missing field as well
+        "sell": None
+    }, {"_id": 0, "player_id": 1})
+    player_ids = [transfer['player_id'] for transfer in current_players_transfers]
 
-    if not current_players_transfers:
+    if not player_ids:
         return pd.DataFrame()
 
-    # Get player IDs
-    player_ids = [transfer['player_id'] for transfer in current_players_transfers]
+    return market_value_samples(get_player_store(db, spielzeit), player_ids, spielzeit, frequency, from_date)
 
-    # Bulk fetch price history for all current players
-    players_collection = db["Players"]
-    players_price_data = {}
 
-    for player_doc in players_collection.find(
-        {"id": {"$in": list(map(int, player_ids))}},
-        {"id": 1, "price_history": 1}
-    ):
-        player_id = str(player_doc["id"])
-        price_history = []
-        for entry in player_doc.get("price_history", []):
-            try:
-                if isinstance(entry['timestamp'], str):
-                    entry_date = pd.to_datetime(entry['timestamp']).date()
-                else:
-                    entry_date = pd.to_datetime(entry['timestamp']).date()
-
-                price_history.append({
-                    'date': entry_date,
-                    'price': entry['quotedPrice']
-                })
-            except (ValueError, TypeError, KeyError):
-                continue
-
-        price_history.sort(key=lambda x: x['date'])
-        players_price_data[player_id] = price_history
-
-    # Sample dates (weekly)
+def market_value_samples(
+    store: PlayerStore, player_ids: List[str], spielzeit: str, frequency: str = "weekly", from_date=None
+) -> pd.DataFrame:
+    """``sample_portfolio_market_value`` for given player ids, without database access."""
+    date_from, date_to = get_date_range(spielzeit)
     start_date = pd.to_datetime(date_from).date()
     end_date = min(pd.to_datetime(date_to).date(), pd.to_datetime('today').date())
-    date_range = pd.date_range(start=start_date, end=end_date, freq='W')
+    sample_dates = get_sample_dates(store, start_date, end_date, frequency)
+    if from_date is not None:
+        sample_dates = sample_dates[sample_dates >= pd.Timestamp(from_date)]
+    if sample_dates.empty:
+        return pd.DataFrame()
 
-    timeline_data = []
+    # Players x samples matrix of as-of prices; players without an earlier quote are skipped
+    sample_days = sample_dates.values.astype('datetime64[D]').astype(np.int64)
+    market_values, has_quote = store.price_asof_matrix(player_ids, sample_days)
+    valid_players = has_quote.sum(axis=0)
+    total_market_value = market_values.sum(axis=0)
+
+    keep = valid_players > 0
+    return pd.DataFrame({
+        'Datum': sample_dates.date[keep],
+        'Marktwert_Gesamt': total_market_value[keep],
+        'Anzahl_Spieler': valid_players[keep]
+    })
 
-    for sample_datetime in date_range:
-        sample_date = sample_datetime.date()
-        total_market_value = 0
-        valid_players = 0
-
-        for player_id in player_ids:
-            if player_id in players_price_data:
-                price_history = players_price_data[player_id]
-
-                # Find the most recent price before or on sample_date
-                valid_price = None
-                for price_entry in reversed(price_history):
-                    if price_entry['date'] <= sample_date:
-                        valid_price = price_entry['price']
-                        break
-
-                if valid_price is not None:
-                    total_market_value += valid_price
-                    valid_players += 1
-
-        if valid_players > 0:
-            timeline_data.append({
-                'Datum': sample_date,
-                'Marktwert_Gesamt': total_market_value,
-                'Anzahl_Spieler': valid_players
-            })
 
-    return pd.DataFrame(timeline_data)
+def mark_market_value_cache_stale(
+    db: MongoClient, spielzeit: str, from_date: str, player_ids: Optional[List[str]] = None
+) -> int:
+    """Mark cached market value timelines of a season stale from an ISO date on.
+
+    Only timelines whose watermark holds one of ``player_ids`` are marked (all
+    of the season if None). The next read recomputes the samples from the
+    earliest marked date; returns the number of timelines marked.
+    """
+    query = {"spielzeit": spielzeit}
+    if player_ids is not None:
+        query["watermark.player_ids"] = {"$in": [str(player_id) for player_id in player_ids]}
+    return db["MarketValueCache"].update_many(query, {"$min": {"stale_from": from_date}}).modified_count
 
 
+@timed()
 def clear_portfolio_cache(db: MongoClient, user_name: str | None = None, spielzeit: str | None = None):
     """Clear portfolio cache for specific user/season or all"""
     cache_collection = db["PortfolioCache"]
@@ -1322,6 +1303,7 @@ def clear_portfolio_cache(db: MongoClient, user_name: str | None = None, spielze
     return deleted_portfolio + deleted_market
 
 
+@timed()
 def get_cache_status(db: MongoClient) -> pd.DataFrame:
     """Get status of all cached portfolio calculations"""
 
@@ -1330,13 +1312,21 @@ def get_cache_status(db: MongoClient) -> pd.DataFrame:
 
     cache_data = []
 
-    # Portfolio cache
-    for doc in cache_collection.find({}, {"cache_key": 1, "user_name": 1, "spielzeit": 1, "calculated_at": 1}):
+    # Portfolio cache, one row per member and season over its month buckets
+    for doc in cache_collection.aggregate([
+        {"$group": {
+            "_id": "$cache_key",
+            "user_name": {"$first": "$user_name"},
+            "spielzeit": {"$first": "$spielzeit"},
+            "calculated_at": {"$max": "$calculated_at"},
+        }},
+        {"$sort": {"_id": 1}},
+    ]):
         cache_data.append({
             "Type": "Portfolio",
             "User": doc.get("user_name"),
             "Season": doc.get("spielzeit"),
-            "Cache Key": doc.get("cache_key"),
+            "Cache Key": doc.get("_id"),
             "Calculated At": doc.get("calculated_at")
         })
 
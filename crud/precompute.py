@@ -0,0 +1,165 @@
+"""Precompute portfolio and market value caches for every member of a season.
+
+Meant to run nightly, so every interactive portfolio view is a cache hit:
+
+    python -m crud.precompute --season 2025/2026 --workers 4
+
+The parent process reads the season's transfers and the PlayerStore once. Each
+worker process receives the store when it starts and computes timelines from
+it without touching MongoDB. The results are written back with one
+``bulk_write`` per cache collection. A run over all members also rebuilds the
+season's ``PlayerSeasonStats``, so corrected matchday points are picked up at
+least nightly.
+"""
+
+import argparse
+import logging
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from pymongo import ReplaceOne
+from pymongo.mongo_client import MongoClient
+
+from .base import get_date_range
+from .metrics import span, timed
+from .player_stats import STATS_COLLECTION, update_player_season_stats
+from .player_store import PlayerStore, get_player_store
+from .portfolio import (
+    get_market_value_watermark,
+    market_value_cache_doc,
+    market_value_samples,
+    portfolio_cache_requests,
+    portfolio_timeline_with_checkpoint,
+)
+from .versions import bump_data_versions, get_data_version
+
+# Set in each worker by _init_worker
+_worker_store: Optional[PlayerStore] = None
+
+
+def _init_worker(store: PlayerStore) -> None:
+    global _worker_store
+    _worker_store = store
+
+
+def _compute_member(
+    member: str, transfers: List[dict], spielzeit: str, transfers_version: int
+) -> Tuple[str, pd.DataFrame, Optional[dict], Optional[pd.DataFrame]]:
+    """(member, portfolio timeline, checkpoint, market value timeline) of one member."""
+    timeline_df, checkpoint = portfolio_timeline_with_checkpoint(
+        transfers, _worker_store, spielzeit, transfers_version
+    )
+    # Same selection as the "sell": None query of sample_portfolio_market_value
+    current_players = [t['player_id'] for t in transfers if t.get('sell') is None]
+    market_df = market_value_samples(_worker_store, current_players, spielzeit, "weekly") if current_players else None
+    return member, timeline_df, checkpoint, market_df
+
+
+def list_members(db: MongoClient, spielzeit: str) -> List[str]:
+    """Members with at least one transfer in the season."""
+    date_from, date_to = get_date_range(spielzeit)
+    return sorted(db["Transfers"].distinct("member_name", {"buy.date": {"$gte": date_from, "$lte": date_to}}))
+
+
+@timed()
+def precompute_season(
+    db: MongoClient, spielzeit: str, workers: Optional[int] = None, members: Optional[List[str]] = None
+) -> Dict[str, int]:
+    """Compute and cache the portfolio and market value timelines of all members.
+
+    Args:
+        db: MongoDB database connection.
+        spielzeit: Season.
+        workers: Worker processes; 1 computes in this process.
+        members: Only these members (default: everyone with a transfer, and
+            the season's player statistics are rebuilt as well).
+
+    Returns:
+        Counts of members, portfolio cache days, market value timelines and
+        player statistics written.
+    """
+    date_from, date_to = get_date_range(spielzeit)
+    player_stats = 0
+    if not members:
+        with span("precompute.player_stats"):
+            update_player_season_stats(db, spielzeit, full=True)
+            player_stats = db[STATS_COLLECTION].count_documents({"spielzeit": spielzeit})
+            # Only now, so app processes drop statistics cached under the old version
+            bump_data_versions(db, "Players", [spielzeit])
+    members = members or list_members(db, spielzeit)
+    if not members:
+        return {"members": 0, "portfolio_days": 0, "market_value_timelines": 0, "player_stats": player_stats}
+
+    # Watermarks and versions are read before the data, so a concurrent change leaves them stale, not wrong
+    watermarks = {member: get_market_value_watermark(db, member, spielzeit) for member in members}
+    transfers_version = get_data_version(db, "Transfers", spielzeit)
+
+    transfers_by_member = defaultdict(list)
+    for transfer in db["Transfers"].find({
+        "member_name": {"$in": members},
+        "buy.date": {"$gte": date_from, "$lte": date_to},
+    }):
+        transfers_by_member[transfer["member_name"]].append(transfer)
+    store = get_player_store(db, spielzeit)
+
+    workers = workers or os.cpu_count() or 1
+    jobs = [
+        (member, transfers_by_member[member], spielzeit, transfers_version)
+        for member in members if transfers_by_member[member]
+    ]
+    with span("precompute.compute") as s:
+        if workers == 1 or len(jobs) <= 1:
+            _init_worker(store)
+            results = [_compute_member(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(store,)) as pool:
+                results = list(pool.map(_compute_member, *zip(*jobs)))
+        s.rows = len(results)
+
+    portfolio_requests, market_requests = [], []
+    portfolio_days = 0
+    for member, timeline_df, checkpoint, market_df in results:
+        if not timeline_df.empty:
+            requests, written = portfolio_cache_requests(
+                f"{member}_{spielzeit}", member, spielzeit, timeline_df, checkpoint=checkpoint
+            )
+            portfolio_requests.extend(requests)
+            portfolio_days += written
+        if market_df is not None and not market_df.empty:
+            doc = market_value_cache_doc(member, spielzeit, market_df, watermarks[member])
+            market_requests.append(ReplaceOne({"cache_key": doc["cache_key"]}, doc, upsert=True))
+
+    with span("precompute.write"):
+        if portfolio_requests:
+            db["PortfolioCache"].bulk_write(portfolio_requests, ordered=False)
+        if market_requests:
+            db["MarketValueCache"].bulk_write(market_requests, ordered=False)
+
+    logging.info("Precomputed %d members of %s", len(results), spielzeit)
+    return {
+        "members": len(results),
+        "portfolio_days": portfolio_days,
+        "market_value_timelines": len(market_requests),
+        "player_stats": player_stats,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--spielzeit", "--season", default="2025/2026")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--members", nargs="*", help="only these members")
+    args = parser.parse_args(argv)
+
+    from database import get_db
+
+    counts = precompute_season(get_db(), args.spielzeit, workers=args.workers, members=args.members)
+    print(", ".join(f"{name}: {count}" for name, count in counts.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
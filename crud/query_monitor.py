@@ -0,0 +1,201 @@
+"""MongoDB command monitoring with per-rerun attribution and N+1 detection.
+
+``QueryMonitor`` is a pymongo ``CommandListener`` (installed by
+``database.get_client``). Every command is recorded with its latency,
+collection, operation and documents returned, and attributed to the rerun
+opened with ``start_rerun``. Reply sizes cost a full re-encode of every reply,
+so they are only measured for reruns started with ``measure_reply_bytes``
+(the app does this when the Performance page is enabled with ``?perf=1``).
+pymongo publishes command events in the thread that runs the command, so a
+context variable carries the rerun; worker threads must run in a copied
+context (``contextvars.copy_context``).
+
+A rerun is flagged when it issues more than ``N_PLUS_ONE_THRESHOLD``
+``find_one`` calls against one collection (the signature of a per-row lookup
+in a loop), or more than ``QUERY_BUDGET`` commands in total.
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import bson
+from pymongo import monitoring
+
+N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_N_PLUS_ONE_THRESHOLD", "20"))
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "50"))
+# Finished rerun summaries kept for the Performance page
+RECENT_RERUNS = 50
+
+_current_rerun: contextvars.ContextVar[Optional["RerunQueries"]] = contextvars.ContextVar(
+    "current_rerun", default=None
+)
+
+
+class RerunQueries:
+    """All commands issued during one rerun, aggregated per (operation, collection)."""
+
+    def __init__(self, label: str, measure_reply_bytes: bool = False):
+        self.label = label
+        self.measure_reply_bytes = measure_reply_bytes
+        self.started_at = time.time()
+        self.operations: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, operation: str, collection: str, duration_ms: float, documents: int, reply_bytes: int) -> None:
+        with self._lock:
+            stats = self.operations.setdefault(
+                (operation, collection), {"count": 0, "total_ms": 0.0, "documents": 0, "reply_bytes": 0}
+            )
+            stats["count"] += 1
+            stats["total_ms"] += duration_ms
+            stats["documents"] += documents
+            stats["reply_bytes"] += reply_bytes
+
+    def summary(self) -> dict:
+        with self._lock:
+            operations = [
+                {"operation": operation, "collection": collection, **stats}
+                for (operation, collection), stats in self.operations.items()
+            ]
+        commands = sum(op["count"] for op in operations)
+        n_plus_one = [
+            op["collection"] for op in operations
+            if op["operation"] == "find_one" and op["count"] > N_PLUS_ONE_THRESHOLD
+        ]
+        return {
+            "label": self.label,
+            "started_at": self.started_at,
+            "commands": commands,
+            "total_ms": round(sum(op["total_ms"] for op in operations), 3),
+            "documents": sum(op["documents"] for op in operations),
+            # None when reply sizes were not measured for this rerun
+            "reply_bytes": sum(op["reply_bytes"] for op in operations) if self.measure_reply_bytes else None,
+            "budget": QUERY_BUDGET,
+            "over_budget": commands > QUERY_BUDGET,
+            "n_plus_one": n_plus_one,
+            "operations": sorted(operations, key=lambda op: -op["total_ms"]),
+        }
+
+
+def _operation(command_name: str, command: dict) -> str:
+    # Collection.find_one sends a find with limit 1 in a single batch
+    if command_name == "find" and command.get("limit") == 1 and command.get("singleBatch"):
+        return "find_one"
+    return command_name
+
+
+def _collection(command_name: str, command: dict) -> str:
+    if command_name == "getMore":
+        return str(command.get("collection", ""))
+    value = command.get(command_name)
+    return value if isinstance(value, str) else ""
+
+
+def _documents(reply: dict) -> int:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+    return int(reply.get("n", 0) or 0)
+
+
+class QueryMonitor(monitoring.CommandListener):
+    """Command listener feeding the current rerun's ``RerunQueries``."""
+
+    # Commands the driver issues on its own, not on behalf of app code
+    IGNORED_COMMANDS = {"hello", "isMaster", "ping", "saslStart", "saslContinue", "endSessions", "killCursors"}
+
+    def __init__(self, measure_reply_bytes: bool = True):
+        self.measure_reply_bytes = measure_reply_bytes
+        self._pending: Dict[Tuple, Tuple[str, str, Optional[RerunQueries]]] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.command_name in self.IGNORED_COMMANDS:
+            return
+        key = (event.connection_id, event.request_id)
+        entry = (
+            _operation(event.command_name, event.command),
+            _collection(event.command_name, event.command),
+            _current_rerun.get(),
+        )
+        with self._lock:
+            self._pending[key] = entry
+
+    def _finish(self, event, reply: Optional[dict]) -> None:
+        with self._lock:
+            entry = self._pending.pop((event.connection_id, event.request_id), None)
+        if entry is None:
+            return
+        operation, collection, rerun = entry
+        if rerun is None:
+            return
+        reply_bytes = 0
+        if reply is not None and self.measure_reply_bytes and rerun.measure_reply_bytes:
+            reply_bytes = len(bson.encode(reply))
+        rerun.add(
+            operation,
+            collection,
+            event.duration_micros / 1000,
+            _documents(reply) if reply is not None else 0,
+            reply_bytes,
+        )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, event.reply)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, None)
+
+
+_monitor = QueryMonitor()
+_recent: Deque[dict] = deque(maxlen=RECENT_RERUNS)
+_recent_lock = threading.Lock()
+
+
+def get_query_monitor() -> QueryMonitor:
+    """The process-wide listener to pass to ``MongoClient(event_listeners=...)``."""
+    return _monitor
+
+
+def start_rerun(label: str, measure_reply_bytes: bool = False) -> RerunQueries:
+    """Attribute subsequent commands in this context to a new rerun.
+
+    ``measure_reply_bytes`` re-encodes every reply to record its size; leave
+    it off outside profiling sessions.
+    """
+    finish_rerun()
+    rerun = RerunQueries(label, measure_reply_bytes)
+    _current_rerun.set(rerun)
+    return rerun
+
+
+def finish_rerun() -> Optional[dict]:
+    """Close the current rerun, log budget/N+1 violations and return its summary."""
+    rerun = _current_rerun.get()
+    if rerun is None:
+        return None
+    _current_rerun.set(None)
+    summary = rerun.summary()
+    with _recent_lock:
+        _recent.append(summary)
+    if summary["n_plus_one"]:
+        logging.warning(
+            "Possible N+1 in %s: more than %d find_one calls on %s",
+            rerun.label, N_PLUS_ONE_THRESHOLD, ", ".join(summary["n_plus_one"]),
+        )
+    if summary["over_budget"]:
+        logging.warning(
+            "%s issued %d MongoDB commands (budget %d)", rerun.label, summary["commands"], QUERY_BUDGET
+        )
+    return summary
+
+
+def recent_reruns() -> List[dict]:
+    """Summaries of the most recent reruns, newest first."""
+    with _recent_lock:
+        return list(reversed(_recent))
@@ -0,0 +1,216 @@
+"""Columnar decoding of large aggregation results.
+
+Large ``$unwind`` results are read as ``RawBSONDocument`` batches instead of
+dicts. The requested fields are read straight from each document's raw bytes
+into per-column buffers, so no document is ever inflated into a dict. Each
+full batch is converted to typed Arrow arrays before the next one is read, so
+the extra memory used while decoding is bounded by the batch size instead of
+the result size.
+"""
+
+import struct
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import bson
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+import pandas as pd
+import pyarrow as pa
+
+RAW_BATCH_SIZE = 10_000
+
+_RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+
+_INT32 = struct.Struct("<i")
+_INT64 = struct.Struct("<q")
+_DOUBLE = struct.Struct("<d")
+
+# BSON element types (bsonspec.org)
+_DOUBLE_TYPE, _STRING_TYPE, _BINARY_TYPE, _REGEX_TYPE, _DBPOINTER_TYPE = 0x01, 0x02, 0x05, 0x0B, 0x0C
+_BOOL_TYPE, _NULL_TYPE, _UNDEFINED_TYPE, _INT32_TYPE, _INT64_TYPE = 0x08, 0x0A, 0x06, 0x10, 0x12
+# Values of fixed width
+_FIXED_SIZES = {0x01: 8, 0x06: 0, 0x07: 12, 0x08: 1, 0x09: 8, 0x0A: 0, 0x10: 4, 0x11: 8, 0x12: 8,
+                0x13: 16, 0x7F: 0, 0xFF: 0}
+# Values prefixed by an int32 byte count that excludes the prefix (strings, code, symbol)
+_STRING_TYPES = frozenset((0x02, 0x0D, 0x0E))
+# Values prefixed by an int32 byte count that includes the prefix (document, array, code with scope)
+_DOCUMENT_TYPES = frozenset((0x03, 0x04, 0x0F))
+
+
+def _value_end(data: bytes, element_type: int, start: int) -> int:
+    """Offset just past the value of an element whose value starts at ``start``."""
+    size = _FIXED_SIZES.get(element_type)
+    if size is not None:
+        return start + size
+    if element_type in _STRING_TYPES:
+        return start + 4 + _INT32.unpack_from(data, start)[0]
+    if element_type in _DOCUMENT_TYPES:
+        return start + _INT32.unpack_from(data, start)[0]
+    if element_type == _BINARY_TYPE:
+        return start + 5 + _INT32.unpack_from(data, start)[0]
+    if element_type == _REGEX_TYPE:
+        return data.index(b"\0", data.index(b"\0", start) + 1) + 1
+    if element_type == _DBPOINTER_TYPE:
+        return start + 16 + _INT32.unpack_from(data, start)[0]
+    raise bson.InvalidBSON(f"unknown BSON type {element_type:#x}")
+
+
+def _decode_value(data: bytes, element_type: int, element_start: int, start: int, end: int):
+    """Python value of one element; uncommon types are decoded by bson as a one-field document."""
+    if element_type == _DOUBLE_TYPE:
+        return _DOUBLE.unpack_from(data, start)[0]
+    if element_type == _STRING_TYPE:
+        return data[start + 4:end - 1].decode("utf-8")
+    if element_type == _INT32_TYPE:
+        return _INT32.unpack_from(data, start)[0]
+    if element_type == _INT64_TYPE:
+        return _INT64.unpack_from(data, start)[0]
+    if element_type == _BOOL_TYPE:
+        return data[start] != 0
+    if element_type in (_NULL_TYPE, _UNDEFINED_TYPE):
+        return None
+    element = data[element_start:end]
+    document = bson.decode(_INT32.pack(len(element) + 5) + element + b"\0")
+    return next(iter(document.values()))
+
+
+def read_fields(raw: bytes, fields: Mapping[bytes, list], row: int) -> None:
+    """Decode the top-level ``fields`` of a raw BSON document into ``column[row]``.
+
+    ``fields`` maps UTF-8 field names to column lists. Other elements are
+    skipped by their length without being decoded, and the scan stops once
+    every field was seen. Missing fields leave their row untouched.
+    """
+    pos, end, remaining = 4, len(raw) - 1, len(fields)
+    find, unpack_int32 = raw.index, _INT32.unpack_from
+    while pos < end and remaining:
+        element_type = raw[pos]
+        name_end = find(b"\0", pos + 1)
+        start = name_end + 1
+        # Strings are the common projected type; size and decode them inline
+        if element_type == _STRING_TYPE:
+            value_end = start + 4 + unpack_int32(raw, start)[0]
+        else:
+            value_end = _value_end(raw, element_type, start)
+        column = fields.get(raw[pos + 1:name_end])
+        if column is not None:
+            if element_type == _STRING_TYPE:
+                column[row] = raw[start + 4:value_end - 1].decode("utf-8")
+            else:
+                column[row] = _decode_value(raw, element_type, pos, start, value_end)
+            remaining -= 1
+        pos = value_end
+
+
+def _accepts(arrow_type: pa.DataType, value) -> bool:
+    if isinstance(value, bool):
+        return arrow_type == pa.bool_()
+    if isinstance(value, int):
+        return pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type)
+    if isinstance(value, float):
+        return pa.types.is_floating(arrow_type) or (pa.types.is_integer(arrow_type) and value.is_integer())
+    if isinstance(value, str):
+        return pa.types.is_string(arrow_type)
+    return False
+
+
+def _typed_array(values: list, arrow_type: pa.DataType) -> pa.Array:
+    """Arrow array of one batch; values of another BSON type become null, as with a typed schema."""
+    try:
+        return pa.array(values, type=arrow_type)
+    except (pa.ArrowException, TypeError, ValueError, OverflowError):
+        values = [value if value is None or _accepts(arrow_type, value) else None for value in values]
+        try:
+            return pa.array(values, type=arrow_type)
+        except (pa.ArrowException, OverflowError):
+            # e.g. integers beyond int64
+            return pa.array([_safe(arrow_type, value) for value in values], type=arrow_type)
+
+
+def _safe(arrow_type: pa.DataType, value):
+    try:
+        pa.scalar(value, type=arrow_type)
+    except (pa.ArrowException, OverflowError, TypeError, ValueError):
+        return None
+    return value
+
+
+def columns_from_documents(
+    documents: Iterable[Mapping],
+    columns: List[str],
+    batch_size: int = RAW_BATCH_SIZE,
+    schema: Optional[Dict[str, pa.DataType]] = None,
+) -> pd.DataFrame:
+    """Build a DataFrame from documents without creating one dict per row.
+
+    ``RawBSONDocument`` rows are never inflated: only the requested fields are
+    decoded from their bytes (see ``read_fields``). Other mappings are read
+    with ``get``. Missing fields become null. Columns with an Arrow type in
+    ``schema`` become typed Arrow arrays per batch (int64 with nulls turns
+    into float64 in pandas); the others are inferred as the DataFrame
+    constructor would infer them for the whole result.
+    """
+    schema = schema or {}
+    chunks: List[list] = [[] for _ in columns]
+    buffers: List[list] = []
+    fields: Dict[bytes, list] = {}
+    rows = batch_rows = 0
+
+    def reset():
+        buffers[:] = [[None] * batch_size for _ in columns]
+        fields.clear()
+        fields.update((column.encode("utf-8"), buffer) for column, buffer in zip(columns, buffers))
+
+    def flush():
+        for column, chunk, buffer in zip(columns, chunks, buffers):
+            values = buffer[:batch_rows]
+            arrow_type = schema.get(column)
+            chunk.append(_typed_array(values, arrow_type) if arrow_type is not None else values)
+        reset()
+
+    reset()
+    for document in documents:
+        if isinstance(document, RawBSONDocument):
+            raw = document.raw
+            read_fields(raw if isinstance(raw, bytes) else bytes(raw), fields, batch_rows)
+        else:
+            for column, buffer in zip(columns, buffers):
+                buffer[batch_rows] = document.get(column)
+        rows += 1
+        batch_rows += 1
+        if batch_rows == batch_size:
+            flush()
+            batch_rows = 0
+    if batch_rows:
+        flush()
+
+    if not rows:
+        return pd.DataFrame()
+    data = {}
+    for column, parts in zip(columns, chunks):
+        if schema.get(column) is not None:
+            data[column] = pa.chunked_array(parts, type=schema[column]).to_pandas()
+        else:
+            data[column] = pd.concat([pd.Series(part) for part in parts], ignore_index=True)
+    return pd.DataFrame(data)
+
+
+def aggregate_columns(
+    collection,
+    pipeline: list,
+    columns: List[str],
+    schema: Optional[Dict[str, pa.DataType]] = None,
+    batch_size: int = RAW_BATCH_SIZE,
+) -> pd.DataFrame:
+    """Run an aggregation and return its result columns as a DataFrame.
+
+    Args:
+        collection: Collection to aggregate.
+        pipeline: Pipeline whose output documents are flat.
+        columns: Output fields to keep, in order.
+        schema: Arrow types per column (typed Arrow conversion per batch).
+        batch_size: Documents per cursor batch and per decoded chunk.
+    """
+    raw_collection = collection.with_options(codec_options=_RAW_CODEC_OPTIONS)
+    cursor = raw_collection.aggregate(pipeline, batchSize=batch_size)
+    return columns_from_documents(cursor, columns, batch_size, schema)
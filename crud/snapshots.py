@@ -0,0 +1,132 @@
+"""On-disk Arrow IPC snapshots of loader results.
+
+Each snapshot is one DataFrame stored as an Arrow IPC file named after the
+loader, season and data version. Reading memory-maps the file, so a cold start
+after a restart or deploy costs a file open instead of a MongoDB aggregation.
+Closed seasons no longer change and are stored under the ``final`` tag, so
+they are read from disk regardless of the current data version.
+
+File names also carry ``SNAPSHOT_SCHEMA_VERSION``; bump it whenever a loader's
+output columns or dtypes change, so a deploy never serves files written by
+older code. Callers that pass ``columns`` additionally have snapshots with
+other columns ignored and rewritten.
+
+The directory is ``$COMUNIO_SNAPSHOT_DIR`` (default ``.snapshots``).
+"""
+
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Callable, Hashable, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+
+from .base import is_season_closed
+from .metrics import span
+
+SNAPSHOT_DIR = Path(os.getenv("COMUNIO_SNAPSHOT_DIR", ".snapshots"))
+
+FINAL_TAG = "final"
+
+# Part of every file name; bump when the frames a loader returns change shape
+SNAPSHOT_SCHEMA_VERSION = 3
+
+
+def snapshot_tag(spielzeit: str, version: Hashable) -> str:
+    """File-name safe tag for a data version (``final`` for closed seasons)."""
+    if is_season_closed(spielzeit):
+        return FINAL_TAG
+    parts = version if isinstance(version, tuple) else (version,)
+    tag = "-".join(str(part) for part in parts if part is not None) or "0"
+    return re.sub(r"[^0-9A-Za-z.-]+", "_", tag)
+
+
+def snapshot_path(name: str, spielzeit: str, version: Hashable) -> Path:
+    season = spielzeit.replace("/", "-")
+    tag = snapshot_tag(spielzeit, version)
+    return SNAPSHOT_DIR / f"{name}__{season}__{tag}__s{SNAPSHOT_SCHEMA_VERSION}.arrow"
+
+
+def read_snapshot(
+    name: str, spielzeit: str, version: Hashable, columns: Optional[Sequence[str]] = None
+) -> Optional[pd.DataFrame]:
+    """Return the snapshot for this season and version, or None if there is none.
+
+    With ``columns`` a snapshot whose columns differ is treated as missing.
+    """
+    path = snapshot_path(name, spielzeit, version)
+    if not path.exists():
+        return None
+    try:
+        with pa.memory_map(str(path), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+    except (OSError, pa.ArrowException) as e:
+        logging.warning("Ignoring unreadable snapshot %s: %s", path, e)
+        return None
+    if columns is not None and table.column_names != list(columns):
+        logging.warning("Ignoring snapshot %s with outdated columns %s", path.name, table.column_names)
+        return None
+    return table.to_pandas()
+
+
+def write_snapshot(df: pd.DataFrame, name: str, spielzeit: str, version: Hashable) -> Optional[Path]:
+    """Write a snapshot and remove older versions of the same loader and season.
+
+    The file is written under a temporary name and renamed, so concurrent
+    readers never see a partial file. Returns None if the frame cannot be
+    converted to Arrow (e.g. mixed-type object columns).
+    """
+    path = snapshot_path(name, spielzeit, version)
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except pa.ArrowException as e:
+        logging.warning("Not writing snapshot %s: %s", path.name, e)
+        return None
+
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp_path), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+    for old_path in SNAPSHOT_DIR.glob(f"{name}__{spielzeit.replace('/', '-')}__*.arrow"):
+        if old_path != path:
+            old_path.unlink(missing_ok=True)
+    return path
+
+
+def load_with_snapshot(
+    name: str,
+    spielzeit: str,
+    version: Hashable,
+    loader: Callable[[], pd.DataFrame],
+    columns: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """Read the snapshot if it matches, otherwise run ``loader`` and snapshot its result.
+
+    ``columns`` are the loader's output columns; snapshots with other columns are rebuilt.
+    """
+    with span(f"snapshot.{name}") as s:
+        df = read_snapshot(name, spielzeit, version, columns)
+        s.cache = "miss" if df is None else "hit"
+        if df is None:
+            df = loader()
+            try:
+                write_snapshot(df, name, spielzeit, version)
+            except OSError as e:
+                logging.warning("Could not write snapshot %s: %s", name, e)
+        s.rows = len(df)
+        return df
+
+
+def clear_snapshots(spielzeit: Optional[str] = None) -> int:
+    """Delete snapshots of one season, or all of them. Returns the number removed."""
+    pattern = f"*__{spielzeit.replace('/', '-')}__*.arrow" if spielzeit else "*.arrow"
+    removed = 0
+    for path in SNAPSHOT_DIR.glob(pattern):
+        path.unlink(missing_ok=True)
+        removed += 1
+    return removed
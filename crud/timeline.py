@@ -0,0 +1,200 @@
+"""Event-sourced daily portfolio timeline builder.
+
+Each transfer is one holding that is active from its buy day until (but not
+including) its sell day. Cash, invested amount and player count are cumulative
+sums of signed per-day deltas, and current market value is the as-of price of
+every holding masked by the days it was held. No per-day Python loop is needed.
+"""
+
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .asof import days_to_dates, to_day
+from .base import STARTING_BUDGET
+from .metrics import timed
+from .player_store import PlayerStore
+
+TIMELINE_COLUMNS = [
+    'Datum',
+    'Portfolio_Wert_Kaufpreis',
+    'Portfolio_Wert_Aktuell',
+    'Verfuegbares_Cash',
+    'Gesamtwert',
+    'Anzahl_Spieler',
+    'Event_Type',
+    'Event_Player',
+    'Event_Price',
+]
+
+
+def _start_row(start_date, starting_budget: int) -> dict:
+    return {
+        'Datum': start_date,
+        'Portfolio_Wert_Kaufpreis': 0,
+        'Portfolio_Wert_Aktuell': 0,
+        'Verfuegbares_Cash': starting_budget,
+        'Gesamtwert': starting_budget,
+        'Anzahl_Spieler': 0,
+        'Event_Type': 'start',
+        'Event_Player': 'Season Start',
+        'Event_Price': 0,
+    }
+
+
+@timed()
+def build_portfolio_timeline(
+    transfers: List[dict],
+    store: PlayerStore,
+    start_date,
+    end_date,
+    starting_budget: int = STARTING_BUDGET,
+    season_start_row: bool = True,
+    carry_holdings: bool = False,
+) -> pd.DataFrame:
+    """Build the daily portfolio timeline of one member from raw transfer documents.
+
+    Args:
+        transfers: Transfer documents of the member (``buy``/``sell`` sub-documents).
+        store: PlayerStore used for as-of market values.
+        start_date: First day of the timeline (season start).
+        end_date: Last day of the timeline, inclusive.
+        starting_budget: Cash at ``start_date``.
+        season_start_row: Prepend the synthetic season start row and mark the
+            first day as ``start`` (as ``calculate_portfolio_timeline_optimized``
+            always did).
+        carry_holdings: Count transfers bought before ``start_date`` and not
+            sold by then as held from the first day. ``starting_budget`` is
+            then the cash after their purchase (see ``portfolio_state``).
+
+    Returns:
+        DataFrame with ``TIMELINE_COLUMNS``, one row per day.
+    """
+    first_day = to_day(start_date)
+    n_days = max(to_day(end_date) - first_day + 1, 0)
+    rows = [_start_row(pd.to_datetime(start_date).date(), starting_budget)] if season_start_row else []
+    if n_days == 0:
+        return pd.DataFrame(rows, columns=TIMELINE_COLUMNS)
+
+    # Holdings: one per transfer, active on days [buy_idx, sell_idx)
+    n = len(transfers)
+    player_ids = [str(t['player_id']) for t in transfers]
+    player_names = np.asarray([t['player_name'] for t in transfers], dtype=object)
+    buy_idx = np.fromiter((to_day(t['buy']['date']) for t in transfers), dtype=np.int64, count=n) - first_day
+    buy_price = np.fromiter((t['buy']['price'] for t in transfers), dtype=np.int64, count=n)
+    has_sell = np.fromiter((bool(t.get('sell')) for t in transfers), dtype=bool, count=n)
+    sell_idx = np.fromiter(
+        (to_day(t['sell']['date']) - first_day if t.get('sell') else n_days for t in transfers),
+        dtype=np.int64, count=n,
+    )
+    sell_price = np.fromiter(
+        (t['sell']['price'] if t.get('sell') else 0 for t in transfers), dtype=np.int64, count=n
+    )
+    # A sell dated before its buy never applied to a held player, so it is ignored
+    has_sell &= sell_idx >= buy_idx
+    sell_idx = np.where(has_sell, sell_idx, n_days)
+
+    buy_in_range = (buy_idx >= 0) & (buy_idx < n_days)
+    carried = (buy_idx < 0) & (sell_idx >= 0) if carry_holdings else np.zeros(n, dtype=bool)
+    active = buy_in_range | carried
+    sell_in_range = has_sell & active & (sell_idx < n_days)
+
+    # Signed per-day deltas, accumulated with cumsum
+    cash_delta = np.zeros(n_days, dtype=np.int64)
+    invested_delta = np.zeros(n_days, dtype=np.int64)
+    count_delta = np.zeros(n_days, dtype=np.int64)
+    np.add.at(cash_delta, buy_idx[buy_in_range], -buy_price[buy_in_range])
+    np.add.at(cash_delta, sell_idx[sell_in_range], sell_price[sell_in_range])
+    np.add.at(invested_delta, buy_idx[buy_in_range], buy_price[buy_in_range])
+    np.add.at(invested_delta, sell_idx[sell_in_range], -buy_price[sell_in_range])
+    np.add.at(count_delta, buy_idx[buy_in_range], 1)
+    np.add.at(count_delta, sell_idx[sell_in_range], -1)
+
+    cash = starting_budget + np.cumsum(cash_delta)
+    invested = buy_price[carried].sum() + np.cumsum(invested_delta)
+    player_count = np.count_nonzero(carried) + np.cumsum(count_delta)
+
+    # Holdings x days mask of as-of market values (buy price where no quote exists)
+    days = np.arange(n_days, dtype=np.int64)
+    held = (days[None, :] >= buy_idx[:, None]) & (days[None, :] < sell_idx[:, None])
+    held &= active[:, None]
+    market_values, _ = store.price_asof_matrix(player_ids, days + first_day, fallback=buy_price)
+    current_value = np.where(held, market_values, 0).sum(axis=0)
+
+    # Last event per day, in the order the events would have been replayed
+    event_day = np.concatenate([buy_idx, sell_idx])
+    event_valid = np.concatenate([buy_in_range, sell_in_range])
+    event_order = np.concatenate([np.arange(n) * 2, np.arange(n) * 2 + 1])
+    event_type = np.concatenate([np.full(n, 'buy', dtype=object), np.full(n, 'sell', dtype=object)])
+    event_player = np.concatenate([player_names, player_names])
+    event_price = np.concatenate([buy_price, sell_price])
+
+    valid = np.flatnonzero(event_valid)
+    valid = valid[np.lexsort((event_order[valid], event_day[valid]))]
+    sorted_days = event_day[valid]
+    last_of_day = np.append(sorted_days[1:] != sorted_days[:-1], True) if len(valid) else np.zeros(0, dtype=bool)
+    day_event = np.full(n_days, -1, dtype=np.int64)
+    day_event[sorted_days[last_of_day]] = valid[last_of_day]
+
+    has_event = day_event >= 0
+    day_event_type = np.full(n_days, 'daily_update', dtype=object)
+    day_event_player = np.full(n_days, 'Market Update', dtype=object)
+    day_event_price = np.zeros(n_days, dtype=np.int64)
+    day_event_type[has_event] = event_type[day_event[has_event]]
+    day_event_player[has_event] = event_player[day_event[has_event]]
+    day_event_price[has_event] = event_price[day_event[has_event]]
+    if season_start_row:
+        day_event_type[0], day_event_player[0], day_event_price[0] = 'start', 'Season Start', 0
+
+    daily = pd.DataFrame({
+        'Datum': days_to_dates(days + first_day),
+        'Portfolio_Wert_Kaufpreis': invested,
+        'Portfolio_Wert_Aktuell': current_value,
+        'Verfuegbares_Cash': cash,
+        'Gesamtwert': cash + current_value,
+        'Anzahl_Spieler': player_count,
+        'Event_Type': day_event_type,
+        'Event_Player': day_event_player,
+        'Event_Price': day_event_price,
+    })
+    if not rows:
+        return daily
+    return pd.concat([pd.DataFrame(rows, columns=TIMELINE_COLUMNS), daily], ignore_index=True)
+
+
+def portfolio_state(transfers: List[dict], timeline_df: pd.DataFrame, store: PlayerStore, as_of) -> Optional[dict]:
+    """Cash and open holdings at the end of day ``as_of`` of a built timeline.
+
+    Holdings are the transfers bought on or before ``as_of`` and not sold by
+    then, reduced to the fields ``build_portfolio_timeline`` reads plus their
+    ``_id`` and the as-of ``market_value``. Passing them back with
+    ``carry_holdings=True`` and ``starting_budget=cash`` continues the timeline
+    on the next day without replaying earlier events. Returns None if the
+    timeline has no row for ``as_of``.
+    """
+    as_of_date = pd.to_datetime(as_of).date()
+    rows = timeline_df[timeline_df['Datum'] == as_of_date]
+    if rows.empty:
+        return None
+    day = to_day(as_of_date)
+    holdings = []
+    for t in transfers:
+        buy_day = to_day(t['buy']['date'])
+        sell = t.get('sell')
+        # Same rule as the builder: a sell dated before its buy never applied
+        if buy_day > day or (sell and buy_day <= to_day(sell['date']) <= day):
+            continue
+        holdings.append({
+            '_id': t.get('_id'),
+            'player_id': str(t['player_id']),
+            'player_name': t['player_name'],
+            'buy': {'date': t['buy']['date'], 'price': int(t['buy']['price'])},
+            'sell': None,
+            'market_value': store.price_asof(t['player_id'], day),
+        })
+    return {
+        'as_of': as_of_date.isoformat(),
+        'cash': int(rows['Verfuegbares_Cash'].iloc[-1]),
+        'holdings': holdings,
+    }
@@ -0,0 +1,124 @@
+"""Vectorized timestamp normalization for price and point histories.
+
+History timestamps are ISO strings with mixed UTC offsets (or BSON datetimes).
+They are normalized once into int32 days since epoch, using the calendar date
+as written. The parsed days are cached per player and timestamp sequence, so
+unchanged histories are never parsed twice; values are always read from the
+entries, so a corrected price or point value is picked up on the next load.
+"""
+
+import threading
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .base import get_date_range
+
+# Marker for entries whose timestamp could not be parsed
+INVALID_DAY = -1
+
+_CACHE_MAX_ENTRIES = 20_000
+
+
+def to_day_index(timestamps) -> np.ndarray:
+    """Convert a sequence of timestamps to int32 days since epoch in one call.
+
+    Only the leading ``YYYY-MM-DD`` is used, so ``2024-08-01T00:30:00+02:00``
+    stays on August 1st instead of moving to the previous UTC day. Unparseable
+    or missing timestamps become ``INVALID_DAY``.
+    """
+    if len(timestamps) == 0:
+        return np.empty(0, dtype=np.int32)
+    try:
+        # Fast path: numpy truncates to the date prefix and parses natively
+        dates = np.asarray(timestamps, dtype="U10").astype("datetime64[D]")
+        if not np.isnat(dates).any():
+            return dates.astype(np.int32)
+    except (TypeError, ValueError):
+        pass
+    parsed = pd.to_datetime(
+        pd.Series(timestamps, dtype=object).astype(str).str[:10],
+        format="%Y-%m-%d",
+        errors="coerce",
+    )
+    days = parsed.to_numpy(dtype="datetime64[D]").astype(np.int64)
+    days[parsed.isna().to_numpy()] = INVALID_DAY
+    return days.astype(np.int32)
+
+
+def to_season_day_index(days: np.ndarray, spielzeit: str) -> np.ndarray:
+    """Shift days since epoch to days since the season start."""
+    season_start = np.datetime64(get_date_range(spielzeit)[0], "D").astype(np.int32)
+    return days - season_start
+
+
+def days_to_datetime(days: np.ndarray) -> pd.DatetimeIndex:
+    """UTC midnight of each day since epoch."""
+    return pd.to_datetime(np.asarray(days, dtype=np.int64), unit="D", utc=True)
+
+
+def history_version(timestamps: list) -> Tuple:
+    """Version of a timestamp sequence: its length and a hash of all timestamps.
+
+    Hashing the strings costs a fraction of parsing them, and any added,
+    removed or corrected timestamp changes the version.
+    """
+    return (len(timestamps), hash(tuple(timestamps)))
+
+
+def _nested_get(entry: dict, dotted_key: str):
+    for part in dotted_key.split("."):
+        entry = (entry or {}).get(part)
+    return entry
+
+
+_history_cache: Dict[Tuple[str, Hashable, Hashable], np.ndarray] = {}
+_history_cache_lock = threading.Lock()
+
+
+def normalize_history(
+    kind: str,
+    player_id,
+    history: list,
+    timestamp_key: str,
+    value_key: str,
+    version: Optional[Hashable] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return ``(days, values)`` for one player's history; parsed days are cached.
+
+    Args:
+        kind: Cache namespace, e.g. ``"price"`` or ``"point"``.
+        player_id: Player the history belongs to.
+        history: Raw history entries.
+        timestamp_key: Dotted key of the timestamp inside an entry.
+        value_key: Dotted key of the value inside an entry (missing -> 0).
+        version: Version of the history's timestamps; defaults to
+            ``history_version``. Values are never cached.
+
+    Returns:
+        int32 days since epoch (``INVALID_DAY`` for bad timestamps) and int64
+        values, in the original entry order.
+    """
+    timestamps = [_nested_get(entry, timestamp_key) for entry in history]
+    if version is None:
+        version = history_version(timestamps)
+    key = (kind, player_id, version)
+    with _history_cache_lock:
+        days = _history_cache.get(key)
+    if days is None:
+        days = to_day_index(timestamps)
+        with _history_cache_lock:
+            if len(_history_cache) >= _CACHE_MAX_ENTRIES:
+                _history_cache.clear()
+            _history_cache[key] = days
+
+    values = np.fromiter(
+        (int(_nested_get(entry, value_key) or 0) for entry in history), dtype=np.int64, count=len(history)
+    )
+    return days, values
+
+
+def clear_history_cache() -> None:
+    with _history_cache_lock:
+        _history_cache.clear()
@@ -1,56 +1,187 @@
 """Transfer-related CRUD operations."""
 
+from typing import Dict, List
+
+import numpy as np
+from pymongo import ASCENDING, IndexModel
 from pymongo.mongo_client import MongoClient
 import pandas as pd
-from datetime import datetime
-import logging
 
 from .base import get_date_range
+from .metrics import timed
+
+# Indexes the queries below rely on (created by crud.indexes.ensure_indexes)
+INDEXES = [
+    ("Transfers", IndexModel([("buy.date", ASCENDING)], name="buy_date")),
+    ("Transfers", IndexModel([("member_name", ASCENDING), ("buy.date", ASCENDING)], name="member_buy_date")),
+]
+
+
+TRANSFER_COLUMNS = [
+    "ID",
+    "Spieler",
+    "Mitspieler",
+    "Kaufdatum",
+    "Kaufpreis",
+    "Von",
+    "Verkaufsdatum",
+    "Verkaufspreis",
+    "An",
+    "Gewinn/Verlust",
+    "Gewinn %",
+    "Gewinn/Verlust pro Tag",
+]
 
+_TRANSFER_PROJECTION = {
+    "_id": 0,
+    "player_id": 1,
+    "player_name": 1,
+    "member_name": 1,
+    "buy.date": 1,
+    "buy.price": 1,
+    "buy.from_name": 1,
+    "sell.date": 1,
+    "sell.price": 1,
+    "sell.to_name": 1,
+}
 
+
+@timed()
 def get_transfers(db: MongoClient, spielzeit: str = "2024/2025") -> pd.DataFrame:
+    """Load all transfers of a season as a typed DataFrame.
+
+    Only the needed fields are projected and copied column by column from the
+    cursor; profit columns are computed vectorized. Prices and profits are
+    nullable ``Int64``, dates are ``datetime64`` (``NaT`` for unsold players).
+    """
     date_from, date_to = get_date_range(spielzeit)
     transfers_collection = db["Transfers"]
 
-    transfers = list(
-        transfers_collection.find(
-            {"buy.date": {"$gte": date_from, "$lte": date_to}}, {"_id": 0}
-        )
+    cursor = transfers_collection.find(
+        {"buy.date": {"$gte": date_from, "$lte": date_to}}, _TRANSFER_PROJECTION
     )
-    transfer_array = []
-    for transfer in transfers:
-        buy_price = transfer["buy"]["price"]
-        sell_price = transfer["sell"]["price"] if transfer["sell"] else None
-        buy_date = datetime.strptime(transfer["buy"]["date"], "%Y-%m-%d")
-        sell_date = (
-            datetime.strptime(transfer["sell"]["date"], "%Y-%m-%d")
-            if transfer["sell"]
-            else None
-        )
-        days = (sell_date - buy_date).days if sell_date else None
-        profit = sell_price - buy_price if sell_price else None
-        profit_percentage = round(profit / buy_price * 100) if profit else None
-        profit_per_day = round(profit / days) if profit and days else None
-        transfer_array.append(
-            {
-                "ID": transfer["player_id"],
-                "Spieler": transfer["player_name"],
-                "Mitspieler": transfer["member_name"],
-                "Kaufdatum": buy_date,
-                "Kaufpreis": buy_price,
-                "Von": transfer["buy"]["from_name"],
-                "Verkaufsdatum": sell_date,
-                "Verkaufspreis": sell_price,
-                "An": transfer["sell"]["to_name"] if transfer["sell"] else None,
-                "Gewinn/Verlust": profit,
-                "Gewinn %": profit_percentage,
-                "Gewinn/Verlust pro Tag": profit_per_day,
-            }
+    ids, players, members = [], [], []
+    buy_dates, buy_prices, sellers = [], [], []
+    sell_dates, sell_prices, buyers = [], [], []
+    for transfer in cursor:
+        buy = transfer["buy"]
+        sell = transfer.get("sell") or {}
+        ids.append(transfer["player_id"])
+        players.append(transfer["player_name"])
+        members.append(transfer["member_name"])
+        buy_dates.append(buy["date"])
+        buy_prices.append(buy["price"])
+        sellers.append(buy.get("from_name"))
+        sell_dates.append(sell.get("date"))
+        sell_prices.append(sell.get("price"))
+        buyers.append(sell.get("to_name"))
+
+    buy_date = pd.to_datetime(pd.Series(buy_dates, dtype=object), format="%Y-%m-%d")
+    sell_date = pd.to_datetime(pd.Series(sell_dates, dtype=object), format="%Y-%m-%d")
+    buy_price = pd.Series(buy_prices, dtype="Int64")
+    sell_price = pd.Series(sell_prices, dtype="Int64")
+    days = (sell_date - buy_date).dt.days.astype("Int64")
+
+    # A sale at price 0 or a profit of exactly 0 has no profit figures
+    profit = (sell_price - buy_price).where(sell_price.fillna(0) != 0)
+    has_profit = profit.fillna(0) != 0
+    profit_percentage = (profit / buy_price * 100).round().where(has_profit)
+    profit_per_day = (profit / days).round().where(has_profit & (days.fillna(0) != 0))
+
+    return pd.DataFrame(
+        {
+            "ID": pd.Series(ids, dtype=object),
+            "Spieler": pd.Series(players, dtype=object),
+            "Mitspieler": pd.Series(members, dtype=object),
+            "Kaufdatum": buy_date,
+            "Kaufpreis": buy_price,
+            "Von": pd.Series(sellers, dtype=object),
+            "Verkaufsdatum": sell_date,
+            "Verkaufspreis": sell_price,
+            "An": pd.Series(buyers, dtype=object),
+            "Gewinn/Verlust": profit,
+            "Gewinn %": profit_percentage.astype("Int64"),
+            "Gewinn/Verlust pro Tag": profit_per_day.astype("Int64"),
+        },
+        columns=TRANSFER_COLUMNS,
+    )
+
+
+class TransfersIndex:
+    """Transfers of one season with precomputed lookups, shared by all pages.
+
+    ``frame`` is the ``get_transfers`` frame sorted by Kaufdatum. Row positions
+    per member (Mitspieler), player (ID) and counterparty (Von, An) are grouped
+    once, so a lookup is a dict access plus ``iloc`` instead of a full boolean
+    mask. Date ranges are sliced by binary search on the sorted Kaufdatum.
+    The index is read-only; callers must not modify the returned frames.
+    """
+
+    GROUP_COLUMNS = ("Mitspieler", "ID", "Von", "An")
+
+    def __init__(self, transfers: pd.DataFrame):
+        self.frame = transfers.sort_values("Kaufdatum", kind="stable").reset_index(drop=True)
+        self._kaufdatum = self.frame["Kaufdatum"].to_numpy(dtype="datetime64[ns]")
+        # Positions per key are ascending, i.e. in Kaufdatum order; missing keys are left out
+        self._groups: Dict[str, Dict[object, np.ndarray]] = {
+            column: self.frame.groupby(column, sort=True).indices for column in self.GROUP_COLUMNS
+        }
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def empty(self) -> bool:
+        return self.frame.empty
+
+    @property
+    def members(self) -> List[str]:
+        """Members with at least one transfer, sorted by name."""
+        return list(self._groups["Mitspieler"])
+
+    def _positions(self, column: str, key) -> np.ndarray:
+        return self._groups[column].get(key, np.empty(0, dtype=np.intp))
+
+    def _date_bounds(self, start=None, end=None):
+        lo = 0 if start is None else np.searchsorted(self._kaufdatum, np.datetime64(pd.Timestamp(start)), "left")
+        hi = len(self._kaufdatum) if end is None else np.searchsorted(
+            self._kaufdatum, np.datetime64(pd.Timestamp(end)), "right"
         )
-    logging.info(transfer_array)
-    return pd.DataFrame(transfer_array)
+        return lo, hi
+
+    def rows(self, column: str, key, start=None, end=None) -> pd.DataFrame:
+        """Transfers whose ``column`` equals ``key``, optionally bought in [start, end]."""
+        positions = self._positions(column, key)
+        if start is not None or end is not None:
+            lo, hi = self._date_bounds(start, end)
+            positions = positions[np.searchsorted(positions, lo):np.searchsorted(positions, hi)]
+        return self.frame.iloc[positions]
+
+    def for_member(self, member: str, start=None, end=None) -> pd.DataFrame:
+        return self.rows("Mitspieler", member, start, end)
+
+    def for_player(self, player_id: str, start=None, end=None) -> pd.DataFrame:
+        return self.rows("ID", str(player_id), start, end)
+
+    def bought_from(self, name: str, start=None, end=None) -> pd.DataFrame:
+        return self.rows("Von", name, start, end)
+
+    def sold_to(self, name: str, start=None, end=None) -> pd.DataFrame:
+        return self.rows("An", name, start, end)
+
+    def between(self, start=None, end=None) -> pd.DataFrame:
+        """Transfers bought between ``start`` and ``end`` (both inclusive)."""
+        lo, hi = self._date_bounds(start, end)
+        return self.frame.iloc[lo:hi]
+
+    def date_range(self):
+        """(first, last) Kaufdatum of the season, or (None, None) without transfers."""
+        if self.empty:
+            return None, None
+        return self.frame["Kaufdatum"].iloc[0], self.frame["Kaufdatum"].iloc[-1]
 
 
+@timed()
 def count_second_bids(db: MongoClient, spielzeit: str = "2024/2025"):
     date_from, date_to = get_date_range(spielzeit)
 
@@ -72,6 +203,7 @@ def count_second_bids(db: MongoClient, spielzeit: str = "2024/2025"):
     return df
 
 
+@timed()
 def count_transfers_buys(db: MongoClient, spielzeit: str = "2024/2025"):
     date_from, date_to = get_date_range(spielzeit)
     transfers_collection = db["Transfers"]
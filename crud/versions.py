@@ -0,0 +1,202 @@
+"""Per-collection, per-season data version counters.
+
+Versions are stored in the ``DataVersions`` collection so they survive restarts
+and are shared by every app process. An in-process mirror makes reads free;
+only the first read per process touches the database. Counters are bumped by
+``crud.watcher.ChangeWatcher`` whenever a watched collection changes, or by
+``probe_data_versions`` when a content fingerprint changed, and are meant to be
+used as cache keys.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.mongo_client import MongoClient
+import pandas as pd
+
+from .base import SEASON_DATE_RANGES, get_date_range
+from .metrics import timed
+
+# Collections whose writes invalidate cached data
+VERSIONED_COLLECTIONS = ("Transfers", "Players", "PlayerPoints")
+
+VERSIONS_COLLECTION = "DataVersions"
+RESUME_TOKEN_ID = "_resume_token"
+
+_versions: Dict[Tuple[str, str], int] = {}
+_versions_loaded = False
+_versions_lock = threading.Lock()
+
+
+def _version_id(collection: str, spielzeit: str) -> str:
+    return f"{collection}|{spielzeit}"
+
+
+def _load_versions(db: MongoClient) -> None:
+    global _versions_loaded
+    for doc in db[VERSIONS_COLLECTION].find({"collection": {"$exists": True}}):
+        _versions[(doc["collection"], doc["spielzeit"])] = doc.get("version", 0)
+    _versions_loaded = True
+
+
+def get_data_version(db: MongoClient, collection: str, spielzeit: str) -> int:
+    """Current version of one collection for one season (0 if never bumped)."""
+    with _versions_lock:
+        if not _versions_loaded:
+            _load_versions(db)
+        return _versions.get((collection, spielzeit), 0)
+
+
+def get_data_versions(db: MongoClient, spielzeit: str) -> Dict[str, int]:
+    """Versions of all ``VERSIONED_COLLECTIONS`` for a season."""
+    return {collection: get_data_version(db, collection, spielzeit) for collection in VERSIONED_COLLECTIONS}
+
+
+def bump_data_versions(db: MongoClient, collection: str, seasons: Iterable[str]) -> None:
+    """Increment the version of a collection for the given seasons."""
+    versions_collection = db[VERSIONS_COLLECTION]
+    for spielzeit in seasons:
+        doc = versions_collection.find_one_and_update(
+            {"_id": _version_id(collection, spielzeit)},
+            {
+                "$inc": {"version": 1},
+                "$set": {
+                    "collection": collection,
+                    "spielzeit": spielzeit,
+                    "updated_at": pd.Timestamp.now().isoformat(),
+                },
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        with _versions_lock:
+            _versions[(collection, spielzeit)] = doc["version"]
+
+
+def bump_all_versions(db: MongoClient) -> None:
+    """Bump every collection for every season, e.g. after losing change stream history."""
+    for collection in VERSIONED_COLLECTIONS:
+        bump_data_versions(db, collection, SEASON_DATE_RANGES.keys())
+
+
+def season_for_date(date: Optional[str]) -> Optional[str]:
+    """Season whose date range contains an ISO date, if any."""
+    if not date:
+        return None
+    day = str(date)[:10]
+    for spielzeit, (date_from, date_to) in SEASON_DATE_RANGES.items():
+        if date_from <= day <= date_to:
+            return spielzeit
+    return None
+
+
+def live_seasons() -> List[str]:
+    """Seasons that contain today; price and point updates belong to these."""
+    today = pd.to_datetime("today").strftime("%Y-%m-%d")
+    seasons = [s for s, (date_from, date_to) in SEASON_DATE_RANGES.items() if date_from <= today <= date_to]
+    return seasons or list(SEASON_DATE_RANGES.keys())
+
+
+def get_resume_token(db: MongoClient):
+    doc = db[VERSIONS_COLLECTION].find_one({"_id": RESUME_TOKEN_ID})
+    return doc.get("token") if doc else None
+
+
+def save_resume_token(db: MongoClient, token) -> None:
+    db[VERSIONS_COLLECTION].replace_one(
+        {"_id": RESUME_TOKEN_ID}, {"_id": RESUME_TOKEN_ID, "token": token}, upsert=True
+    )
+
+
+def reset_version_mirror() -> None:
+    """Forget the in-process mirror so the next read reloads from the database."""
+    global _versions_loaded
+    with _versions_lock:
+        _versions.clear()
+        _versions_loaded = False
+
+
+# How long a probe result is trusted before the fingerprints are read again
+PROBE_INTERVAL_SECONDS = 60
+
+_last_probe: Dict[str, float] = {}
+
+
+def _history_size(field: str) -> dict:
+    return {"$sum": {"$size": {"$ifNull": [f"${field}", []]}}}
+
+
+def _fingerprint_pipelines(spielzeit: str) -> Dict[str, list]:
+    """One aggregation per collection returning count, max _id and a change counter.
+
+    Appending to a history or selling a player updates a document in place, so
+    count and max _id alone would miss it; the history sizes and the number of
+    sells cover those writes.
+    """
+    date_from, date_to = get_date_range(spielzeit)
+    return {
+        "Transfers": [
+            {"$match": {"buy.date": {"$gte": date_from, "$lte": date_to}}},
+            {"$group": {
+                "_id": None,
+                "count": {"$sum": 1},
+                "max_id": {"$max": "$_id"},
+                "sells": {"$sum": {"$cond": [{"$ifNull": ["$sell", False]}, 1, 0]}},
+            }},
+        ],
+        "Players": [
+            {"$group": {
+                "_id": None,
+                "count": {"$sum": 1},
+                "max_id": {"$max": "$_id"},
+                "prices": _history_size("price_history"),
+                "points": _history_size("point_history"),
+            }},
+        ],
+        "PlayerPoints": [
+            {"$group": {
+                "_id": None,
+                "count": {"$sum": 1},
+                "max_id": {"$max": "$_id"},
+                "points": _history_size("point_history"),
+            }},
+        ],
+    }
+
+
+@timed()
+def probe_data_versions(db: MongoClient, spielzeit: str, force: bool = False) -> Dict[str, int]:
+    """Bump the versions of a season whose content fingerprint changed.
+
+    Fallback for servers without change streams, and what the reload button
+    uses. Unless ``force`` is set, a season is probed at most once per
+    ``PROBE_INTERVAL_SECONDS`` per process. Versions bumped by another
+    process (e.g. the precompute job after rebuilding ``PlayerSeasonStats``)
+    are taken over from the database. The probe never writes statistics, so
+    it stays cheap enough to run inside a page load.
+    """
+    now = time.monotonic()
+    if not force and now - _last_probe.get(spielzeit, float("-inf")) < PROBE_INTERVAL_SECONDS:
+        return get_data_versions(db, spielzeit)
+    _last_probe[spielzeit] = now
+
+    versions_collection = db[VERSIONS_COLLECTION]
+    for collection, pipeline in _fingerprint_pipelines(spielzeit).items():
+        result = next(iter(db[collection].aggregate(pipeline)), None) or {}
+        result.pop("_id", None)
+        fingerprint = {key: str(value) for key, value in result.items()}
+        stored = versions_collection.find_one(
+            {"_id": _version_id(collection, spielzeit)}, {"fingerprint": 1, "version": 1}
+        )
+        if stored is None or stored.get("fingerprint") != fingerprint:
+            bump_data_versions(db, collection, [spielzeit])
+            versions_collection.update_one(
+                {"_id": _version_id(collection, spielzeit)}, {"$set": {"fingerprint": fingerprint}}
+            )
+        else:
+            get_data_version(db, collection, spielzeit)  # loads the mirror on first use
+            with _versions_lock:
+                _versions[(collection, spielzeit)] = stored.get("version", 0)
+    return get_data_versions(db, spielzeit)
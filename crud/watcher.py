@@ -0,0 +1,263 @@
+"""Change-stream watcher that bumps data versions and drops stale caches.
+
+Change streams need a replica set. For local testing start a single-node one:
+
+    mongod --replSet rs0 --dbpath /tmp/rs0 && mongosh --eval "rs.initiate()"
+
+On a standalone server, or when the user may not open change streams,
+``start_change_watcher`` returns None and the app falls back to
+``probe_data_versions`` polling.
+
+Delete events carry only the ``_id`` of the deleted document. To find the
+season of a deleted transfer, ``start_change_watcher`` enables pre-images on
+Transfers (MongoDB 6.0+); where that is not possible every season is bumped.
+
+Portfolio and market value caches are not dropped on transfer changes: a
+portfolio timeline compares its checkpoint with the Transfers version (see
+``portfolio._resume_portfolio_timeline``) and a market value timeline its
+watermark, so a new transfer only recalculates the days it affects.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from pymongo.errors import OperationFailure, PyMongoError
+from pymongo.mongo_client import MongoClient
+
+from .base import SEASON_DATE_RANGES, get_date_range
+from .player_stats import update_player_season_stats
+from .player_store import invalidate_player_store
+from .portfolio import mark_market_value_cache_stale
+from .versions import (
+    VERSIONED_COLLECTIONS,
+    bump_all_versions,
+    bump_data_versions,
+    get_resume_token,
+    live_seasons,
+    save_resume_token,
+    season_for_date,
+)
+
+# Server error codes for "change streams unsupported" and "resume point no longer in oplog"
+_CHANGE_STREAMS_UNSUPPORTED = (40573,)
+_CHANGE_STREAM_HISTORY_LOST = (286, 280)
+
+# Collections whose change events should carry the document before the change.
+# Players documents are large, so their deletes fall back to a season-wide mark.
+PRE_IMAGE_COLLECTIONS = ("Transfers",)
+
+
+def _changed_document(change: dict) -> dict:
+    """Document after the change, or the pre-image for deletes (empty if neither is available)."""
+    return change.get("fullDocument") or change.get("fullDocumentBeforeChange") or {}
+
+
+def affected_seasons(change: dict) -> Set[str]:
+    """Seasons touched by one change event."""
+    collection = change["ns"]["coll"]
+    if collection == "Transfers":
+        document = _changed_document(change)
+        spielzeit = season_for_date((document.get("buy") or {}).get("date"))
+        return {spielzeit} if spielzeit else set(SEASON_DATE_RANGES)
+    # Price and point updates belong to the season that is running now
+    return set(live_seasons())
+
+
+def price_change(change: dict) -> Tuple[bool, Optional[str]]:
+    """Whether a Players event changed price quotes, and the earliest quote date it changed.
+
+    The date is None when it cannot be told from the event (inserts, deletes,
+    replaced histories), meaning the whole season may have changed.
+    """
+    if change.get("operationType") != "update":
+        return True, None
+    description = change.get("updateDescription") or {}
+    fields = list(description.get("updatedFields") or {}) + list(description.get("removedFields") or [])
+    if any(array.get("field") == "price_history" for array in description.get("truncatedArrays") or []):
+        return True, None
+    history = (change.get("fullDocument") or {}).get("price_history") or []
+    days = []
+    for field in fields:
+        parts = field.split(".")
+        if parts[0] != "price_history":
+            continue
+        if len(parts) == 1 or not parts[1].isdigit() or int(parts[1]) >= len(history):
+            return True, None
+        timestamp = history[int(parts[1])].get("timestamp")
+        if not timestamp:
+            return True, None
+        days.append(str(timestamp)[:10])
+    return bool(days), min(days) if days else None
+
+
+def _merge_day(current: Optional[str], day: Optional[str]) -> Optional[str]:
+    # None means "from the season start" and wins over any date
+    if current is None or day is None:
+        return None
+    return min(current, day)
+
+
+class ChangeWatcher(threading.Thread):
+    """Background thread tailing change streams of ``VERSIONED_COLLECTIONS``.
+
+    Events are coalesced for ``debounce_seconds`` so a batch import bumps each
+    (collection, season) version once. On flush it bumps versions, drops the
+    in-process PlayerStore for changed Players seasons, rebuilds the season
+    stats of changed players and marks market value timelines holding a
+    re-quoted player stale from the changed date.
+    """
+
+    def __init__(self, db: MongoClient, debounce_seconds: float = 2.0, pre_images: bool = False):
+        super().__init__(name="comunio-change-watcher", daemon=True)
+        self.db = db
+        self.debounce_seconds = debounce_seconds
+        self.pre_images = pre_images
+        self._stop_event = threading.Event()
+        self._pending: Dict[str, Set[str]] = {}
+        # Player id (None: unknown player) -> earliest changed quote date (None: season start)
+        self._pending_prices: Dict[Optional[str], Optional[str]] = {}
+        self._pending_players: Set[str] = set()
+        self._resume_token = None
+        self._first_pending_at: Optional[float] = None
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _collect(self, change: dict) -> None:
+        collection = change["ns"]["coll"]
+        seasons = affected_seasons(change)
+        self._pending.setdefault(collection, set()).update(seasons)
+        if collection == "Players":
+            player_id = _changed_document(change).get("id")
+            key = str(player_id) if player_id is not None else None
+            if key is not None:
+                self._pending_players.add(key)
+            changed, day = price_change(change)
+            if changed:
+                self._pending_prices[key] = _merge_day(self._pending_prices.get(key, day), day)
+        self._resume_token = change["_id"]
+        if self._first_pending_at is None:
+            self._first_pending_at = time.monotonic()
+
+    def flush(self) -> None:
+        """Apply all collected changes now."""
+        pending, self._pending = self._pending, {}
+        prices, self._pending_prices = self._pending_prices, {}
+        players, self._pending_players = self._pending_players, set()
+        self._first_pending_at = None
+
+        # Statistics are written before the version bump, so a page load never
+        # caches the old statistics under the new Players version. They are
+        # rebuilt from the whole season, so corrected matchday points are picked up too
+        if players:
+            for spielzeit in pending.get("Players", set()):
+                update_player_season_stats(self.db, spielzeit, player_ids=players)
+
+        for collection, seasons in pending.items():
+            bump_data_versions(self.db, collection, seasons)
+            if collection == "Players":
+                for spielzeit in seasons:
+                    invalidate_player_store(spielzeit)
+
+        # Changed quotes make market value samples from their date on stale, but
+        # only for members holding the player; new quotes after the cached ones
+        # are also caught by the watermark. Portfolio timelines recalculate
+        # their last day on every read anyway.
+        for spielzeit in pending.get("Players", set()):
+            self._mark_market_values_stale(spielzeit, prices)
+
+        if self._resume_token is not None:
+            save_resume_token(self.db, self._resume_token)
+        if pending:
+            logging.info("Data versions bumped: %s", {c: sorted(s) for c, s in pending.items()})
+
+    def _mark_market_values_stale(self, spielzeit: str, prices: Dict[Optional[str], Optional[str]]) -> None:
+        season_start = get_date_range(spielzeit)[0]
+        if None in prices:
+            mark_market_value_cache_stale(self.db, spielzeit, max(prices[None] or season_start, season_start))
+            return
+        by_day: Dict[str, list] = {}
+        for player_id, day in prices.items():
+            by_day.setdefault(max(day or season_start, season_start), []).append(player_id)
+        for day, player_ids in by_day.items():
+            mark_market_value_cache_stale(self.db, spielzeit, day, player_ids)
+
+    def _watch(self, resume_token) -> None:
+        with _open_stream(self.db, self.pre_images, resume_after=resume_token, max_await_time_ms=500) as stream:
+            while not self._stop_event.is_set():
+                change = stream.try_next()
+                if change is not None:
+                    self._collect(change)
+                    continue
+                if self._first_pending_at is not None and (
+                    time.monotonic() - self._first_pending_at >= self.debounce_seconds
+                ):
+                    self.flush()
+                self._resume_token = stream.resume_token or self._resume_token
+
+    def run(self) -> None:
+        resume_token = get_resume_token(self.db)
+        while not self._stop_event.is_set():
+            try:
+                self._watch(resume_token)
+            except OperationFailure as e:
+                if e.code in _CHANGE_STREAM_HISTORY_LOST:
+                    # Changes since the stored token are unknown, so treat everything as changed
+                    logging.warning("Change stream history lost, bumping all data versions")
+                    bump_all_versions(self.db)
+                    resume_token = None
+                    continue
+                # The app sees the dead thread and falls back to version polling
+                logging.error("Change watcher stopped, falling back to polling: %s", e)
+                return
+            except PyMongoError as e:
+                logging.warning("Change watcher error, retrying: %s", e)
+                self._stop_event.wait(5)
+                resume_token = self._resume_token or resume_token
+            finally:
+                if self._pending:
+                    self.flush()
+
+
+def _open_stream(db: MongoClient, pre_images: bool, **kwargs):
+    pipeline = [{"$match": {"ns.coll": {"$in": list(VERSIONED_COLLECTIONS)}}}]
+    if pre_images:
+        kwargs["full_document_before_change"] = "whenAvailable"
+    return db.watch(pipeline, full_document="updateLookup", **kwargs)
+
+
+def enable_pre_images(db: MongoClient, collections: Iterable[str] = PRE_IMAGE_COLLECTIONS) -> bool:
+    """Record pre-images for change events of ``collections``; False if the server refuses."""
+    try:
+        for collection in collections:
+            db.command("collMod", collection, changeStreamPreAndPostImages={"enabled": True})
+    except OperationFailure as e:
+        logging.info("Change stream pre-images unavailable (%s), deletes bump versions only", e)
+        return False
+    return True
+
+
+def start_change_watcher(db: MongoClient, debounce_seconds: float = 2.0) -> Optional[ChangeWatcher]:
+    """Start a ChangeWatcher, or return None if change streams cannot be used.
+
+    Any server error (standalone server, missing privileges, ...) is logged
+    and the caller is expected to poll data versions instead.
+    """
+    pre_images = enable_pre_images(db)
+    try:
+        # Opening and closing a stream checks support before spawning the thread
+        _open_stream(db, pre_images, max_await_time_ms=1).close()
+    except OperationFailure as e:
+        if e.code in _CHANGE_STREAMS_UNSUPPORTED:
+            logging.info("Change streams unavailable (standalone server), watcher not started")
+        else:
+            logging.warning("Change streams unusable, polling data versions instead: %s", e)
+        return None
+    except PyMongoError as e:
+        logging.warning("Change watcher not started, polling data versions instead: %s", e)
+        return None
+    watcher = ChangeWatcher(db, debounce_seconds, pre_images=pre_images)
+    watcher.start()
+    return watcher
@@ -1,39 +1,154 @@
 """
 Data loading utilities for the Comunio app.
 Contains cached functions for loading data from the database.
+Results are cached in memory by st.cache_data and on disk as Arrow snapshots
+(see crud.snapshots), so a restart does not re-run the aggregations.
 """
 
+import functools
+
 import streamlit as st
 import pandas as pd
-import time
 import crud
 
 
-@st.cache_data
-def load_transfers(_db, spielzeit, date) -> pd.DataFrame:
+def timed_cache(name, cache=st.cache_data, **cache_kwargs):
+    """Streamlit cache decorator whose every call, hit or miss, is timed as span ``name``.
+
+    The span wraps the cache lookup and starts out as a hit; the function
+    body only runs on a miss and marks the span as such, so the Performance
+    page sees the hit ratio of each loader.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def on_miss(*args, **kwargs):
+            crud.current_span().cache = "miss"
+            return func(*args, **kwargs)
+
+        cached = cache(**cache_kwargs)(on_miss) if cache_kwargs else cache(on_miss)
+
+        @crud.timed(name)
+        @functools.wraps(func)
+        def load(*args, **kwargs):
+            crud.current_span().cache = "hit"
+            return cached(*args, **kwargs)
+
+        load.clear = cached.clear
+        return load
+
+    return decorator
+
+
+@st.cache_resource
+def ensure_indexes(_db):
+    """Create the indexes declared by the crud modules once per process"""
+    return crud.ensure_indexes(_db)
+
+
+@st.cache_resource
+def start_change_watcher(_db):
+    """Start the change-stream watcher once per process (None on a standalone server)"""
+    return crud.start_change_watcher(_db)
+
+
+@timed_cache("loader.transfers")
+def load_transfers(_db, spielzeit, version) -> pd.DataFrame:
     """Load transfers data for the specified season"""
-    start_time = time.time()
-    transfers = crud.get_transfers(_db, spielzeit)
-    end_time = time.time()
-    print(f"Loaded transfers in {end_time - start_time:.2f} seconds")
+    transfers = crud.load_with_snapshot(
+        "transfers", spielzeit, version, lambda: crud.get_transfers(_db, spielzeit), crud.TRANSFER_COLUMNS
+    )
     return transfers
 
 
-@st.cache_data
-def load_player_points(_db, spielzeit, date):
+# cache_resource hands every session the same object instead of a copy; the
+# index is read-only. Old versions age out once a few newer ones are cached.
+@timed_cache("loader.transfers_index", st.cache_resource, max_entries=8)
+def load_transfers_index(_db, spielzeit, version) -> crud.TransfersIndex:
+    """Sorted and grouped transfers of the season, built once per data version"""
+    return crud.TransfersIndex(load_transfers(_db, spielzeit, version))
+
+
+@timed_cache("loader.player_points")
+def load_player_points(_db, spielzeit, version):
     """Load player points data for the specified season"""
-    start_time = time.time()
-    player_points = crud.get_player_points_df(_db, spielzeit)
-    end_time = time.time()
-    print(f"Loaded player points in {end_time - start_time:.2f} seconds")
+    player_points = crud.load_with_snapshot(
+        "player_points",
+        spielzeit,
+        version,
+        lambda: crud.get_player_points_df(_db, spielzeit),
+        crud.PLAYER_POINTS_COLUMNS,
+    )
     return player_points
 
 
-@st.cache_data
-def load_player_data_combined(_db, spielzeit, date):
+@timed_cache("loader.player_data_combined")
+def load_player_data_combined(_db, spielzeit, version):
     """Load both player points and current market values in one query"""
-    start_time = time.time()
-    player_data = crud.get_player_points_with_market_value_df(_db, spielzeit)
-    end_time = time.time()
-    print(f"Loaded combined player data in {end_time - start_time:.2f} seconds")
+    player_data = crud.load_with_snapshot(
+        "player_data_combined",
+        spielzeit,
+        version,
+        lambda: crud.get_player_points_with_market_value_df(_db, spielzeit),
+        crud.STATS_COLUMNS,
+    )
     return player_data
+
+
+@timed_cache("loader.league_timeline")
+def load_league_timeline(_db, spielzeit, version):
+    """Load the daily portfolio figures of all members for the leaderboard"""
+    league_timeline = crud.load_with_snapshot(
+        "league_timeline",
+        spielzeit,
+        version,
+        lambda: crud.get_league_timeline(_db, spielzeit),
+        crud.LEAGUE_COLUMNS,
+    )
+    return league_timeline
+
+
+
+# Dataset name -> (loader, collection(s) whose data version keys it)
+DATASET_LOADERS = {
+    "transfers": (load_transfers, "Transfers"),
+    "transfers_index": (load_transfers_index, "Transfers"),
+    "player_points": (load_player_points, "Players"),
+    "player_data_combined": (load_player_data_combined, "Players"),
+    "league_timeline": (load_league_timeline, ("Transfers", "Players")),
+}
+
+
+class LazyDataset:
+    """Handle to one season dataset that is loaded on first access.
+
+    Results stay cached by st.cache_data per season/version.
+    """
+
+    def __init__(self, name, db, spielzeit, version):
+        self.name = name
+        self._loader = DATASET_LOADERS[name][0]
+        self._args = (db, spielzeit, version)
+
+    def get(self):
+        with crud.span(f"dataset.{self.name}") as s:
+            result = self._loader(*self._args)
+            s.rows = len(result)
+            return result
+
+
+def _dataset_version(versions, name):
+    collections = DATASET_LOADERS[name][1]
+    if isinstance(collections, tuple):
+        return tuple(versions[collection] for collection in collections)
+    return versions[collections]
+
+
+def open_datasets(_db, spielzeit, versions, names):
+    """Lazy handles for the named datasets; nothing else is loaded.
+
+    Args:
+        versions: Data version per collection, e.g. {"Transfers": 3}.
+        names: Dataset names as declared in a page's DATASETS.
+    """
+    return {name: LazyDataset(name, _db, spielzeit, _dataset_version(versions, name)) for name in names}
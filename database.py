@@ -1,6 +1,7 @@
 from pymongo.mongo_client import MongoClient
 import os
 from dotenv import load_dotenv
+from crud.query_monitor import get_query_monitor
 
 load_dotenv()
 mongo_uri = os.getenv("MONGO_URI")
@@ -10,10 +11,13 @@ _client: MongoClient | None = None
 
 
 def get_client() -> MongoClient:
-    """Return the singleton MongoClient, creating it if necessary."""
+    """Return the singleton MongoClient, creating it if necessary.
+
+    Every command is reported to the query monitor (see crud.query_monitor).
+    """
     global _client
     if _client is None:
-        _client = MongoClient(mongo_uri)
+        _client = MongoClient(mongo_uri, event_listeners=[get_query_monitor()])
     return _client
 
 
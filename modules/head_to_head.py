@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import crud
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
@@ -7,9 +8,13 @@ FARBE_S1 = "#1f77b4"  # Blau
 FARBE_S2 = "#ff7f0e"  # Orange
 
 
-def _abgeschlossene_trades(transfers: pd.DataFrame, spieler: str) -> pd.DataFrame:
+# Datasets from data_loader.DATASET_LOADERS this page needs
+DATASETS = ("transfers_index",)
+
+
+def _abgeschlossene_trades(transfers_index: crud.TransfersIndex, spieler: str) -> pd.DataFrame:
     """Gibt abgeschlossene Trades (Kauf + Verkauf vorhanden) eines Spielers zurück."""
-    df = transfers[transfers["Mitspieler"] == spieler].copy()
+    df = transfers_index.for_member(spieler)
     df = df[df["Verkaufsdatum"].notna()].copy()
     df["Gewinn"] = df["Verkaufspreis"] - df["Kaufpreis"]
     df["Haltedauer"] = (
@@ -18,9 +23,9 @@ def _abgeschlossene_trades(transfers: pd.DataFrame, spieler: str) -> pd.DataFram
     return df
 
 
-def _alle_trades(transfers: pd.DataFrame, spieler: str) -> pd.DataFrame:
+def _alle_trades(transfers_index: crud.TransfersIndex, spieler: str) -> pd.DataFrame:
     """Alle Trades (gekauft und/oder verkauft) eines Spielers."""
-    return transfers[transfers["Mitspieler"] == spieler].copy()
+    return transfers_index.for_member(spieler).copy()
 
 
 def _kennzahlen(df_abg: pd.DataFrame, df_alle: pd.DataFrame) -> dict:
@@ -71,18 +76,14 @@ def _format_euro(wert: float) -> str:
     return f"{wert:+,.0f} €".replace(",", ".")
 
 
-def show(transfers_data: pd.DataFrame, spielzeit: str):
+def show(transfers_index: crud.TransfersIndex, spielzeit: str):
     st.header("⚔️ Head-to-Head Vergleich")
 
-    if transfers_data is None or transfers_data.empty:
+    if transfers_index is None or transfers_index.empty:
         st.warning("Keine Transfer-Daten verfügbar.")
         return
 
-    if "Mitspieler" not in transfers_data.columns:
-        st.error("Spalte 'Mitspieler' nicht gefunden.")
-        return
-
-    spieler_liste = sorted(transfers_data["Mitspieler"].dropna().unique().tolist())
+    spieler_liste = transfers_index.members
 
     if len(spieler_liste) < 2:
         st.warning("Nicht genug Spieler für einen Vergleich.")
@@ -99,10 +100,10 @@ def show(transfers_data: pd.DataFrame, spielzeit: str):
         st.info("Bitte zwei verschiedene Spieler auswählen.")
         return
 
-    df1_abg = _abgeschlossene_trades(transfers_data, spieler1)
-    df2_abg = _abgeschlossene_trades(transfers_data, spieler2)
-    df1_alle = _alle_trades(transfers_data, spieler1)
-    df2_alle = _alle_trades(transfers_data, spieler2)
+    df1_abg = _abgeschlossene_trades(transfers_index, spieler1)
+    df2_abg = _abgeschlossene_trades(transfers_index, spieler2)
+    df1_alle = _alle_trades(transfers_index, spieler1)
+    df2_alle = _alle_trades(transfers_index, spieler2)
 
     kz1 = _kennzahlen(df1_abg, df1_alle)
     kz2 = _kennzahlen(df2_abg, df2_alle)
@@ -150,7 +151,7 @@ def show(transfers_data: pd.DataFrame, spielzeit: str):
         df1_plot = df1_abg.copy()
         df2_plot = df2_abg.copy()
 
-        spieler_col = "Spieler" if "Spieler" in transfers_data.columns else None
+        spieler_col = "Spieler" if "Spieler" in transfers_index.frame.columns else None
 
         if spieler_col:
             df1_plot = df1_plot.sort_values("Verkaufsdatum")
@@ -227,7 +228,7 @@ def show(transfers_data: pd.DataFrame, spielzeit: str):
     # ── Gemeinsame Spieler ──────────────────────────────────────────────────
     st.subheader("🤝 Gemeinsam gehandelte Spieler")
 
-    spieler_col = "Spieler" if "Spieler" in transfers_data.columns else None
+    spieler_col = "Spieler" if "Spieler" in transfers_index.frame.columns else None
     if spieler_col and not df1_abg.empty and not df2_abg.empty:
         gemeinsame = set(df1_abg[spieler_col].unique()) & set(df2_abg[spieler_col].unique())
 
@@ -4,15 +4,18 @@ from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
 import crud
 import utils
 import plotly.express as px
-import time
 
-def show(db, transfers, spielzeit):
+# Datasets from data_loader.DATASET_LOADERS this page needs
+DATASETS = ("transfers_index",)
+
+
+def show(db, transfers_index, spielzeit):
     """Display the Home page with current team overview"""
     
     st.header("Mein aktuelles Team")
     
-    # Guard against empty or malformed transfers data
-    if transfers.empty or 'Mitspieler' not in transfers.columns:
+    # Guard against a season without transfers
+    if transfers_index.empty:
         st.warning("Keine Transferdaten für die ausgewählte Saison gefunden.")
         return
 
@@ -20,14 +23,14 @@ def show(db, transfers, spielzeit):
     col1, col2 = st.columns([3, 7])
     with col1:
         # Get list of users from transfers data
-        users = transfers['Mitspieler'].unique()
+        users = transfers_index.members
         selected_user = st.selectbox("Benutzer auswählen:", users)
     
     with col2:
         st.info(f"Team von: **{selected_user}** | Saison: **{spielzeit}**")
     
     # Get current team for selected user
-    current_team = get_current_team(db, selected_user, spielzeit)
+    current_team = get_current_team(db, transfers_index, selected_user)
     
     if current_team.empty:
         st.warning(f"Keine aktuellen Spieler für {selected_user} in der Saison {spielzeit} gefunden.")
@@ -69,8 +72,7 @@ def display_portfolio_timeline(db, user_name, spielzeit):
         #     st.rerun()
     
     # Get timeline data (will use cache if available)
-    with st.spinner("Lade Portfolio Timeline..."):
-        start_time = time.time()
+    with st.spinner("Lade Portfolio Timeline..."), crud.span("home.portfolio_timelines") as load_span:
         investment_timeline = crud.get_or_calculate_portfolio_timeline(db, user_name, spielzeit)
         
         # Debug: Show what dates we have in the timeline
@@ -80,9 +82,8 @@ def display_portfolio_timeline(db, user_name, spielzeit):
             st.info(f"📊 Timeline Daten: {len(investment_timeline)} Einträge von {min_date} bis {max_date}")
         
         market_value_timeline = crud.get_or_calculate_market_value_timeline(db, user_name, spielzeit)
-        end_time = time.time()
-        
-        st.info(f"⚡ Ladezeit: {end_time - start_time:.2f} Sekunden")
+
+    st.info(f"⚡ Ladezeit: {load_span.duration:.2f} Sekunden")
     
     if investment_timeline.empty and market_value_timeline.empty:
         st.warning("Keine Timeline-Daten verfügbar für den ausgewählten Benutzer.")
@@ -213,15 +214,14 @@ def display_timeline_stats(investment_timeline, market_value_timeline):
                 st.warning("Keine Allokationsdaten verfügbar")
 
 
-def get_current_team(db, user_name, spielzeit):
-    """Get current team for a specific user in a specific season.
+def get_current_team(db, transfers_index, user_name):
+    """Get current team for a specific user from the season's TransfersIndex.
 
     Uses a single bulk MongoDB aggregation to fetch all market values instead
     of one query per player (fixes N+1 query problem).
     """
-    # Get all transfers for the user in this season
-    all_transfers = crud.get_transfers(db, spielzeit)
-    user_transfers = all_transfers[all_transfers['Mitspieler'] == user_name]
+    # The user's transfers of this season, already sorted by Kaufdatum
+    user_transfers = transfers_index.for_member(user_name)
 
     if user_transfers.empty:
         return pd.DataFrame()
@@ -377,8 +377,8 @@ def display_team_grid(db, team_df, spielzeit):
         if selected_row is not None and not selected_row.empty:
             player_id = selected_row["ID"].values[0]
             if player_id:
-                player_market_value = crud.get_player_market_value(db, str(player_id))
-                player_points = crud.get_player_points(db, str(player_id))
+                player_market_value = crud.get_player_market_value(db, str(player_id), spielzeit)
+                player_points = crud.get_player_points(db, str(player_id), spielzeit)
                 if player_market_value is not None and player_points is not None:
                     utils.plot_player_market_value(
                         player_market_value=player_market_value,
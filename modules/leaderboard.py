@@ -0,0 +1,70 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+
+import crud
+
+
+# Datasets from data_loader.DATASET_LOADERS this page needs
+DATASETS = ("league_timeline",)
+
+# Chartable columns of crud.LEAGUE_COLUMNS -> label
+KENNZAHLEN = {
+    "Gesamtwert": "Gesamtwert (Cash + Marktwert)",
+    "Portfolio_Wert_Aktuell": "Marktwert des Kaders",
+    "Verfuegbares_Cash": "Verfügbares Cash",
+    "Unrealisierter_Gewinn": "Unrealisierter Gewinn/Verlust",
+}
+
+
+def _format_euro(wert: float) -> str:
+    return f"{wert:,.0f} €".replace(",", ".")
+
+
+def show(league_timeline: pd.DataFrame, spielzeit: str):
+    """Display the league leaderboard with the value development of all members"""
+    st.header("🏆 Liga-Rangliste")
+
+    if league_timeline.empty:
+        st.warning(f"Keine Transfers in der Spielzeit {spielzeit}.")
+        return
+
+    standings = crud.league_standings(league_timeline)
+    st.caption(f"Stand: {standings['Datum'].iloc[0]}")
+    table = standings[
+        [
+            "Rang",
+            "Mitspieler",
+            "Gesamtwert",
+            "Verfuegbares_Cash",
+            "Portfolio_Wert_Aktuell",
+            "Portfolio_Wert_Kaufpreis",
+            "Unrealisierter_Gewinn",
+            "Anzahl_Spieler",
+        ]
+    ].rename(
+        columns={
+            "Verfuegbares_Cash": "Cash",
+            "Portfolio_Wert_Aktuell": "Marktwert",
+            "Portfolio_Wert_Kaufpreis": "Kaufwert",
+            "Unrealisierter_Gewinn": "Unrealisiert",
+            "Anzahl_Spieler": "Spieler",
+        }
+    )
+    for column in ["Gesamtwert", "Cash", "Marktwert", "Kaufwert", "Unrealisiert"]:
+        table[column] = table[column].map(_format_euro)
+    st.dataframe(table, hide_index=True, use_container_width=True)
+
+    kennzahl = st.radio(
+        "Kennzahl", list(KENNZAHLEN), format_func=KENNZAHLEN.get, horizontal=True
+    )
+    fig = px.line(
+        league_timeline,
+        x="Datum",
+        y=kennzahl,
+        color="Mitspieler",
+        category_orders={"Mitspieler": list(standings["Mitspieler"])},
+        labels={kennzahl: KENNZAHLEN[kennzahl]},
+    )
+    fig.update_layout(hovermode="x unified", yaxis_tickformat=",.0f")
+    st.plotly_chart(fig, use_container_width=True)
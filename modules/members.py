@@ -2,13 +2,16 @@ import streamlit as st
 import utils
 
 
-def show(transfers):
+# Datasets from data_loader.DATASET_LOADERS this page needs
+DATASETS = ("transfers_index",)
+
+
+def show(transfers_index):
     """Display the Members page with member statistics and profit analysis"""
     
-    members = transfers["Mitspieler"].unique()
     # Sort members by Gewinn/Verlust
     sorted_members = (
-        transfers.groupby("Mitspieler")["Gewinn/Verlust"]
+        transfers_index.frame.groupby("Mitspieler")["Gewinn/Verlust"]
         .sum()
         .sort_values(ascending=False, na_position="last")
         .index
@@ -16,8 +19,8 @@ def show(transfers):
 
     for member in sorted_members:
         st.write(f"### {member}")
-        member_transfers = transfers[transfers["Mitspieler"] == member]
-        member_transfers = member_transfers.sort_values(
+        all_member_transfers = transfers_index.for_member(member)
+        member_transfers = all_member_transfers.sort_values(
             by="Gewinn/Verlust", ascending=False, na_position="last"
         )
 
@@ -35,7 +38,7 @@ def show(transfers):
         with col1:
             # Display the 5 best Gewinn/Verlust pro Tag for each member
             st.write(
-                f"Gesamt: {transfers[transfers['Mitspieler'] == member]['Gewinn/Verlust'].sum():,.0f} € ({transfers[transfers['Mitspieler']==member]['Gewinn/Verlust'].count():,.0f} Trades)"
+                f"Gesamt: {all_member_transfers['Gewinn/Verlust'].sum():,.0f} € ({all_member_transfers['Gewinn/Verlust'].count():,.0f} Trades)"
             )
             st.write(member_transfers.head(5))
         with col2:
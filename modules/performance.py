@@ -0,0 +1,45 @@
+import pandas as pd
+import streamlit as st
+import crud
+
+
+# Datasets from data_loader.DATASET_LOADERS this page needs
+DATASETS = ()
+
+
+def show():
+    """Display the hidden Performance page with span percentiles of this process"""
+    snapshot = crud.metrics_snapshot()
+    if not snapshot:
+        st.info("Noch keine Messwerte in diesem Prozess.")
+        return
+
+    df = pd.DataFrame.from_dict(snapshot, orient="index").rename_axis("Span").reset_index()
+    df = df.sort_values("p95_ms", ascending=False)
+    st.subheader("Latenz pro Funktion")
+    st.dataframe(df, hide_index=True, use_container_width=True)
+
+    st.subheader("MongoDB-Abfragen pro Rerun")
+    reruns = crud.recent_reruns()
+    if reruns:
+        st.dataframe(
+            pd.DataFrame(reruns)[
+                ["label", "commands", "budget", "over_budget", "n_plus_one", "total_ms", "documents", "reply_bytes"]
+            ],
+            hide_index=True,
+            use_container_width=True,
+        )
+        with st.expander("Abfragen des letzten Reruns"):
+            st.dataframe(pd.DataFrame(reruns[0]["operations"]), hide_index=True, use_container_width=True)
+
+    st.subheader("Letzte Abläufe")
+    for trace in crud.recent_traces()[:10]:
+        with st.expander(f"{trace['name']} – {trace['duration_ms']:.1f} ms"):
+            st.json(trace)
+
+    col1, col2, col3 = st.columns([1, 1, 4])
+    col1.download_button("Prometheus", crud.metrics_prometheus(), "metrics.txt", "text/plain")
+    col2.download_button("JSON", crud.metrics_json(), "metrics.json", "application/json")
+    if col3.button("Zurücksetzen"):
+        crud.reset_metrics()
+        st.rerun()
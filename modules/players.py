@@ -2,6 +2,10 @@ import streamlit as st
 import utils
 
 
+# Datasets from data_loader.DATASET_LOADERS this page needs
+DATASETS = ("player_data_combined",)
+
+
 def show(player_data_combined):
     """Display the Players page with point analysis and market values"""
     
@@ -1,6 +1,10 @@
 import streamlit as st
 
 
+# Datasets from data_loader.DATASET_LOADERS this page needs
+DATASETS = ()
+
+
 def show():
     """Display the Teams page - placeholder for future functionality"""
     st.write("Teams page - coming soon!")
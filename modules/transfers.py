@@ -5,7 +5,11 @@ import crud
 import utils
 
 
-def show(db, transfers, spielzeit):
+# Datasets from data_loader.DATASET_LOADERS this page needs
+DATASETS = ("transfers_index",)
+
+
+def show(db, transfers_index, spielzeit):
     """Display the Home page with transfers grid and filtering options"""
     
     # configure the grid
@@ -16,10 +20,7 @@ def show(db, transfers, spielzeit):
         )
     with col2:
         # add a date filter input
-        date_range_standard = [
-            transfers["Kaufdatum"].min(),
-            transfers["Kaufdatum"].max(),
-        ]
+        date_range_standard = list(transfers_index.date_range())
         date_range = st.date_input("Von - Bis", date_range_standard)
         # st.date_input returns a single date if not used as a range, so check type
         if not isinstance(date_range, (list, tuple)) or len(date_range) < 2:
@@ -37,12 +38,10 @@ def show(db, transfers, spielzeit):
     }
 
     if date_range:
-        transfers_to_display = transfers[
-            (transfers["Kaufdatum"] >= date_range[0])
-            & (transfers["Kaufdatum"] <= date_range[1])
-        ]
+        # Binary search on the sorted Kaufdatum instead of two full-column masks
+        transfers_to_display = transfers_index.between(date_range[0], date_range[1])
     else:
-        transfers_to_display = transfers
+        transfers_to_display = transfers_index.frame
 
     if search_value:
         filtered_grouped_transfers = transfers_to_display.apply(
@@ -120,8 +119,8 @@ def show(db, transfers, spielzeit):
         if selected_row is not None and not selected_row.empty:
             player_id = selected_row["ID"].values[0]
             if player_id:
-                player_market_value = crud.get_player_market_value(db, str(player_id))
-                player_points = crud.get_player_points(db, str(player_id))
+                player_market_value = crud.get_player_market_value(db, str(player_id), spielzeit)
+                player_points = crud.get_player_points(db, str(player_id), spielzeit)
                 if player_market_value is not None and player_points is not None:
                     utils.plot_player_market_value(
                         player_market_value=player_market_value,
@@ -2,6 +2,10 @@ import streamlit as st
 import crud
 
 
+# Datasets from data_loader.DATASET_LOADERS this page needs
+DATASETS = ()
+
+
 def show(db, spielzeit):
     print(spielzeit)
     col1, col2 = st.columns([1, 1])
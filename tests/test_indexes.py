@@ -0,0 +1,24 @@
+from crud import leaderboard
+from crud.indexes import INDEXED_MODULES, declared_indexes, flagged_stages
+
+
+def test_grouped_sort_and_unfiltered_scan_are_not_flagged():
+    pipeline = [{"$group": {"_id": "$cache_key"}}, {"$sort": {"_id": 1}}]
+    explain = {"stages": [
+        {"$cursor": {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}},
+        {"$group": {"_id": "$cache_key"}},
+        {"$sort": {"sortKey": {"_id": 1}}},
+    ]}
+    assert flagged_stages("aggregate", pipeline, explain) == []
+
+
+def test_filtered_scan_and_in_memory_sort_are_flagged():
+    explain = {"queryPlanner": {"winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}}}
+    assert flagged_stages("find", {"member_name": "x"}, explain) == ["COLLSCAN", "SORT"]
+    assert flagged_stages("find", {}, explain) == ["SORT"]
+
+
+def test_leaderboard_indexes_are_declared_once():
+    assert leaderboard in INDEXED_MODULES
+    names = [index.document["name"] for index in declared_indexes()["Transfers"]]
+    assert names.count("buy_date") == 1
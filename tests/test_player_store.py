@@ -0,0 +1,37 @@
+import numpy as np
+
+from crud.player_store import PlayerStore
+
+
+def _store():
+    return PlayerStore.from_price_histories({
+        7: (np.array([20000, 20002]), np.array([1_000_000, 1_100_000])),
+        3: (np.array([20001]), np.array([500_000])),
+    })
+
+
+def test_rows_of_known_ids():
+    store = _store()
+    assert store.rows_of([3, "7"]).tolist() == [0, 1]
+
+
+def test_rows_of_unknown_ids_map_to_minus_one():
+    store = _store()
+    rows = store.rows_of([1, 99, "abc", None, "", float("nan"), 2**70, -3])
+    assert rows.tolist() == [-1] * 8
+    assert store.row_of("abc") is None
+    assert store.price_history(99) is None
+
+
+def test_rows_of_empty_inputs():
+    store = _store()
+    assert store.rows_of([]).shape == (0,)
+    empty = PlayerStore.from_price_histories({})
+    assert empty.rows_of([1, "x"]).tolist() == [-1, -1]
+
+
+def test_price_asof_matrix_uses_fallback_for_unknown_ids():
+    store = _store()
+    values, found = store.price_asof_matrix(["7", "unknown"], np.array([20001]), fallback=np.array([0, 42]))
+    assert values.tolist() == [[1_000_000], [42]]
+    assert found.tolist() == [[True], [False]]
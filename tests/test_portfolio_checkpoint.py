@@ -0,0 +1,46 @@
+import copy
+
+from crud.portfolio import _finish_checkpoint, history_digest
+
+
+def _transfers():
+    return [
+        {"_id": 1, "player_id": "7", "player_name": "A", "buy": {"date": "2025-08-01", "price": 1_000_000},
+         "sell": {"date": "2025-09-01", "price": 1_200_000}},
+        {"_id": 2, "player_id": "3", "player_name": "B", "buy": {"date": "2025-08-15", "price": 500_000},
+         "sell": None},
+        {"_id": 3, "player_id": "9", "player_name": "C", "buy": {"date": "2025-11-01", "price": 800_000}},
+    ]
+
+
+def test_late_sale_before_as_of_changes_digest():
+    transfers = _transfers()
+    before = history_digest(transfers, "2025-10-01")
+    transfers[1]["sell"] = {"date": "2025-09-20", "price": 600_000}
+    assert history_digest(transfers, "2025-10-01") != before
+
+
+def test_sale_after_as_of_keeps_digest():
+    transfers = _transfers()
+    before = history_digest(transfers, "2025-10-01")
+    transfers[1]["sell"] = {"date": "2025-10-20", "price": 600_000}
+    transfers.append({"_id": 4, "player_id": "5", "player_name": "D", "buy": {"date": "2025-10-02", "price": 1}})
+    assert history_digest(transfers, "2025-10-01") == before
+
+
+def test_advanced_checkpoint_matches_fresh_digest():
+    transfers = _transfers()
+    previous = _finish_checkpoint(
+        {"as_of": "2025-10-01", "cash": 0, "holdings": []}, transfers[:2], "2025/2026", 1
+    )
+    changed = copy.deepcopy(transfers[1:])
+    changed[0]["sell"] = {"date": "2025-11-10", "price": 600_000}
+    advanced = _finish_checkpoint(
+        {"as_of": "2025-12-01", "cash": 0, "holdings": []}, changed, "2025/2026", 2, previous=previous
+    )
+    assert advanced["history_digest"] == history_digest([transfers[0]] + changed, "2025-12-01")
+    assert advanced["last_transfer_id"] == 3
+    assert advanced["transfers_version"] == 2
+    assert advanced["season_range"] == ["2025-07-01", "2026-06-30"]
+    # The previous checkpoint is left as read, so an unchanged one is not rewritten
+    assert previous["last_transfer_id"] == 2 and previous["as_of"] == "2025-10-01"
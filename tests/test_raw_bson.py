@@ -0,0 +1,77 @@
+import datetime
+
+import bson
+from bson.raw_bson import RawBSONDocument
+import pyarrow as pa
+import pytest
+
+import bson.raw_bson
+from crud.raw_bson import columns_from_documents
+
+SCHEMA = {"Datum": pa.string(), "Marktwert": pa.int64(), "Spieler": pa.string(), "ID": pa.int64()}
+COLUMNS = list(SCHEMA)
+
+
+def _raw(document):
+    return RawBSONDocument(bson.encode(document))
+
+
+@pytest.fixture
+def no_inflation(monkeypatch):
+    def inflate(*args, **kwargs):
+        raise AssertionError("RawBSONDocument was inflated into a dict")
+
+    monkeypatch.setattr(bson.raw_bson, "_inflate_bson", inflate)
+
+
+def test_raw_rows_are_not_inflated(no_inflation):
+    documents = [
+        _raw({"Datum": "2025-07-01T07:00:00+02:00", "Marktwert": 1_000_000, "Spieler": "A", "ID": 1}),
+        _raw({"Spieler": "B", "ID": 2, "Datum": "2025-07-02T07:00:00+02:00", "Marktwert": 2_000_000}),
+    ]
+    df = columns_from_documents(documents, COLUMNS, schema=SCHEMA)
+    assert df.to_dict("list") == {
+        "Datum": ["2025-07-01T07:00:00+02:00", "2025-07-02T07:00:00+02:00"],
+        "Marktwert": [1_000_000, 2_000_000],
+        "Spieler": ["A", "B"],
+        "ID": [1, 2],
+    }
+    assert str(df["Marktwert"].dtype) == "int64"
+
+
+def test_unselected_fields_of_any_type_are_skipped(no_inflation):
+    document = _raw({
+        "nested": {"a": [1, 2, {"b": "c"}]},
+        "blob": bson.Binary(b"\x00\x01"),
+        "oid": bson.ObjectId(),
+        "when": datetime.datetime(2025, 7, 1),
+        "pattern": bson.Regex("^a", "i"),
+        "ID": 7,
+        "price": 1.5,
+    })
+    df = columns_from_documents([document], ["ID", "price"])
+    assert df.to_dict("list") == {"ID": [7], "price": [1.5]}
+
+
+def test_missing_and_mismatched_values_become_null():
+    documents = [
+        _raw({"ID": 1, "Marktwert": 5}),
+        _raw({"ID": 2, "Marktwert": None, "Spieler": 3}),
+        _raw({"ID": bson.Int64(3), "Marktwert": 7.0, "Datum": "x"}),
+    ]
+    df = columns_from_documents(documents, COLUMNS, batch_size=2, schema=SCHEMA)
+    assert df["ID"].tolist() == [1, 2, 3]
+    assert df["Marktwert"].isna().tolist() == [False, True, False]
+    assert df["Spieler"].isna().all()
+    assert df["Datum"].tolist()[2] == "x"
+
+
+def test_untyped_columns_decode_any_value():
+    when = datetime.datetime(2025, 7, 1)
+    df = columns_from_documents([_raw({"when": when, "tags": ["a"]}), {"when": when}], ["when", "tags"])
+    assert df["when"].tolist() == [when, when]
+    assert df["tags"].tolist()[0] == ["a"]
+
+
+def test_no_documents_give_empty_frame():
+    assert columns_from_documents([], COLUMNS, schema=SCHEMA).empty
@@ -0,0 +1,25 @@
+from crud.timestamps import clear_history_cache, normalize_history
+
+
+def _history(*prices):
+    return [
+        {"timestamp": f"2025-08-0{day}T00:30:00+02:00", "quotedPrice": price}
+        for day, price in enumerate(prices, start=1)
+    ]
+
+
+def test_corrected_value_is_not_served_from_cache():
+    clear_history_cache()
+    normalize_history("price", 7, _history(100, 200), "timestamp", "quotedPrice")
+    days, values = normalize_history("price", 7, _history(100, 999), "timestamp", "quotedPrice")
+    assert values.tolist() == [100, 999]
+    assert days.tolist() == [20301, 20302]
+
+
+def test_corrected_timestamp_is_parsed_again():
+    clear_history_cache()
+    history = _history(100, 200, 300)
+    normalize_history("price", 7, history, "timestamp", "quotedPrice")
+    history[1]["timestamp"] = "2025-08-05T00:30:00+02:00"
+    days, _ = normalize_history("price", 7, history, "timestamp", "quotedPrice")
+    assert days.tolist() == [20301, 20305, 20303]
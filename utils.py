@@ -10,6 +10,15 @@ def normalize_string(s: str) -> str:
     return unidecode(s).lower()
 
 
+def to_naive_utc(dates: pd.Series) -> pd.Series:
+    """Naive UTC datetimes; only parses when the column is not datetime64 yet."""
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, utc=True)
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert(None)
+    return dates
+
+
 def plot_player_market_value(
     player_market_value: pd.DataFrame,
     player_points: pd.DataFrame,
@@ -25,16 +34,12 @@ def plot_player_market_value(
     buy_date = pd.to_datetime(buy_date).date()
     sell_date = pd.to_datetime(sell_date).date() if sell_date else None
     # take only values from player_market_value for spielzeit
-    player_market_value["Datum"] = pd.to_datetime(
-        player_market_value["Datum"], utc=True
-    ).dt.tz_convert(None)
+    player_market_value["Datum"] = to_naive_utc(player_market_value["Datum"])
     player_market_value = player_market_value[
         (player_market_value["Datum"] >= pd.to_datetime(date_from))
         & (player_market_value["Datum"] <= pd.to_datetime(date_to))
     ]
-    converted_date = pd.to_datetime(player_points["Datum"], utc=True).dt.tz_convert(
-        None
-    )
+    converted_date = to_naive_utc(player_points["Datum"])
     player_points = player_points[
         (converted_date >= pd.to_datetime(date_from))
         & (converted_date <= pd.to_datetime(date_to))